@@ -3,12 +3,11 @@ import { enterLevel } from "./utils/enter_level.js";
 
 export default tool({
   description:
-    "Navigate to a specific level from the overworld. Supports levels 1-7 in the 'top' world. Must be in overworld (not currently playing a level) to use this tool.",
+    "Navigate to a specific level from the overworld. Moves the cursor to the level along the shortest path on the current map. Must be in overworld (not currently playing a level) to use this tool.",
   args: {
-    level: tool.schema.string().describe("Level number to enter (e.g., '1', '2', '3'). Supports levels 1-7 in the top world."),
-    world: tool.schema.string().optional().describe("World name (default: 'top')"),
+    level: tool.schema.string().describe("Level to enter: the number shown on the map (e.g., '1', '2', '3') or the level's name."),
   },
-  async execute(args: { level: string; world?: string }) {
-    return enterLevel(args.level, args.world);
+  async execute(args: { level: string }) {
+    return enterLevel(args.level);
   },
-});
\ No newline at end of file
+});
@@ -0,0 +1,14 @@
+import { tool } from "@opencode-ai/plugin";
+import { planPush } from "./utils/plan_push.js";
+
+export default tool({
+  description: "Plan the shortest moves that push a text tile (e.g. 'flag', 'win') onto a target cell, walking around obstacles and pushing anything in the way. Returns the moves without executing them, plus the rules formed or broken along the way.",
+  args: {
+    word: tool.schema.string().describe("Word on the text tile to push, e.g. 'flag' for text_flag"),
+    target_x: tool.schema.number().describe("Target x-coordinate for the text tile"),
+    target_y: tool.schema.number().describe("Target y-coordinate for the text tile"),
+  },
+  async execute(args) {
+    return await planPush(args.word, args.target_x, args.target_y);
+  },
+});
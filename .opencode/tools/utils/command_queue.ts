@@ -0,0 +1,128 @@
+import * as fs from "fs";
+import * as net from "net";
+import * as path from "path";
+import { getLastAck } from "./poll_state.js";
+import type { StrandedWord } from "./models.js";
+
+const GAME_DIR = "/Users/matthiasmatt/Library/Application Support/Steam/steamapps/common/Baba Is You/Baba Is You.app/Contents/Resources/Data/baba_is_eval";
+export const COMMANDS_DIR = process.env.BABA_COMMANDS_DIR ?? path.join(GAME_DIR, "commands");
+// Set when automation/command_daemon.py owns the commands directory
+export const COMMAND_SOCKET = process.env.BABA_COMMAND_SOCKET;
+const SOCKET_TIMEOUT_MS = 5000;
+// The daemon answers a submission once the commands are in a file, which can
+// wait for the game to acknowledge the previous one (ACK_TIMEOUT, 10 s in
+// automation/config.py)
+const SUBMIT_TIMEOUT_MS = 15000;
+// Errors meaning the daemon never received the request
+const NOT_RUNNING_CODES = ["ENOENT", "ECONNREFUSED"];
+
+export function commandLua(cmd: string): string {
+  if (cmd === "undo") {
+    return "undo()";
+  }
+  if (cmd === "restart" || cmd === "restart_instant") {
+    return `command("restart_instant",1)`;
+  }
+  return `command("${cmd}",1)`;
+}
+
+// First free file after the last one the game acknowledged (older files may
+// have been collected by the daemon)
+function getNextCommandFile(): number {
+  const lastAck = getLastAck();
+  let k = lastAck === null ? 0 : lastAck + 1;
+  while (true) {
+    const cmdPath = path.join(COMMANDS_DIR, `${k}.lua`);
+    if (!fs.existsSync(cmdPath)) {
+      return k;
+    }
+    k++;
+  }
+}
+
+function writeCommandFile(commands: string[]): number {
+  if (!fs.existsSync(COMMANDS_DIR)) {
+    fs.mkdirSync(COMMANDS_DIR, { recursive: true });
+  }
+  const k = getNextCommandFile();
+  // Renamed into place so the game never reads a partially written file
+  const tmpPath = path.join(COMMANDS_DIR, `.${k}.lua.tmp`);
+  fs.writeFileSync(tmpPath, commands.map(commandLua).join("\n") + "\n");
+  fs.renameSync(tmpPath, path.join(COMMANDS_DIR, `${k}.lua`));
+  return k;
+}
+
+// One request/response line with the daemon
+export function requestDaemon(socketPath: string, request: object, timeoutMs: number = SOCKET_TIMEOUT_MS): Promise<any> {
+  return new Promise((resolve, reject) => {
+    const socket = net.createConnection(socketPath);
+    let buffer = "";
+    let answered = false;
+    socket.setTimeout(timeoutMs, () => socket.destroy(new Error("command daemon timed out")));
+    socket.on("connect", () => socket.write(JSON.stringify(request) + "\n"));
+    socket.on("data", chunk => {
+      buffer += chunk.toString();
+      const end = buffer.indexOf("\n");
+      if (end < 0 || answered) {
+        return;
+      }
+      answered = true;
+      socket.end();
+      try {
+        resolve(JSON.parse(buffer.slice(0, end)));
+      } catch (error) {
+        reject(error);
+      }
+    });
+    socket.on("error", reject);
+    // Without this a daemon that hangs up without a line would never settle
+    // (after an error event the promise is already rejected)
+    socket.on("close", () => {
+      if (!answered) {
+        reject(new Error("command daemon closed the connection without answering"));
+      }
+    });
+  });
+}
+
+async function submitToDaemon(socketPath: string, commands: string[]): Promise<number> {
+  const response = await requestDaemon(socketPath, { commands }, SUBMIT_TIMEOUT_MS);
+  if (typeof response.key !== "number") {
+    throw new Error(response.error ?? "invalid command daemon response");
+  }
+  return response.key;
+}
+
+// Rule words the commands would leave stuck in a corner or frozen against a
+// wall, predicted by the daemon on the current state. Empty when no daemon
+// is configured or it cannot tell.
+export async function checkCommands(commands: string[]): Promise<StrandedWord[]> {
+  if (!COMMAND_SOCKET) {
+    return [];
+  }
+  try {
+    const response = await requestDaemon(COMMAND_SOCKET, { op: "check", commands });
+    return Array.isArray(response.strands) ? response.strands : [];
+  } catch {
+    return [];
+  }
+}
+
+// Queue commands ("right", "undo", "restart", ...) as one command file and
+// return its number. Goes through the command daemon when one is configured,
+// otherwise probes for the next free file like before. Only a daemon that is
+// not running falls back to probing: once it has the request (a timeout, a
+// dropped connection) it may still write the file, and writing it here too
+// would run the moves twice, so those errors are thrown instead.
+export async function submitCommands(commands: string[]): Promise<number> {
+  if (COMMAND_SOCKET) {
+    try {
+      return await submitToDaemon(COMMAND_SOCKET, commands);
+    } catch (error: any) {
+      if (!NOT_RUNNING_CODES.includes(error?.code)) {
+        throw new Error(`Command daemon did not confirm the commands (${error?.message ?? error}); they may still run, check the state before resending`);
+      }
+    }
+  }
+  return writeCommandFile(commands);
+}
@@ -1,12 +1,8 @@
-import * as fs from "fs";
-import * as path from "path";
 import { getRawGameState, getGameStateAsJson } from "./get_game_state.js";
 import { getRulesFromGrid, getStatePositionsFromGrid } from "./base.js";
 import { waitForStateSettle, checkWinStatus } from "./poll_state.js";
-import type { ToolResponse, CommandExecutionData, LevelControlData, StateDiff, Rule } from "./models.js";
-
-const GAME_DIR = "/Users/matthiasmatt/Library/Application Support/Steam/steamapps/common/Baba Is You/Baba Is You.app/Contents/Resources/Data/baba_is_eval";
-const COMMANDS_DIR = path.join(GAME_DIR, "commands");
+import { checkCommands, submitCommands } from "./command_queue.js";
+import type { ToolResponse, CommandExecutionData, LevelControlData, StateDiff, Rule, StrandedWord } from "./models.js";
 
 const VALID_COMMANDS = ["right", "up", "left", "down", "idle"];
 
@@ -139,15 +135,23 @@ export function calculateStateDiff(
   };
 }
 
-function getNextCommandFile(): number {
-  let k = 0;
-  while (true) {
-    const cmdPath = path.join(COMMANDS_DIR, `${k}.lua`);
-    if (!fs.existsSync(cmdPath)) {
-      return k;
-    }
-    k++;
+function strandedWarning(stranded: StrandedWord[]): string {
+  if (stranded.length === 0) {
+    return "";
   }
+  const words = stranded.map(s => `${s.word} at (${s.x}, ${s.y}) (${s.reason})`).join(", ");
+  return ` Warning: these rule words are likely stuck for good now: ${words}. Undo if you still need to move them.`;
+}
+
+// The daemon may have queued the commands even though submitting failed, so
+// the tool reports it instead of guessing
+function submitError(error: unknown): string {
+  const errorResponse: ToolResponse<null> = {
+    success: false,
+    data: null,
+    message: error instanceof Error ? error.message : String(error)
+  };
+  return JSON.stringify(errorResponse);
 }
 
 export async function executeCommands(commandsStr: string, returnInsights: boolean = true): Promise<string> {
@@ -178,18 +182,19 @@ export async function executeCommands(commandsStr: string, returnInsights: boole
     return JSON.stringify(errorResponse);
   }
 
-  const cmdFileNum = getNextCommandFile();
-  const cmdPath = path.join(COMMANDS_DIR, `${cmdFileNum}.lua`);
+  // Predicted on the state before the batch and reported with the result
+  // rather than blocking it: a stuck word may still start a rule along its wall
+  const stranded = await checkCommands(validCmds);
+  const strandWarning = strandedWarning(stranded);
 
-  const luaContent = validCmds.map(cmd => {
-    if (cmd === "undo") {
-      return "undo()";
-    }
-    return `command("${cmd}",1)`;
-  }).join("\n") + "\n";
-  fs.writeFileSync(cmdPath, luaContent);
+  let cmdFileNum: number;
+  try {
+    cmdFileNum = await submitCommands(validCmds);
+  } catch (error) {
+    return submitError(error);
+  }
 
-  const pollResult = await waitForStateSettle();
+  const pollResult = await waitForStateSettle({ commandFile: cmdFileNum });
 
   const afterGrid = pollResult.rawState.grid;
   const afterRules = getRulesFromGrid(pollResult.rawState.grid);
@@ -202,7 +207,7 @@ export async function executeCommands(commandsStr: string, returnInsights: boole
     const winPositions = getStatePositionsFromGrid(gameStateJson, afterGrid, "win");
     const levelWon = checkWinStatus();
 
-    let message = `Partial execution. Commands may have partially executed.`;
+    let message = `Partial execution. Commands may have partially executed.${strandWarning}`;
     if (youPositions.length === 0) {
       message += " Warning: No YOU entity found! You may have broken the 'X IS YOU' rule. Options: 1) Use restart_level to restart the level 2) Use undo_multiple(n=1) to undo the last move and restore YOU";
     }
@@ -213,7 +218,8 @@ export async function executeCommands(commandsStr: string, returnInsights: boole
       you_positions: youPositions,
       win_positions: winPositions,
       level_won: levelWon,
-      diff
+      diff,
+      ...(stranded.length > 0 ? { stranded } : {})
     };
     const response: ToolResponse<typeof data> = {
       success: false,
@@ -224,10 +230,10 @@ export async function executeCommands(commandsStr: string, returnInsights: boole
   }
 
   if (!returnInsights) {
-    const response: ToolResponse<{ executed: string[]; diff: StateDiff }> = {
+    const response: ToolResponse<{ executed: string[]; diff: StateDiff; stranded?: StrandedWord[] }> = {
       success: true,
-      data: { executed: validCmds, diff },
-      message: `Executed ${validCmds.length} command(s)`
+      data: { executed: validCmds, diff, ...(stranded.length > 0 ? { stranded } : {}) },
+      message: `Executed ${validCmds.length} command(s)${strandWarning}`
     };
     return JSON.stringify(response);
   }
@@ -237,7 +243,7 @@ export async function executeCommands(commandsStr: string, returnInsights: boole
   const winPositions = getStatePositionsFromGrid(gameStateJson, afterGrid, "win");
   const levelWon = checkWinStatus();
 
-  let message = `Executed ${validCmds.length} command(s)`;
+  let message = `Executed ${validCmds.length} command(s)${strandWarning}`;
   let success = true;
   if (levelWon) {
     message = "Level won!";
@@ -252,7 +258,8 @@ export async function executeCommands(commandsStr: string, returnInsights: boole
     you_positions: youPositions,
     win_positions: winPositions,
     level_won: levelWon,
-    diff
+    diff,
+    ...(stranded.length > 0 && !levelWon ? { stranded } : {})
   };
 
   const response: ToolResponse<typeof data> = {
@@ -265,11 +272,14 @@ export async function executeCommands(commandsStr: string, returnInsights: boole
 }
 
 export async function restartLevel(returnInsights: boolean = true): Promise<string> {
-  const cmdFileNum = getNextCommandFile();
-  const cmdPath = path.join(COMMANDS_DIR, `${cmdFileNum}.lua`);
-  fs.writeFileSync(cmdPath, `command("restart_instant", 1)\n`);
+  let cmdFileNum: number;
+  try {
+    cmdFileNum = await submitCommands(["restart"]);
+  } catch (error) {
+    return submitError(error);
+  }
 
-  const pollResult = await waitForStateSettle();
+  const pollResult = await waitForStateSettle({ commandFile: cmdFileNum });
 
   try {
     const gameStateJson = await getGameStateAsJson();
@@ -320,15 +330,14 @@ export async function restartLevel(returnInsights: boolean = true): Promise<stri
 
 export async function undoMultiple(n: number, returnInsights: boolean = true): Promise<string> {
   const numUndos = Math.min(n, 50);
-  const cmdFileNum = getNextCommandFile();
-  const cmdPath = path.join(COMMANDS_DIR, `${cmdFileNum}.lua`);
-  let luaContent = "";
-  for (let i = 0; i < numUndos; i++) {
-    luaContent += "undo()\n";
+  let cmdFileNum: number;
+  try {
+    cmdFileNum = await submitCommands(Array(numUndos).fill("undo"));
+  } catch (error) {
+    return submitError(error);
   }
-  fs.writeFileSync(cmdPath, luaContent);
 
-  const pollResult = await waitForStateSettle();
+  const pollResult = await waitForStateSettle({ commandFile: cmdFileNum });
 
   try {
     if (pollResult.rawState.grid.length === 0) {
@@ -38,7 +38,7 @@ export function getEntityLegend(): Record<string, string> {
 }
 
 const WORLDS_DIR = "/Users/matthiasmatt/Library/Application Support/Steam/steamapps/common/Baba Is You/Baba Is You.app/Contents/Resources/Data/Worlds/baba";
-const STATE_PATH = path.join(WORLDS_DIR, "world_data.txt");
+const STATE_PATH = process.env.BABA_STATE_PATH ?? path.join(WORLDS_DIR, "world_data.txt");
 
 function filterGridByRelevance(grid: string[][], relevantSubjects: Set<string>): string[][] {
   return grid.map(row =>
@@ -2,8 +2,8 @@ import * as fs from "fs";
 import * as path from "path";
 
 const WORLDS_DIR = "/Users/matthiasmatt/Library/Application Support/Steam/steamapps/common/Baba Is You/Baba Is You.app/Contents/Resources/Data/Worlds/baba";
-const COMMANDS_DIR = path.join(WORLDS_DIR, "commands");
-const STATE_PATH = path.join(WORLDS_DIR, "world_data.txt");
+const COMMANDS_DIR = process.env.BABA_COMMANDS_DIR ?? path.join(WORLDS_DIR, "commands");
+const STATE_PATH = process.env.BABA_STATE_PATH ?? path.join(WORLDS_DIR, "world_data.txt");
 
 export function leaveLevel(reverse_moves: boolean = true): string {
   try {
@@ -90,6 +90,30 @@ export interface CommandExecutionData {
   you_positions: { x: number; y: number }[];
   win_positions: { x: number; y: number }[];
   level_won: boolean;
+  stranded?: StrandedWord[];  // rule words the batch likely left stuck for good
+}
+
+// Rule word a batch would leave stuck for good (automation/solver/deadlock.py)
+export interface StrandedWord {
+  word: string;
+  x: number;
+  y: number;
+  reason: string;
+}
+
+// Push plan from automation/solver/macro.py
+export interface RuleChange {
+  step: number;
+  move: string;
+  formed: string[];
+  broken: string[];
+}
+
+export interface PushPlanData {
+  moves: Direction[];
+  formed: string[];
+  broken: string[];
+  changes: RuleChange[];
 }
 
 // Shortest Path Data Structure
@@ -0,0 +1,120 @@
+// Shortest cursor route on the overworld, from the map exported by lua/io.lua
+// while level_name=map (same rules as automation/overworld.py)
+
+const OVERWORLD_LEVEL_NAME = "map";
+const MAP_CURSOR = "cursor";
+const MAP_WALKABLE = new Set(["level", "line", "path"]);
+
+const DIRECTIONS: [string, number, number][] = [
+  ["up", 0, -1],
+  ["down", 0, 1],
+  ["left", -1, 0],
+  ["right", 1, 0],
+];
+
+export interface MapLevel {
+  x: number;
+  y: number;
+  file: string;
+  name: string;
+  number: string;
+}
+
+export interface Overworld {
+  cursor: { x: number; y: number } | null;
+  walkable: Set<string>;
+  levels: MapLevel[];
+}
+
+const cellKey = (x: number, y: number) => `${x},${y}`;
+
+function iniValue(content: string, key: string): string | null {
+  const match = content.match(new RegExp(`^\\s*${key}\\s*=(.*)$`, "m"));
+  return match ? match[1]!.trim() : null;
+}
+
+export function levelLabel(level: MapLevel): string {
+  return level.name || level.file || `${level.number} at (${level.x}, ${level.y})`;
+}
+
+export function parseMapLevels(value: string): MapLevel[] {
+  const levels: MapLevel[] = [];
+  for (const record of value.split("€")) {
+    const fields = record.split("|");
+    if (fields.length < 5) continue;
+    const x = Math.trunc(Number(fields[0]));
+    const y = Math.trunc(Number(fields[1]));
+    if (Number.isNaN(x) || Number.isNaN(y)) continue;
+    levels.push({ x, y, file: fields[2]!, name: fields[3]!, number: fields[4]!.replace(/\.0$/, "") });
+  }
+  return levels;
+}
+
+// The overworld from world_data.txt content, null unless the game is on it
+export function readOverworld(content: string): Overworld | null {
+  if (iniValue(content, "level_name") !== OVERWORLD_LEVEL_NAME) {
+    return null;
+  }
+  const levels = parseMapLevels(iniValue(content, "levels") ?? "");
+  const walkable = new Set(levels.map(level => cellKey(level.x, level.y)));
+  let cursor: { x: number; y: number } | null = null;
+  for (const unit of (iniValue(content, "state") ?? "").split("€")) {
+    const parts = unit.split("|");
+    if (parts.length < 21) continue;
+    const x = parseInt(parts[3]!);
+    const y = parseInt(parts[4]!);
+    if (parts[1] === MAP_CURSOR && cursor === null) {
+      cursor = { x, y };
+    } else if (MAP_WALKABLE.has(parts[1]!)) {
+      walkable.add(cellKey(x, y));
+    }
+  }
+  return { cursor, walkable, levels };
+}
+
+// Level by number ("3", "level_3"), file ("3level") or display name
+export function findLevel(overworld: Overworld, level: string): MapLevel | undefined {
+  let wanted = level.trim().toLowerCase();
+  if (wanted.startsWith("level_")) {
+    wanted = wanted.slice("level_".length);
+  }
+  return (
+    overworld.levels.find(l => l.number.toLowerCase() === wanted) ??
+    overworld.levels.find(l => [wanted, `${wanted}level`].includes(l.file.toLowerCase())) ??
+    overworld.levels.find(l => l.name.toLowerCase() === wanted)
+  );
+}
+
+// BFS over walkable cells from the cursor; null if there is no path
+export function routeTo(overworld: Overworld, target: { x: number; y: number }): string[] | null {
+  const start = overworld.cursor;
+  const targetKey = cellKey(target.x, target.y);
+  if (start === null || !overworld.walkable.has(targetKey)) {
+    return null;
+  }
+  const previous = new Map<string, [string, string]>();
+  const seen = new Set([cellKey(start.x, start.y)]);
+  const frontier: [number, number][] = [[start.x, start.y]];
+  for (let head = 0; head < frontier.length; head++) {
+    const [x, y] = frontier[head]!;
+    let key = cellKey(x, y);
+    if (key === targetKey) {
+      const moves: string[] = [];
+      while (previous.has(key)) {
+        const [from, move] = previous.get(key)!;
+        moves.push(move);
+        key = from;
+      }
+      return moves.reverse();
+    }
+    for (const [move, dx, dy] of DIRECTIONS) {
+      const next = cellKey(x + dx, y + dy);
+      if (overworld.walkable.has(next) && !seen.has(next)) {
+        seen.add(next);
+        previous.set(next, [key, move]);
+        frontier.push([x + dx, y + dy]);
+      }
+    }
+  }
+  return null;
+}
@@ -0,0 +1,55 @@
+import { COMMAND_SOCKET, requestDaemon } from "./command_queue.js";
+import type { ToolResponse, PushPlanData } from "./models.js";
+
+// The search runs in the command daemon; allow it more than a submission
+const PLAN_TIMEOUT_MS = 30000;
+
+export async function planPush(word: string, target_x: number, target_y: number): Promise<string> {
+  const text = word.trim().toLowerCase().replace(/^text_/, "");
+  if (!COMMAND_SOCKET) {
+    const errorResponse: ToolResponse<null> = {
+      success: false,
+      data: null,
+      message: "Push planning needs the command daemon (BABA_COMMAND_SOCKET is not set)"
+    };
+    return JSON.stringify(errorResponse);
+  }
+
+  let plan: any;
+  try {
+    plan = await requestDaemon(COMMAND_SOCKET, { op: "plan", word: text, x: target_x, y: target_y }, PLAN_TIMEOUT_MS);
+  } catch (error) {
+    const errorResponse: ToolResponse<null> = {
+      success: false,
+      data: null,
+      message: `Push planning failed: ${error}`
+    };
+    return JSON.stringify(errorResponse);
+  }
+
+  if (plan.error || !Array.isArray(plan.moves)) {
+    const errorResponse: ToolResponse<null> = {
+      success: false,
+      data: null,
+      message: plan.error ?? `No way to push ${text} to (${target_x}, ${target_y})`
+    };
+    return JSON.stringify(errorResponse);
+  }
+
+  const data: PushPlanData = {
+    moves: plan.moves,
+    formed: plan.formed,
+    broken: plan.broken,
+    changes: plan.changes,
+  };
+  let message = `Plan found (${plan.moves.length} moves). Not executed yet: pass the moves to execute_game_commands.`;
+  if (data.formed.length > 0) message += ` Forms: ${data.formed.join(", ")}.`;
+  if (data.broken.length > 0) message += ` Breaks: ${data.broken.join(", ")}.`;
+
+  const response: ToolResponse<PushPlanData> = {
+    success: true,
+    data,
+    message
+  };
+  return JSON.stringify(response);
+}
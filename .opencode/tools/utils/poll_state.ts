@@ -3,11 +3,18 @@ import * as path from "path";
 import { getRawGameState } from "./get_game_state.js";
 
 const WORLDS_DIR = "/Users/matthiasmatt/Library/Application Support/Steam/steamapps/common/Baba Is You/Baba Is You.app/Contents/Resources/Data/Worlds/baba";
-export const STATE_PATH = path.join(WORLDS_DIR, "world_data.txt");
+const GAME_DIR = "/Users/matthiasmatt/Library/Application Support/Steam/steamapps/common/Baba Is You/Baba Is You.app/Contents/Resources/Data/baba_is_eval";
+export const STATE_PATH = process.env.BABA_STATE_PATH ?? path.join(WORLDS_DIR, "world_data.txt");
+const COMMANDS_DIR = process.env.BABA_COMMANDS_DIR ?? path.join(GAME_DIR, "commands");
+// io.lua writes the number of the last executed command file here, after the state is stored
+export const ACK_PATH = path.join(path.dirname(COMMANDS_DIR), "ack");
 
 const DEFAULT_MIN_WAIT_MS = 3000;
 const DEFAULT_MAX_WAIT_MS = 10000;
 const DEFAULT_POLL_INTERVAL_MS = 100;
+// Waiting for an ack starts polling this often and backs off to the normal
+// poll interval, so a fast ack is seen quickly without busy-polling a slow one
+const ACK_POLL_INTERVAL_MS = Number(process.env.BABA_ACK_POLL_INTERVAL_MS ?? 5) || 5;
 
 export function sleep(ms: number): Promise<void> {
   return new Promise(resolve => setTimeout(resolve, ms));
@@ -50,6 +57,15 @@ export function checkWinStatus(): boolean {
   return false;
 }
 
+export function getLastAck(): number | null {
+  try {
+    const value = parseInt(fs.readFileSync(ACK_PATH, "utf-8").trim(), 10);
+    return Number.isNaN(value) ? null : value;
+  } catch {
+    return null;
+  }
+}
+
 function getMtimeMs(): number {
   try {
     return fs.statSync(STATE_PATH).mtimeMs;
@@ -69,6 +85,9 @@ export interface PollOptions {
   minWaitMs?: number;
   maxWaitMs?: number;
   pollIntervalMs?: number;
+  // Command file just written; with a mod that acknowledges command files,
+  // return as soon as its ack arrives instead of waiting minWaitMs
+  commandFile?: number;
 }
 
 export async function waitForStateSettle(options?: PollOptions): Promise<PollResult> {
@@ -76,22 +95,40 @@ export async function waitForStateSettle(options?: PollOptions): Promise<PollRes
   const maxWaitMs = options?.maxWaitMs ?? DEFAULT_MAX_WAIT_MS;
   const pollIntervalMs = options?.pollIntervalMs ?? DEFAULT_POLL_INTERVAL_MS;
 
+  const commandFile = options?.commandFile;
+
   const startTime = Date.now();
   const beforeMtime = getMtimeMs();
 
   let stateFileChanged = false;
+  let acknowledged = false;
+  let ackPollMs = Math.min(ACK_POLL_INTERVAL_MS, pollIntervalMs);
 
   while (Date.now() - startTime < maxWaitMs) {
-    const currentMtime = getMtimeMs();
-    if (currentMtime > beforeMtime) {
+    if (commandFile !== undefined) {
+      const ack = getLastAck();
+      if (ack !== null && ack >= commandFile) {
+        acknowledged = true;
+        break;
+      }
+    }
+    if (getMtimeMs() > beforeMtime) {
       stateFileChanged = true;
-      break;
+      // An older mod never acknowledges; fall back to the settle delay
+      if (commandFile === undefined || getLastAck() === null) {
+        break;
+      }
+    }
+    if (commandFile !== undefined) {
+      await sleep(ackPollMs);
+      ackPollMs = Math.min(ackPollMs * 2, pollIntervalMs);
+    } else {
+      await sleep(pollIntervalMs);
     }
-    await sleep(pollIntervalMs);
   }
 
   const elapsed = Date.now() - startTime;
-  if (elapsed < minWaitMs) {
+  if (!acknowledged && elapsed < minWaitMs) {
     await sleep(minWaitMs - elapsed);
   }
 
@@ -101,7 +138,7 @@ export async function waitForStateSettle(options?: PollOptions): Promise<PollRes
   return {
     rawState,
     lastProcessed,
-    confirmed: stateFileChanged,
-    stateFileChanged,
+    confirmed: acknowledged || stateFileChanged,
+    stateFileChanged: acknowledged || stateFileChanged,
   };
 }
\ No newline at end of file
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Send command files to the game and wait for their acknowledgement.
+
+After executing commands/N.lua and storing the resulting state, lua/io.lua
+atomically rewrites `baba_is_eval/ack` with "N". Waiting for that file to
+reach N replaces fixed settle delays: the caller returns as soon as the state
+for its command is on disk, and a long timeout only matters when the game is
+not running.
+
+The ack file is polled with a short interval that backs off while nothing
+happens, so a quick game answers within a few milliseconds without spinning
+through slow ones.
+
+Usage:
+    bridge = CommandBridge(COMMANDS_DIR)
+    key = bridge.send(["right", "right", "up"])
+    if bridge.wait_for_ack(key, timeout=10):
+        ...
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from automation.config import (
+    ACK_POLL_INITIAL,
+    ACK_POLL_MAX,
+    ACK_TIMEOUT,
+    COMMANDS_DIR,
+)
+
+ACK_FILE = "ack"
+
+
+def ack_path_for(commands_dir: Path) -> Path:
+    """The ack file that belongs to a commands directory."""
+    return Path(commands_dir).parent / ACK_FILE
+
+
+def command_lua(command: str) -> str:
+    """Lua line for one tool command ("undo", "restart" or a direction)."""
+    if command == "undo":
+        return "undo()"
+    if command == "reset_commands":
+        return "reset_commands()"
+    if command in ("restart", "restart_instant"):
+        return 'command("restart_instant",1)'
+    return f'command("{command}",1)'
+
+
+def adaptive_intervals(
+    initial: float = ACK_POLL_INITIAL,
+    maximum: float = ACK_POLL_MAX,
+    factor: float = 1.5,
+) -> Iterator[float]:
+    """Sleep intervals starting at `initial` and growing up to `maximum`."""
+    interval = initial
+    while True:
+        yield interval
+        interval = min(interval * factor, maximum)
+
+
+class CommandBridge:
+    """Writes command files and blocks until the game acknowledges them."""
+
+    def __init__(
+        self,
+        commands_dir: Path = COMMANDS_DIR,
+        ack_path: Optional[Path] = None,
+        poll_initial: float = ACK_POLL_INITIAL,
+        poll_max: float = ACK_POLL_MAX,
+    ):
+        self.commands_dir = Path(commands_dir)
+        self.ack_path = Path(ack_path) if ack_path else ack_path_for(self.commands_dir)
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+
+    def last_ack(self) -> Optional[int]:
+        """Last acknowledged command file number, None if there is none."""
+        try:
+            return int(self.ack_path.read_text().strip())
+        except (OSError, ValueError):
+            return None
+
+    def next_key(self) -> int:
+        """First free command file number after the last acknowledged one."""
+        last_ack = self.last_ack()
+        key = 0 if last_ack is None else last_ack + 1
+        while (self.commands_dir / f"{key}.lua").exists():
+            key += 1
+        return key
+
+    def send(self, commands: Iterable[str], key: Optional[int] = None) -> int:
+        """Write one command file atomically and return its number."""
+        self.commands_dir.mkdir(parents=True, exist_ok=True)
+        if key is None:
+            key = self.next_key()
+        content = "".join(command_lua(command) + "\n" for command in commands)
+        path = self.commands_dir / f"{key}.lua"
+        tmp_path = self.commands_dir / f".{key}.lua.tmp"
+        tmp_path.write_text(content)
+        os.replace(tmp_path, path)
+        return key
+
+    def wait_for_ack(self, key: int, timeout: float = ACK_TIMEOUT) -> bool:
+        """Block until command file `key` (or a later one) is acknowledged."""
+        deadline = time.monotonic() + timeout
+        for interval in adaptive_intervals(self.poll_initial, self.poll_max):
+            ack = self.last_ack()
+            if ack is not None and ack >= key:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(interval, remaining))
+        return False
+
+    def execute(self, commands: Iterable[str], timeout: float = ACK_TIMEOUT) -> bool:
+        """Send `commands` as one file and wait for the acknowledgement."""
+        return self.wait_for_ack(self.send(commands), timeout)
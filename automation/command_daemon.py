@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Long-lived owner of the commands directory.
+
+Without it, every tool finds the next command file by probing `0.lua`,
+`1.lua`, ... until one is missing, and the directory keeps every file ever
+written. The daemon instead:
+
+- allocates command file numbers from an in-memory counter,
+- writes each file atomically (temp file + rename, see CommandBridge.send),
+- coalesces requests that arrive while the previous file is still waiting
+  for the game into a single file,
+- deletes command files once the game has acknowledged them (the `ack` file)
+  or `last_processed` in world_data.txt has moved past them.
+
+Tools talk to it over a unix socket, one JSON object per line:
+
+    -> {"commands": ["right", "up"], "wait": false}
+    <- {"key": 12}                       (or {"key": 12, "acked": true})
+    -> {"op": "ping"}
+    <- {"ok": true, "next_key": 13, "ack": 11}
+    -> {"op": "check", "commands": ["left", "left"]}
+    <- {"strands": [{"word": "flag", "x": 1, "y": 1, "reason": "corner"}]}
+
+    -> {"op": "plan", "word": "flag", "x": 7, "y": 4}
+    <- {"moves": ["up", "right"], "formed": ["flag is win"], "broken": [], ...}
+
+    -> {"op": "rules"}
+    <- {"rules": ["baba is you", "not wall is push"], "properties": {"baba": ["you"]}, ...}
+
+`check` predicts the batch on the last exported state without queueing it
+and lists the rule words it would leave stuck for good (see
+automation.solver.deadlock). `plan` returns the shortest moves pushing a text
+tile onto a cell from that state, without executing them
+(automation.solver.macro). `rules` reads the full rule grammar from it with
+one RuleIndex kept for the daemon's lifetime, so the text is only re-parsed
+after a text tile moved (automation.rule_index).
+
+The socket path is passed to the tools in BABA_COMMAND_SOCKET. Tools fall back
+to probing when it is unset or unreachable; while the daemon runs it must be
+the only writer, since collected files would look free to a probing tool.
+
+Usage:
+    with CommandDaemon(COMMANDS_DIR) as daemon:
+        run_solver(..., env=daemon.tool_env())
+
+    python -m automation.command_daemon [--commands-dir DIR]
+"""
+
+import argparse
+import hashlib
+import json
+import socket
+import socketserver
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from automation.command_bridge import CommandBridge
+from automation.config import ACK_TIMEOUT, COMMANDS_DIR, STATE_PATH
+from automation.rule_index import RuleIndex
+from automation.sim.levels import load_world_data
+from automation.solver.deadlock import check_batch
+from automation.solver.macro import plan_push
+from automation.state_codec import StateTable
+from automation.world_data import WorldData
+
+COMMANDS = ("right", "up", "left", "down", "idle", "undo", "restart", "restart_instant")
+
+REQUEST_TIMEOUT = 5  # seconds a client waits for the daemon to answer
+
+
+def socket_path_for(commands_dir: Path) -> Path:
+    """Default socket of the daemon owning `commands_dir`.
+
+    Kept in the temp directory: the game's data directory is too deep for the
+    ~100 byte limit on unix socket paths.
+    """
+    digest = hashlib.md5(str(Path(commands_dir).resolve()).encode()).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"baba-commands-{digest}.sock"
+
+
+class _Request:
+    __slots__ = ("commands", "key", "error", "done")
+
+    def __init__(self, commands: List[str]):
+        self.commands = commands
+        self.key: Optional[int] = None
+        self.error: Optional[str] = None  # set instead of key if the write failed
+        self.done = threading.Event()
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon: "CommandDaemon" = self.server.daemon
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = daemon.handle(request)
+            except Exception as e:
+                # Always answer, so a client never waits on a closed connection
+                response = {"error": str(e)}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class CommandDaemon:
+    """Serves command submissions for one commands directory."""
+
+    def __init__(
+        self,
+        commands_dir: Path = COMMANDS_DIR,
+        socket_path: Optional[Path] = None,
+        state_path: Path = STATE_PATH,
+        ack_timeout: float = ACK_TIMEOUT,
+    ):
+        self.bridge = CommandBridge(commands_dir)
+        self.commands_dir = self.bridge.commands_dir
+        self.socket_path = Path(socket_path) if socket_path else socket_path_for(self.commands_dir)
+        self.world = WorldData.for_path(state_path)
+        self.ack_timeout = ack_timeout
+
+        self.commands_dir.mkdir(parents=True, exist_ok=True)
+        # One scan at startup; afterwards numbers come from the counter
+        self._written = sorted(
+            int(path.stem) for path in self.commands_dir.glob("*.lua") if path.stem.isdigit()
+        )
+        self.next_key = self.bridge.next_key()
+        self.files_written = 0
+        self.requests_served = 0
+
+        self._written_lock = threading.Lock()
+        self._rules = RuleIndex()
+        self._rules_lock = threading.Lock()
+        self._queue: List[_Request] = []
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._server: Optional[_Server] = None
+        self._threads: List[threading.Thread] = []
+
+    # -- game progress -------------------------------------------------------
+
+    def consumed(self) -> Optional[int]:
+        """Highest command file number the game is known to have executed."""
+        ack = self.bridge.last_ack()
+        if ack is not None:
+            return ack
+        # last_processed is 0 both before and after file 0, so only numbers
+        # strictly below it are certain
+        last_processed = self.world.last_processed()
+        if last_processed is None or last_processed <= 0:
+            return None
+        return last_processed - 1
+
+    def collect(self) -> int:
+        """Delete command files the game has consumed. Returns how many."""
+        consumed = self.consumed()
+        if consumed is None:
+            return 0
+        removed = 0
+        with self._written_lock:
+            while self._written and self._written[0] <= consumed:
+                key = self._written.pop(0)
+                (self.commands_dir / f"{key}.lua").unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    # -- requests ------------------------------------------------------------
+
+    def submit(self, commands: List[str]) -> int:
+        """Queue `commands` and return the number of the file they went into.
+
+        Raises:
+            ValueError: Unknown command
+            RuntimeError: The command file could not be written
+        """
+        for command in commands:
+            if command not in COMMANDS:
+                raise ValueError(f"unknown command: {command}")
+        request = _Request(list(commands))
+        with self._cond:
+            self._queue.append(request)
+            self._cond.notify()
+        request.done.wait()
+        if request.error is not None:
+            raise RuntimeError(request.error)
+        return request.key
+
+    def handle(self, request: Dict) -> Dict:
+        if request.get("op") == "ping":
+            return {"ok": True, "next_key": self.next_key, "ack": self.bridge.last_ack()}
+        if request.get("op") == "check":
+            level = load_world_data(self.world.path)
+            strands = check_batch(level, request["commands"])
+            return {"strands": [strand._asdict() for strand in strands]}
+        if request.get("op") == "plan":
+            level = load_world_data(self.world.path)
+            plan = plan_push(level, request["word"], (int(request["x"]), int(request["y"])))
+            return plan.to_dict()
+        if request.get("op") == "rules":
+            table = StateTable.from_world_data(self.world.path)
+            if table is None:
+                raise ValueError("No state exported yet")
+            with self._rules_lock:
+                self._rules.update(table)
+                return self._rules.to_dict()
+        try:
+            key = self.submit(request["commands"])
+        except RuntimeError as e:
+            return {"error": str(e)}
+        self.requests_served += 1
+        if request.get("wait"):
+            return {"key": key, "acked": self.bridge.wait_for_ack(key, self.ack_timeout)}
+        return {"key": key}
+
+    def _writer(self):
+        last_key: Optional[int] = None
+        while not self._stop.is_set():
+            with self._cond:
+                while not self._queue and not self._stop.is_set():
+                    self._cond.wait(0.5)
+                if self._stop.is_set():
+                    break
+            # The game runs one file per check; while the previous one is
+            # pending, later requests join the queue and share the next file.
+            # Without acks (older mod) there is nothing to wait for.
+            if last_key is not None and self.bridge.last_ack() is not None:
+                self.bridge.wait_for_ack(last_key, self.ack_timeout)
+            with self._cond:
+                batch, self._queue = self._queue, []
+
+            key = self.next_key
+            while (self.commands_dir / f"{key}.lua").exists():
+                key += 1  # written by a tool that bypassed the daemon
+            try:
+                self.bridge.send([c for request in batch for c in request.commands], key)
+            except Exception as e:
+                # Fail this batch but keep serving (e.g. the directory is
+                # being cleared between levels)
+                for request in batch:
+                    request.error = f"Failed to write command file {key}: {e}"
+                    request.done.set()
+                continue
+            self.next_key = key + 1
+            with self._written_lock:
+                self._written.append(key)
+            self.files_written += 1
+            last_key = key
+            for request in batch:
+                request.key = key
+                request.done.set()
+            self._collect_quietly()
+
+    def _collector(self):
+        # Collect even when no new commands arrive
+        while not self._stop.wait(1.0):
+            self._collect_quietly()
+
+    def _collect_quietly(self):
+        # A failed delete is retried on the next pass
+        try:
+            self.collect()
+        except OSError:
+            pass
+
+    # -- lifecycle -----------------------------------------------------------
+
+    def tool_env(self) -> Dict[str, str]:
+        """Environment pointing the TS tools at this daemon."""
+        return {
+            "BABA_COMMANDS_DIR": str(self.commands_dir),
+            "BABA_COMMAND_SOCKET": str(self.socket_path),
+        }
+
+    def start(self) -> "CommandDaemon":
+        self.socket_path.unlink(missing_ok=True)
+        self._server = _Server(str(self.socket_path), _Handler)
+        self._server.daemon = self
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, daemon=True),
+            threading.Thread(target=self._writer, daemon=True),
+            threading.Thread(target=self._collector, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self.socket_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "CommandDaemon":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def send_commands(
+    socket_path: Path,
+    commands: List[str],
+    wait: bool = False,
+    timeout: float = REQUEST_TIMEOUT,
+) -> Dict:
+    """Submit commands to a running daemon and return its answer."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout + (ACK_TIMEOUT if wait else 0))
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps({"commands": commands, "wait": wait}).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Own the commands directory and serve tools over a socket")
+    parser.add_argument("--commands-dir", type=Path, default=COMMANDS_DIR)
+    parser.add_argument("--state-path", type=Path, default=STATE_PATH)
+    parser.add_argument("--socket", type=Path, default=None, help="Socket path (default: derived from the commands dir)")
+    args = parser.parse_args()
+
+    daemon = CommandDaemon(args.commands_dir, args.socket, args.state_path).start()
+    print(f"export BABA_COMMAND_SOCKET={daemon.socket_path}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+        print(f"{daemon.files_written} files for {daemon.requests_served} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 Configuration constants for Baba Is You automation.
 """
 
+import os
 from pathlib import Path
 
 
@@ -15,7 +16,44 @@ DEFAULT_TIMEOUT = 1200  # 20 minutes
 DEFAULT_TOKEN_BUDGET = 200000  # max cumulative tokens before killing solver
 WINDOW_WAIT_TIMEOUT = 30  # seconds
 STARTUP_DELAY = 2  # seconds after game launch
-GAME_INIT_DELAY = 7  # seconds after window detection for game to fully initialize
+GAME_INIT_TIMEOUT = 30  # seconds after window detection for the mod to report it is loaded
+RUN_CHECKPOINT_INTERVAL = 30  # seconds between partial run.json writes during a solve
+ACK_TIMEOUT = 10  # seconds to wait for the game to acknowledge a command file
+ACK_POLL_INITIAL = 0.005  # first ack poll interval, grows while waiting...
+ACK_POLL_MAX = 0.1  # ...up to this
+LEAVE_LEVEL_TIMEOUT = 10  # seconds to wait for the overworld after leaving a level
+OVERWORLD_PRESS_TIMEOUT = 3  # seconds to wait for the overworld after each title menu Enter
+LEVEL_LOAD_TIMEOUT = 10  # seconds to wait for a level after Enter on the overworld
+KILL_TIMEOUT = 5  # seconds to wait for killed game processes to exit
+READY_POLL_INITIAL = 0.01  # first readiness poll interval, grows while waiting...
+READY_POLL_MAX = 0.2  # ...up to this
+
+# Key pacing where the game gives no feedback the mod can export. Title menu
+# and key-press cursor moves only show up in world_data.txt once a level (the
+# overworld is the level "map") starts, so these are kept short and the
+# level_start export is waited on instead.
+MENU_KEY_DELAY = 0.3  # seconds after each Enter on the title menus
+MENU_MAX_PRESSES = 4  # Enters on the title menus before giving up (2 when the title is responsive)
+NAV_KEY_DELAY = 0.15  # seconds between key-press cursor moves
+NAV_KEY_HOLD = 0.05  # seconds each cursor key is held
+
+# Printed by lua/io.lua on the game's stdout once the mod is loaded
+MOD_LOADED_LINE = "baba_is_eval loaded."
+
+# Keys that take the game from inside a level back to the overworld
+# (escape opens the pause menu; "return to map" is the entry below "resume")
+LEAVE_LEVEL_KEYS = ["escape", "down", "enter"]
+OVERWORLD_LEVEL_NAME = "map"  # level_name exported by lua/io.lua on the overworld
+MAP_CURSOR = "cursor"  # unit the overworld selection is drawn with
+MAP_WALKABLE = ("level", "line", "path")  # units the cursor can move onto
+MAP_ROUTE_TIMEOUT = 10  # seconds to wait for the game to acknowledge the route batch
+
+# GUI automation backend (automation/gui_backend.py): auto, quartz, osascript,
+# xdotool or fake
+GUI_BACKEND = os.environ.get("BABA_GUI_BACKEND", "auto")
+
+# Parallel evaluation
+DEFAULT_JOBS = 1  # number of levels evaluated at the same time
 
 # Window geometry
 GAME_WINDOW_BOUNDS = {
@@ -32,26 +70,43 @@ SLOT_1_POSITION = (800, 300)
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent
 RESULTS_DIR = PROJECT_ROOT / "automation" / "results"
+RESULTS_INDEX_PATH = RESULTS_DIR / "index.sqlite"
+# Per-file digests behind the tools hash, keyed by (path, mtime, size)
+TOOLS_HASH_CACHE_PATH = PROJECT_ROOT / "automation" / ".tools_hash_cache.json"
 
-STATE_PATH = (
+GAME_APP_DIR = (
     Path.home()
     / "Library/Application Support/Steam/steamapps/common/Baba Is You"
     / "Baba Is You.app"
-    / "Contents/Resources/Data/Worlds/baba"
-    / "world_data.txt"
 )
 
-COMMANDS_DIR = (
-    Path.home()
-    / "Library/Application Support/Steam/steamapps/common/Baba Is You"
-    / "Baba Is You.app"
-    / "Contents/Resources/Data/baba_is_eval/commands"
-)
+STATE_PATH = GAME_APP_DIR / "Contents/Resources/Data/Worlds/baba" / "world_data.txt"
+
+COMMANDS_DIR = GAME_APP_DIR / "Contents/Resources/Data/baba_is_eval/commands"
+
+# Written by lua/io.lua with the number of the last executed command file
+ACK_PATH = GAME_APP_DIR / "Contents/Resources/Data/baba_is_eval/ack"
+
+# Binary level snapshot, written when BINARY_SNAPSHOT is enabled in lua/io.lua
+SNAPSHOT_PATH = GAME_APP_DIR / "Contents/Resources/Data/baba_is_eval/state.bin"
+
+# Per-command state delta log, written when DELTA_EXPORT is enabled in lua/io.lua
+DELTA_PATH = GAME_APP_DIR / "Contents/Resources/Data/baba_is_eval/state.delta"
+
+# Per-step states of the last command file, written when TRAJECTORY_EXPORT is enabled in lua/io.lua
+TRAJECTORY_PATH = GAME_APP_DIR / "Contents/Resources/Data/baba_is_eval/trajectory.txt"
+
+# Copies of the game bundle used by parallel evaluation (--jobs N)
+INSTANCES_DIR = PROJECT_ROOT / "automation" / "instances"
+
+# world_data.txt and commands/ of the headless simulator (python -m automation.sim)
+SIM_DATA_DIR = PROJECT_ROOT / "automation" / "sim_data"
 
 # Reset to level 0 position (from any level)
 RESET_TO_LEVEL_0 = ["left", "left", "left", "down", "down", "down", "down", "left"]
 
-# Level navigation sequences (from enter_level tool)
+# Level navigation sequences, used when no overworld map export is available
+# (automation/overworld.py routes from the exported map otherwise)
 # From level 0 (RESAT_TO_LEVEL_0 position), apply moves to reach target level, then press Enter
 RESET_TO_LEVEL_0 = ["left", "left", "left", "down", "down", "down", "down", "left"]
 
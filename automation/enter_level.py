@@ -1,19 +1,40 @@
 #!/usr/bin/env python3
 """
-Enter a specific level from overworld using pyautogui.
-First resets to level 0, then navigates to target level.
+Enter a specific level from overworld.
+Routes the cursor to the level over the exported overworld map and sends the
+moves as one command file (automation/overworld.py). Without a map export it
+falls back to key presses: reset to level 0, then the moves from LEVEL_MOVES.
+Then presses Enter and waits until the mod exports the level's state.
 
 Usage:
     uv run python -m automation.enter_level --level 1
+    uv run python -m automation.enter_level --level "where do i go?"
 """
 
 import argparse
-
-from automation.config import LEVEL_MOVES, RESET_TO_LEVEL_0
+from pathlib import Path
+from typing import Optional, Union
+
+from automation.command_bridge import CommandBridge
+from automation.config import (
+    COMMANDS_DIR,
+    LEVEL_LOAD_TIMEOUT,
+    LEVEL_MOVES,
+    MAP_ROUTE_TIMEOUT,
+    NAV_KEY_DELAY,
+    NAV_KEY_HOLD,
+    OVERWORLD_LEVEL_NAME,
+    RESET_TO_LEVEL_0,
+    STATE_PATH,
+)
 from automation.gui_controller import (
     press_key_pyautogui,
+    send_keys,
     set_verbose,
 )
+from automation.overworld import OverworldMap
+from automation.readiness import wait_for_world
+from automation.world_data import file_signature
 
 _verbose = False
 
@@ -40,37 +61,50 @@ def reset_to_level_0(verbose: bool = False) -> bool:
     _log("Resetting to level 0 position...")
     print("Resetting to level 0 position...")
 
-    try:
-        # Execute the reset move sequence directly with pyautogui
-        # Each move gets 0.1s hold + 0.5s pyautogui pause + 1.0s delay = 1.6s total per move
-        for move in RESET_TO_LEVEL_0:
-            if not press_key_pyautogui(move, delay=1.0, hold_duration=0.1):
-                print(f"Warning: Failed to press {move} during reset")
-                return False
-        _log(f"Reset sequence completed: {RESET_TO_LEVEL_0}")
-        return True
-    except Exception as e:
-        _log(f"Error during reset: {e}")
-        print(f"Error during reset: {e}")
+    # Cursor moves are not exported, so they are only paced (NAV_KEY_*)
+    if not send_keys(RESET_TO_LEVEL_0, interval=NAV_KEY_DELAY, hold_duration=NAV_KEY_HOLD):
+        print("Warning: Failed to send the reset sequence")
         return False
+    _log(f"Reset sequence completed: {RESET_TO_LEVEL_0}")
+    return True
 
 
-def enter_level(level: int, verbose: bool = False) -> bool:
-    """Navigate from overworld to specific level using pyautogui.
-
-    Args:
-        level: Level number (0-7)
-        verbose: Enable verbose logging
+def route_to_level(level: str, state_path: Path, commands_dir: Path) -> Optional[bool]:
+    """Move the cursor onto `level` with one command file, routed over the map.
 
     Returns:
-        True if successful, False otherwise
+        True once the cursor is on the level, False if the game did not end up
+        there, None if no route is known (no map export, unknown level)
     """
-    set_verbose_wrapper(verbose)
-
-    if level not in LEVEL_MOVES:
-        print(f"Error: Unknown level {level}")
+    overworld = OverworldMap.from_world_data(state_path)
+    if overworld is None or not overworld.levels:
+        _log("No overworld map export")
+        return None
+    target = overworld.find_level(level)
+    if target is None:
+        _log(f"Level {level} is not on the exported map")
+        return None
+    moves = overworld.route(target.position)
+    if moves is None:
+        print(f"Warning: No path from the cursor to {target.label()}")
+        return None
+
+    print(f"Routing to {target.label()} via moves: {moves}")
+    if not moves:
+        return True
+    if not CommandBridge(commands_dir).execute(moves, MAP_ROUTE_TIMEOUT):
+        print("Warning: Game did not acknowledge the route")
+        return False
+    moved = OverworldMap.from_world_data(state_path)
+    if moved is None or moved.cursor != target.position:
+        cursor = moved.cursor if moved else None
+        print(f"Warning: Cursor ended at {cursor} instead of {target.position}")
         return False
+    return True
 
+
+def navigate_with_keys(level: int, verbose: bool = False) -> bool:
+    """Reset to level 0 and replay LEVEL_MOVES as key presses."""
     # First reset to known position
     if not reset_to_level_0(verbose):
         print("Warning: Reset may have failed")
@@ -79,29 +113,67 @@ def enter_level(level: int, verbose: bool = False) -> bool:
     moves = LEVEL_MOVES[level]
     print(f"Navigating to level {level} via moves: {moves}")
     _log(f"Navigating to level {level} with moves: {moves}")
-    try:
-        # Each move gets 0.1s hold + 0.5s pyautogui pause + 1.0s delay = 1.6s total per move
-        for move in moves:
-            if not press_key_pyautogui(move, delay=1.0, hold_duration=0.1):
-                print(f"Warning: Failed to press {move} during navigation")
-                return False
-    except Exception as e:
-        _log(f"Error during navigation: {e}")
-        print(f"Error during navigation: {e}")
+    if not send_keys(moves, interval=NAV_KEY_DELAY, hold_duration=NAV_KEY_HOLD):
+        print("Warning: Failed to send the navigation moves")
         return False
+    return True
+
+
+def enter_level(
+    level: Union[int, str],
+    verbose: bool = False,
+    state_path: Path = STATE_PATH,
+    commands_dir: Path = COMMANDS_DIR,
+) -> bool:
+    """Navigate from overworld to specific level.
+
+    Args:
+        level: Level number, file or display name (see OverworldMap.find_level);
+            without a map export only the numbers in LEVEL_MOVES work
+        verbose: Enable verbose logging
+        state_path: world_data.txt of the game being driven
+        commands_dir: Commands directory of the game being driven
+
+    Returns:
+        True once the level has loaded, False otherwise
+    """
+    set_verbose_wrapper(verbose)
+    level = str(level)
+
+    routed = route_to_level(level, state_path, commands_dir)
+    if not routed:
+        key_level = int(level) if level.isdigit() else None
+        if key_level not in LEVEL_MOVES:
+            print(f"Error: Cannot navigate to level {level}")
+            return False
+        if routed is False:
+            print("Falling back to key presses")
+        if not navigate_with_keys(key_level, verbose):
+            return False
 
     # Press Enter to enter level
     print("Entering level...")
-    if not press_key_pyautogui("enter", delay=0.5, hold_duration=0.1):
+    since = file_signature(state_path)
+    if not press_key_pyautogui("enter", delay=0, hold_duration=0.1):
         print("Error: Failed to press Enter")
         return False
-    print(f"Should now be in level {level}")
+    # level_start exports the new level with its own level_name
+    if not wait_for_world(
+        state_path,
+        since,
+        LEVEL_LOAD_TIMEOUT,
+        f"level {level} to load",
+        lambda world: world.level_name() not in (None, OVERWORLD_LEVEL_NAME),
+    ):
+        print(f"Error: Level {level} did not load")
+        return False
+    print(f"Now in level {level}")
     return True
 
 
 def main():
     parser = argparse.ArgumentParser(description="Enter a level from overworld")
-    parser.add_argument("--level", type=int, required=True, help="Level number (0-7)")
+    parser.add_argument("--level", required=True, help="Level number, file or display name")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
     args = parser.parse_args()
 
@@ -1,42 +1,67 @@
 #!/usr/bin/env python3
 """
 Get to overworld from game startup screen.
-Wait for game to load, then press Enter twice using pyautogui.
+Press Enter through the title menus until the mod reports the
+overworld (level_name=map) in world_data.txt.
 
 Usage:
     uv run python -m automation.enter_overworld
 """
 
 import argparse
-import time
+from pathlib import Path
+
+from automation.config import (
+    MENU_KEY_DELAY,
+    MENU_MAX_PRESSES,
+    OVERWORLD_LEVEL_NAME,
+    OVERWORLD_PRESS_TIMEOUT,
+    STATE_PATH,
+)
 from automation.gui_controller import (
     press_key_pyautogui,
     set_verbose,
 )
+from automation.readiness import wait_for_world
+from automation.world_data import file_signature
 
 
-def enter_overworld(verbose: bool = False) -> bool:
+def enter_overworld(verbose: bool = False, state_path: Path = STATE_PATH) -> bool:
     """Navigate from startup screen to overworld.
 
+    The title screen takes two Enters. Presses made while the splash screen
+    still ignores input are retried, up to MENU_MAX_PRESSES in total.
+
     Args:
         verbose: Enable verbose logging
+        state_path: world_data.txt of the game being driven
 
     Returns:
-        True if successful, False otherwise
+        True once the overworld has loaded, False otherwise
     """
     set_verbose(verbose)
 
     if verbose:
-        print("Pressing Enter twice to enter overworld...")
-    if not press_key_pyautogui("enter", delay=1.5, hold_duration=0.2):
-        print("Error: Failed to press first Enter")
-        return False
-    if not press_key_pyautogui("enter", delay=1.5, hold_duration=0.2):
-        print("Error: Failed to press second Enter")
-        return False
-
-    print("Should now be in overworld")
-    return True
+        print("Pressing Enter until the overworld loads...")
+    since = file_signature(state_path)
+    for press in range(1, MENU_MAX_PRESSES + 1):
+        if not press_key_pyautogui("enter", delay=MENU_KEY_DELAY, hold_duration=0.2):
+            print(f"Error: Failed to press Enter ({press})")
+            return False
+        if press < 2:
+            continue
+        if wait_for_world(
+            state_path,
+            since,
+            OVERWORLD_PRESS_TIMEOUT,
+            f"overworld (Enter {press})",
+            lambda world: world.level_name() == OVERWORLD_LEVEL_NAME,
+        ):
+            print("Now in overworld")
+            return True
+
+    print("Error: Overworld did not load")
+    return False
 
 
 def main():
@@ -6,15 +6,19 @@ Orchestrates: game start -> overworld -> level -> solver -> cleanup.
 Usage:
     uv run python -m automation.evaluator --level 1 --model opencode/glm-5-free
     uv run python -m automation.evaluator --level 0-7 --model opencode/glm-5-free
+    uv run python -m automation.evaluator --level 0-7 --jobs 4
 """
 
 import argparse
+import queue
 import subprocess
+import threading
 import time
 import sys
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from automation.config import (
     DEFAULT_MODEL,
@@ -22,18 +26,36 @@ from automation.config import (
     DEFAULT_TOKEN_BUDGET,
     WINDOW_WAIT_TIMEOUT,
     COMMANDS_DIR,
-    GAME_INIT_DELAY,
+    STATE_PATH,
+    GAME_INIT_TIMEOUT,
+    DEFAULT_JOBS,
+    KILL_TIMEOUT,
+    LEAVE_LEVEL_KEYS,
+    LEAVE_LEVEL_TIMEOUT,
+    MENU_KEY_DELAY,
+    MOD_LOADED_LINE,
+    OVERWORLD_LEVEL_NAME,
 )
 from automation.gui_controller import (
     wait_for_window,
     press_key_pyautogui,
+    send_keys,
     set_verbose,
     reset_game_process_name,
     activate_game_window,
 )
+from automation.command_bridge import CommandBridge, ack_path_for
+from automation.command_daemon import CommandDaemon
 from automation.enter_overworld import enter_overworld
 from automation.enter_level import enter_level
+from automation.instance import GameInstance, prepare_instances
+from automation.readiness import GameOutput, wait_until
 from automation.run_solver import run_solver
+from automation.world_data import WorldData, reset_level_won
+
+# Key presses go to whichever window is in front, so only one worker may
+# drive the GUI at a time. Solver runs do not need it and overlap freely.
+_GUI_LOCK = threading.Lock()
 
 
 def parse_levels(range_str: str) -> List[int]:
@@ -106,36 +128,200 @@ def print_summary_table(results: List[Dict[str, Any]]):
     print("=" * 50)
 
 
-def start_game():
-    """Start the game process."""
+def start_game(instance: Optional[GameInstance] = None):
+    """Start the game process.
+
+    Args:
+        instance: Isolated game instance to launch (default: Steam install)
+    """
     print("Starting game...")
+    cmd = ["uv", "run", "python", "start_game.py"]
+    if instance is not None:
+        cmd += ["--data-dir", str(instance.data_dir)]
     return subprocess.Popen(
-        ["uv", "run", "python", "start_game.py"],
+        cmd,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
         text=True,
     )
 
 
-def kill_game():
-    """Kill any running game instances."""
+def kill_game(instance: Optional[GameInstance] = None):
+    """Kill running game instances.
+
+    Args:
+        instance: Only kill this isolated instance (default: every instance)
+    """
     import subprocess
 
+    pattern = "Chowdren" if instance is None else str(instance.binary_path)
     try:
-        subprocess.run(["pkill", "-f", "Chowdren"], check=False, capture_output=True)
-        time.sleep(1)
+        killed = subprocess.run(["pkill", "-f", pattern], check=False, capture_output=True)
+        if killed.returncode == 0:
+            wait_until(
+                lambda: subprocess.run(["pgrep", "-f", pattern], capture_output=True).returncode != 0,
+                KILL_TIMEOUT,
+                "game processes to exit",
+            )
     except Exception:
         pass
 
 
-def clear_commands():
-    """Clear old command files."""
-    if COMMANDS_DIR.exists():
-        shutil.rmtree(COMMANDS_DIR)
-    COMMANDS_DIR.mkdir(parents=True, exist_ok=True)
+def clear_commands(commands_dir: Path = COMMANDS_DIR):
+    """Clear old command files and their acknowledgement."""
+    if commands_dir.exists():
+        shutil.rmtree(commands_dir)
+    commands_dir.mkdir(parents=True, exist_ok=True)
+    ack_path_for(commands_dir).unlink(missing_ok=True)
     print("Cleared old command files")
 
 
+def wait_for_instance_window(instance: GameInstance, timeout: int = 30) -> Optional[int]:
+    """Poll until the instance's game binary is running.
+
+    Returns:
+        PID of the game process, or None on timeout
+    """
+    start_time = time.time()
+    while time.time() - start_time < timeout:
+        pid = instance.find_pid()
+        if pid is not None:
+            return pid
+        time.sleep(1)
+    return None
+
+
+def _navigate_to_level(
+    level: str,
+    game_pid: Optional[int],
+    verbose: bool,
+    state_path: Path = STATE_PATH,
+    commands_dir: Path = COMMANDS_DIR,
+) -> Optional[str]:
+    """Drive the game from the title screen into the level.
+
+    Must be called with _GUI_LOCK held.
+
+    Returns:
+        None on success, otherwise an error message
+    """
+    # Bring game window to foreground so key presses reach it
+    print("Activating game window...")
+    if not activate_game_window(game_pid):
+        print("Warning: Failed to activate game window")
+
+    # Get to overworld
+    print("Navigating to overworld...")
+    if not enter_overworld(verbose=verbose, state_path=state_path):
+        return "Failed to enter overworld"
+
+    return _enter_level_from_overworld(level, verbose, state_path, commands_dir)
+
+
+def _enter_level_from_overworld(
+    level: str,
+    verbose: bool,
+    state_path: Path = STATE_PATH,
+    commands_dir: Path = COMMANDS_DIR,
+) -> Optional[str]:
+    """Enter the level from anywhere on the overworld.
+
+    Must be called with _GUI_LOCK held and the game window in front.
+
+    Returns:
+        None on success, otherwise an error message
+    """
+    print(f"Entering level {level}...")
+    if not enter_level(level, verbose=verbose, state_path=state_path, commands_dir=commands_dir):
+        return "Failed to enter level"
+    return None
+
+
+class GameSession:
+    """A game kept running across levels (--reuse-game).
+
+    evaluate_level launches the game only when the session has none or it
+    fails the health check; otherwise the next level is entered straight from
+    the overworld, skipping the launch, mod loading and title screen.
+    """
+
+    def __init__(self, instance: Optional[GameInstance] = None):
+        self.instance = instance
+        self.process: Optional[subprocess.Popen] = None
+        self.pid: Optional[int] = None
+        self.output: Optional[GameOutput] = None
+
+    @property
+    def state_path(self) -> Path:
+        return self.instance.state_path if self.instance else STATE_PATH
+
+    @property
+    def commands_dir(self) -> Path:
+        return self.instance.commands_dir if self.instance else COMMANDS_DIR
+
+    def attach(self, process: subprocess.Popen, pid: Optional[int], output: GameOutput):
+        self.process = process
+        self.pid = pid
+        self.output = output
+
+    def check_health(self) -> Optional[str]:
+        """Why the running game cannot be reused, None if it can."""
+        if self.process is None:
+            return "no game running"
+        if self.process.poll() is not None:
+            return "game process exited"
+        if self.instance is not None and self.instance.find_pid() is None:
+            return "game binary not running"
+        level_name = WorldData.for_path(self.state_path).level_name()
+        if level_name != OVERWORLD_LEVEL_NAME:
+            return f"not on the overworld (level_name={level_name})"
+        return None
+
+    def leave_level(self) -> Optional[str]:
+        """Go back to the overworld with LEAVE_LEVEL_KEYS.
+
+        Nothing is pressed when the game is already on the overworld (it goes
+        back by itself after a win): escape there opens the pause menu.
+        Must be called with _GUI_LOCK held.
+
+        Returns:
+            None once level_name reports the overworld, otherwise an error message
+        """
+        world = WorldData.for_path(self.state_path)
+        if world.level_name() == OVERWORLD_LEVEL_NAME:
+            return None
+
+        activate_game_window(self.pid)
+        if not send_keys(LEAVE_LEVEL_KEYS, interval=MENU_KEY_DELAY):
+            return f"Failed to press {LEAVE_LEVEL_KEYS}"
+
+        if not wait_until(
+            lambda: world.level_name() == OVERWORLD_LEVEL_NAME,
+            LEAVE_LEVEL_TIMEOUT,
+            "overworld after leaving the level",
+        ):
+            return "Game did not return to the overworld"
+        return None
+
+    def reset_for_next_level(self) -> Optional[str]:
+        """Restart the command numbering and clear the win flag."""
+        if not CommandBridge(self.commands_dir).execute(["reset_commands"]):
+            return "Game did not acknowledge the command counter reset"
+        clear_commands(self.commands_dir)
+        reset_level_won(self.state_path)
+        return None
+
+    def close(self):
+        """Shut the game down."""
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+        kill_game(self.instance)
+        self.process = None
+        self.pid = None
+        self.output = None
+
+
 def evaluate_level(
     level: str,
     model: str = DEFAULT_MODEL,
@@ -143,6 +329,8 @@ def evaluate_level(
     token_budget: int = DEFAULT_TOKEN_BUDGET,
     no_shutdown: bool = False,
     verbose: bool = False,
+    instance: Optional[GameInstance] = None,
+    session: Optional[GameSession] = None,
 ) -> Dict[str, Any]:
     """Run full automation pipeline for a level.
 
@@ -153,66 +341,77 @@ def evaluate_level(
         token_budget: Max cumulative tokens before killing solver
         no_shutdown: Don't kill game process after completion
         verbose: Enable verbose logging
+        instance: Isolated game instance to run on (default: Steam install,
+            killing every other running game first)
+        session: Keep the game running for the next level; it is left on the
+            overworld instead of being shut down
 
     Returns:
         Dict with status, exit_code, duration, results_dir, level
     """
     set_verbose(verbose)
+    state_path = instance.state_path if instance else STATE_PATH
+    commands_dir = instance.commands_dir if instance else COMMANDS_DIR
 
     print(f"=== Evaluating level {level} with model {model} ===")
 
-    # Kill any existing game instances
-    kill_game()
-    reset_game_process_name()
-
-    # Clear old commands
-    clear_commands()
-
-    # Start game
-    game_process = start_game()
-
-    # Wait for window
-    print("Waiting for game window...")
-    if not wait_for_window(WINDOW_WAIT_TIMEOUT):
-        print("Error: Game window not found")
-        game_process.terminate()
-        return {
-            "level": int(level),
-            "status": "window_not_found",
-            "exit_code": 3,
-            "duration": 0,
-            "results_dir": None,
-        }
-
-    # Bring game window to foreground so key presses reach it
-    print("Activating game window...")
-    if not activate_game_window():
-        print("Warning: Failed to activate game window")
-
-    # Give game time to fully initialize (Python startup + mod loading + splash screen)
-    print("Game window detected, waiting for initialization...")
-    time.sleep(GAME_INIT_DELAY)
-
-    # Get to overworld
-    print("Navigating to overworld...")
-    if not enter_overworld(verbose=verbose):
-        print("Error: Failed to enter overworld")
-        game_process.terminate()
-        return {
-            "level": int(level),
-            "status": "error",
-            "exit_code": 2,
-            "duration": 0,
-            "results_dir": None,
-        }
-
-    # Wait for overworld to fully load
-    time.sleep(2)
-
-    # Enter target level
-    print(f"Entering level {level}...")
-    if not enter_level(int(level), verbose=verbose):
-        print("Error: Failed to enter level")
+    # With a session, reuse its game if it is healthy and on the overworld
+    health_problem = session.check_health() if session is not None else "no session"
+    if health_problem is None:
+        print("Reusing the running game from the overworld...")
+        game_process, game_pid = session.process, session.pid
+        with _GUI_LOCK:
+            activate_game_window(game_pid)
+            navigation_error = _enter_level_from_overworld(level, verbose, state_path, commands_dir)
+    else:
+        if session is not None and session.process is not None:
+            print(f"Restarting game: {health_problem}")
+            session.close()
+        # Kill any existing game instances
+        kill_game(instance)
+        reset_game_process_name()
+
+        # Clear old commands
+        clear_commands(commands_dir)
+
+        # Start game
+        game_process = start_game(instance)
+        # Read from the start so no readiness line is missed (and the pipe never fills)
+        game_output = GameOutput(game_process.stdout, echo=verbose)
+
+        # Wait for window
+        print("Waiting for game window...")
+        game_pid = None
+        if instance is not None:
+            game_pid = wait_for_instance_window(instance, WINDOW_WAIT_TIMEOUT)
+            window_found = game_pid is not None
+        else:
+            window_found = wait_for_window(WINDOW_WAIT_TIMEOUT)
+        if not window_found:
+            print("Error: Game window not found")
+            game_process.terminate()
+            return {
+                "level": int(level),
+                "status": "window_not_found",
+                "exit_code": 3,
+                "duration": 0,
+                "results_dir": None,
+            }
+
+        if session is not None:
+            session.attach(game_process, game_pid, game_output)
+
+        # The mod prints MOD_LOADED_LINE when lua/io.lua is loaded; the title
+        # menus are retried by enter_overworld if the splash screen is still up
+        print("Game window detected, waiting for the mod to load...")
+        if not game_output.wait_for_line(MOD_LOADED_LINE, 0, GAME_INIT_TIMEOUT, "mod loaded"):
+            print("Warning: No mod load message, trying the title screen anyway")
+
+        with _GUI_LOCK:
+            navigation_error = _navigate_to_level(level, game_pid, verbose, state_path, commands_dir)
+
+    if navigation_error:
+        print(f"Error: {navigation_error}")
         game_process.terminate()
         return {
             "level": int(level),
@@ -222,25 +421,51 @@ def evaluate_level(
             "results_dir": None,
         }
 
-    # Wait for level to load
-    time.sleep(2)
+    # A stale win flag would make the solver report a win immediately
+    world = WorldData.for_path(state_path)
+    if world.level_won():
+        print("Warning: level_won is still true after entering the level")
 
-    # Run solver
+    # Run solver, with the command daemon owning the commands directory
     print("Running solver...")
-    solver_result = run_solver(level, model, timeout, token_budget)
+    if instance is not None:
+        with CommandDaemon(instance.commands_dir, state_path=instance.state_path) as daemon:
+            solver_result = run_solver(
+                level,
+                model,
+                timeout,
+                token_budget,
+                state_path=instance.state_path,
+                env={**instance.tool_env(), **daemon.tool_env()},
+                console_prefix=f"[L{level}] ",
+            )
+    else:
+        with CommandDaemon(COMMANDS_DIR, state_path=STATE_PATH) as daemon:
+            solver_result = run_solver(level, model, timeout, token_budget, env=daemon.tool_env())
 
     # Cleanup
     print("Exiting level...")
-    if not press_key_pyautogui("escape"):
-        print("Warning: Failed to press Escape to exit level")
-    time.sleep(1)
-
-    # Shutdown (optional)
-    if not no_shutdown:
+    if session is not None:
+        with _GUI_LOCK:
+            leave_error = session.leave_level()
+        leave_error = leave_error or session.reset_for_next_level()
+        if leave_error:
+            print(f"Warning: {leave_error}, restarting the game for the next level")
+            session.close()
+    else:
+        with _GUI_LOCK:
+            if game_pid is not None:
+                activate_game_window(game_pid)
+            if not press_key_pyautogui("escape"):
+                print("Warning: Failed to press Escape to exit level")
+            time.sleep(1)
+
+    # Shutdown (optional; a session keeps the game for the next level)
+    if session is None and not no_shutdown:
         print("Shutting down game...")
         game_process.terminate()
         game_process.wait()
-        kill_game()
+        kill_game(instance)
 
     # Report results
     print(f"\n=== Evaluation Complete ===")
@@ -270,6 +495,118 @@ def evaluate_level(
     }
 
 
+def _is_fatal(result: Dict[str, Any]) -> bool:
+    """Whether a result should stop the remaining evaluation."""
+    return result["exit_code"] == 2 and result["status"] not in ("not_won", "timeout")
+
+
+def evaluate_levels_sequential(
+    levels: List[int], reuse_game: bool = False, **kwargs
+) -> List[Dict[str, Any]]:
+    """Evaluate levels one after another on the Steam install.
+
+    With `reuse_game` the game is started once and kept running between
+    levels. Stops at the first fatal error.
+    """
+    session = GameSession() if reuse_game else None
+    results = []
+    try:
+        for level in levels:
+            result = evaluate_level(level=str(level), session=session, **kwargs)
+            results.append(result)
+
+            # Stop on fatal error or window failure
+            if _is_fatal(result):
+                print(f"\nFatal error at level {level}, stopping evaluation")
+                break
+    finally:
+        if session is not None and not kwargs.get("no_shutdown"):
+            session.close()
+    return results
+
+
+def evaluate_levels_parallel(
+    levels: List[int], jobs: int, reuse_game: bool = False, **kwargs
+) -> List[Dict[str, Any]]:
+    """Evaluate levels on a pool of `jobs` isolated game instances.
+
+    Each worker checks out a free instance, runs the full pipeline on it and
+    returns it to the pool. GUI navigation is serialized, solver runs overlap.
+    With `reuse_game` every instance keeps its game running between levels.
+    A fatal error cancels levels that have not started yet.
+
+    Returns:
+        Results sorted by level
+    """
+    try:
+        instances = prepare_instances(jobs)
+    except OSError as e:
+        print(f"Error: Failed to prepare game instances: {e}")
+        return [
+            {
+                "level": level,
+                "status": "error",
+                "exit_code": 2,
+                "duration": 0,
+                "results_dir": None,
+                "error": str(e),
+            }
+            for level in levels
+        ]
+
+    free_instances: queue.Queue = queue.Queue()
+    for instance in instances:
+        free_instances.put(instance)
+
+    sessions = {
+        instance.index: GameSession(instance) if reuse_game else None
+        for instance in instances
+    }
+
+    def worker(level: int) -> Dict[str, Any]:
+        instance = free_instances.get()
+        try:
+            return evaluate_level(
+                level=str(level),
+                instance=instance,
+                session=sessions[instance.index],
+                **kwargs,
+            )
+        finally:
+            free_instances.put(instance)
+
+    print(f"Evaluating {len(levels)} levels on {jobs} game instances")
+    results = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(worker, level): level for level in levels}
+        for future in as_completed(futures):
+            level = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {
+                    "level": level,
+                    "status": "error",
+                    "exit_code": 2,
+                    "duration": 0,
+                    "results_dir": None,
+                    "error": str(e),
+                }
+            results.append(result)
+
+            if _is_fatal(result):
+                print(f"\nFatal error at level {level}, cancelling remaining levels")
+                for pending in futures:
+                    pending.cancel()
+
+    if not kwargs.get("no_shutdown"):
+        for session in sessions.values():
+            if session is not None:
+                session.close()
+
+    return sorted(results, key=lambda r: r["level"])
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Full automation pipeline for Baba Is You solver"
@@ -299,6 +636,17 @@ def main():
         action="store_true",
         help="Don't kill game process after completion",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Levels to evaluate in parallel, each on its own game instance (default: {DEFAULT_JOBS})",
+    )
+    parser.add_argument(
+        "--reuse-game",
+        action="store_true",
+        help="Keep the game running between levels instead of restarting it for each one",
+    )
     parser.add_argument(
         "--verbose",
         action="store_true",
@@ -313,29 +661,25 @@ def main():
         print(f"Error: {e}")
         sys.exit(1)
 
-    results = []
-    all_won = True
-
-    for level in levels:
-        result = evaluate_level(
-            level=str(level),
-            model=args.model,
-            timeout=args.timeout,
-            token_budget=args.token_budget,
-            no_shutdown=args.no_shutdown,
-            verbose=args.verbose,
-        )
-        results.append(result)
-
-        # Stop on fatal error or window failure
-        if result["exit_code"] == 2 and result["status"] not in ("not_won", "timeout"):
-            print(f"\nFatal error at level {level}, stopping evaluation")
-            all_won = False
-            break
-
-        # Mark not all won if timeout or error
-        if result["exit_code"] != 0:
-            all_won = False
+    if args.jobs < 1:
+        print("Error: --jobs must be at least 1")
+        sys.exit(1)
+
+    kwargs = dict(
+        model=args.model,
+        timeout=args.timeout,
+        token_budget=args.token_budget,
+        no_shutdown=args.no_shutdown,
+        verbose=args.verbose,
+        reuse_game=args.reuse_game,
+    )
+
+    if args.jobs > 1 and len(levels) > 1:
+        results = evaluate_levels_parallel(levels, min(args.jobs, len(levels)), **kwargs)
+    else:
+        results = evaluate_levels_sequential(levels, **kwargs)
+
+    all_won = len(results) == len(levels) and all(r["exit_code"] == 0 for r in results)
 
     # Print summary table for multiple levels
     if len(levels) > 1:
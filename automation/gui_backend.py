@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+Pluggable GUI backends: window lookup, activation, clicks and key presses.
+
+gui_controller.py used to start a fresh osascript process (with a 5 s
+timeout) for every window query and let pyautogui add PAUSE=0.5 s to every
+key. The backends here keep whatever they talk to open for the whole run
+and only wait where the caller asks them to:
+
+    quartz     macOS, in-process: CGWindowList for windows, NSRunningApplication
+               for activation, CGEvents for keys and clicks, and compiled
+               NSAppleScripts (one System Events session) for resizing
+    osascript  macOS fallback without pyobjc: osascript + pyautogui, no PAUSE
+    xdotool    Linux/X11: one xdotool process per call, a whole key sequence
+               included
+    fake       In-process recorder for tests and dry runs
+
+send_keys() sends a whole sequence and returns the measured delivery
+latency of every key (hold and interval excluded).
+
+Usage:
+    backend = create_backend()  # GUI_BACKEND / BABA_GUI_BACKEND, "auto" by default
+    backend.activate(pid)
+    timings = backend.send_keys(["right", "up", "up"], interval=0.1)
+
+The quartz backend needs pyobjc (pulled in by pyautogui on macOS). Install with:
+    uv sync --extra automation
+"""
+
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from automation.config import GUI_BACKEND
+
+GAME_PROCESS_NAMES = ("Baba Is You", "Chowdren")
+
+# macOS virtual key codes
+MAC_KEY_CODES = {
+    "enter": 36,
+    "escape": 53,
+    "space": 49,
+    "up": 126,
+    "down": 125,
+    "left": 123,
+    "right": 124,
+    "r": 15,
+    "z": 6,
+}
+
+# X11 keysyms for xdotool
+X11_KEYS = {
+    "enter": "Return",
+    "escape": "Escape",
+    "space": "space",
+    "up": "Up",
+    "down": "Down",
+    "left": "Left",
+    "right": "Right",
+}
+
+OSASCRIPT_TIMEOUT = 5  # seconds per osascript / xdotool call
+
+
+class GuiBackendError(RuntimeError):
+    """A backend could not deliver an action."""
+
+
+class KeyTiming(NamedTuple):
+    """Delivery latency of one key press (hold and interval excluded)."""
+
+    key: str
+    latency: float
+
+
+class GuiBackend(ABC):
+    """Interface every backend implements.
+
+    Query methods return None / False when the game cannot be found;
+    key presses and clicks raise GuiBackendError when they cannot be sent.
+    A backend missing one of the abstract methods fails when it is created.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def find_game_process(self) -> Optional[str]:
+        """Name of the running game process ("Baba Is You" or "Chowdren")."""
+
+    @abstractmethod
+    def window_position(self) -> Optional[Tuple[int, int]]:
+        """Top-left corner of the game window."""
+
+    @abstractmethod
+    def position_window(self, x: int, y: int, width: int, height: int) -> bool:
+        """Move and resize the game window."""
+
+    @abstractmethod
+    def activate(self, pid: Optional[int] = None) -> bool:
+        """Bring the game (a specific process if `pid` is given) to the front."""
+
+    @abstractmethod
+    def click(self, x: int, y: int):
+        """Left-click at screen coordinates (x, y)."""
+
+    @abstractmethod
+    def _press(self, key: str, hold: float):
+        """Press and release one key, holding it for `hold` seconds."""
+
+    def send_keys(
+        self, keys: Sequence[str], interval: float = 0.0, hold: float = 0.0
+    ) -> List[KeyTiming]:
+        """Press `keys` in order, `interval` seconds apart."""
+        timings = []
+        for i, key in enumerate(keys):
+            if i and interval > 0:
+                time.sleep(interval)
+            start = time.perf_counter()
+            self._press(key, hold)
+            timings.append(KeyTiming(key, max(time.perf_counter() - start - hold, 0.0)))
+        return timings
+
+    def press_key(self, key: str, hold: float = 0.0) -> KeyTiming:
+        return self.send_keys([key], hold=hold)[0]
+
+    def forget_game(self):
+        """Drop cached process/window handles, e.g. after the game was killed."""
+
+    def close(self):
+        """Release whatever the backend keeps open."""
+
+
+class QuartzBackend(GuiBackend):
+    """macOS backend running in-process through pyobjc."""
+
+    name = "quartz"
+
+    def __init__(self):
+        import AppKit
+        import Foundation
+        import Quartz
+
+        self._appkit = AppKit
+        self._foundation = Foundation
+        self._quartz = Quartz
+        self._scripts: Dict[str, object] = {}
+        self._script_lock = threading.Lock()
+        self._target_pid: Optional[int] = None
+
+    def _windows(self) -> List[dict]:
+        q = self._quartz
+        options = q.kCGWindowListOptionOnScreenOnly | q.kCGWindowListExcludeDesktopElements
+        return list(q.CGWindowListCopyWindowInfo(options, q.kCGNullWindowID) or [])
+
+    def _game_window(self) -> Optional[dict]:
+        for window in self._windows():
+            if window.get("kCGWindowLayer", 0) != 0:
+                continue
+            owner = window.get("kCGWindowOwnerName")
+            pid = window.get("kCGWindowOwnerPID")
+            if owner in GAME_PROCESS_NAMES and (self._target_pid is None or pid == self._target_pid):
+                return window
+        return None
+
+    def forget_game(self):
+        self._target_pid = None
+
+    def _run_script(self, source: str) -> Optional[str]:
+        """Run AppleScript `source`, compiled once and kept for later calls."""
+        with self._script_lock:
+            script = self._scripts.get(source)
+            if script is None:
+                script = self._foundation.NSAppleScript.alloc().initWithSource_(source)
+                self._scripts[source] = script
+            result, error = script.executeAndReturnError_(None)
+        if error is not None:
+            return None
+        return result.stringValue() or ""
+
+    def find_game_process(self) -> Optional[str]:
+        window = self._game_window()
+        return window.get("kCGWindowOwnerName") if window else None
+
+    def window_position(self) -> Optional[Tuple[int, int]]:
+        window = self._game_window()
+        if window is None:
+            return None
+        bounds = window["kCGWindowBounds"]
+        return int(bounds["X"]), int(bounds["Y"])
+
+    def position_window(self, x: int, y: int, width: int, height: int) -> bool:
+        name = self.find_game_process()
+        if name is None:
+            return False
+        source = f"""
+        tell application "System Events"
+            tell process "{name}"
+                set position of window 1 to {{{x}, {y}}}
+                set size of window 1 to {{{width}, {height}}}
+            end tell
+        end tell
+        """
+        return self._run_script(source) is not None
+
+    def activate(self, pid: Optional[int] = None) -> bool:
+        if pid is None:
+            window = self._game_window()
+            if window is None:
+                return False
+            pid = window["kCGWindowOwnerPID"]
+        self._target_pid = pid
+        app = self._appkit.NSRunningApplication.runningApplicationWithProcessIdentifier_(pid)
+        if app is not None and app.activateWithOptions_(
+            self._appkit.NSApplicationActivateIgnoringOtherApps
+        ):
+            return True
+        # Raw binaries are not always activatable; System Events still is
+        source = f"""
+        tell application "System Events"
+            set frontmost of (first process whose unix id is {pid}) to true
+        end tell
+        """
+        return self._run_script(source) is not None
+
+    def click(self, x: int, y: int):
+        q = self._quartz
+        for event_type in (q.kCGEventLeftMouseDown, q.kCGEventLeftMouseUp):
+            event = q.CGEventCreateMouseEvent(None, event_type, (x, y), q.kCGMouseButtonLeft)
+            q.CGEventPost(q.kCGHIDEventTap, event)
+
+    def _post(self, event):
+        q = self._quartz
+        if self._target_pid is not None:
+            q.CGEventPostToPid(self._target_pid, event)
+        else:
+            q.CGEventPost(q.kCGHIDEventTap, event)
+
+    def _press(self, key: str, hold: float):
+        code = MAC_KEY_CODES.get(key)
+        if code is None:
+            raise GuiBackendError(f"No key code for {key!r}")
+        q = self._quartz
+        self._post(q.CGEventCreateKeyboardEvent(None, code, True))
+        if hold > 0:
+            time.sleep(hold)
+        self._post(q.CGEventCreateKeyboardEvent(None, code, False))
+
+
+class OsascriptBackend(GuiBackend):
+    """macOS fallback: one osascript process per window call, pyautogui keys."""
+
+    name = "osascript"
+
+    def __init__(self):
+        import pyautogui
+
+        pyautogui.FAILSAFE = True
+        pyautogui.PAUSE = 0  # callers pace key presses themselves
+        self._pyautogui = pyautogui
+
+    def _osascript(self, script: str) -> Optional[str]:
+        try:
+            result = subprocess.run(
+                ["osascript", "-e", script],
+                capture_output=True,
+                text=True,
+                timeout=OSASCRIPT_TIMEOUT,
+            )
+        except (subprocess.TimeoutExpired, subprocess.SubprocessError):
+            return None
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    def find_game_process(self) -> Optional[str]:
+        names = " or ".join(f'name is "{name}"' for name in GAME_PROCESS_NAMES)
+        script = f"""
+        tell application "System Events"
+            set matches to name of every process whose {names}
+            if matches is {{}} then return ""
+            return item 1 of matches
+        end tell
+        """
+        return self._osascript(script) or None
+
+    def window_position(self) -> Optional[Tuple[int, int]]:
+        name = self.find_game_process()
+        if name is None:
+            return None
+        output = self._osascript(f"""
+        tell application "System Events"
+            tell process "{name}"
+                return position of window 1
+            end tell
+        end tell
+        """)
+        try:
+            x, y = output.strip("{}").split(", ")
+            return int(x), int(y)
+        except (AttributeError, ValueError):
+            return None
+
+    def position_window(self, x: int, y: int, width: int, height: int) -> bool:
+        name = self.find_game_process()
+        if name is None:
+            return False
+        return self._osascript(f"""
+        tell application "System Events"
+            tell process "{name}"
+                set position of window 1 to {{{x}, {y}}}
+                set size of window 1 to {{{width}, {height}}}
+            end tell
+        end tell
+        """) is not None
+
+    def activate(self, pid: Optional[int] = None) -> bool:
+        if pid is not None:
+            target = f"(first process whose unix id is {pid})"
+        else:
+            name = self.find_game_process()
+            if name is None:
+                return False
+            target = f'process "{name}"'
+        return self._osascript(f"""
+        tell application "System Events"
+            set frontmost of {target} to true
+        end tell
+        """) is not None
+
+    def click(self, x: int, y: int):
+        self._pyautogui.click(x, y)
+
+    def _press(self, key: str, hold: float):
+        if hold > 0:
+            with self._pyautogui.hold(key):
+                time.sleep(hold)
+        else:
+            self._pyautogui.press(key)
+
+
+class XdotoolBackend(GuiBackend):
+    """Linux/X11 backend driving xdotool; a key sequence is one process."""
+
+    name = "xdotool"
+
+    def __init__(self, executable: str = "xdotool"):
+        path = shutil.which(executable)
+        if path is None:
+            raise GuiBackendError(f"{executable} not found")
+        self.executable = path
+        self._window: Optional[str] = None
+
+    def _run(self, *args: str) -> Optional[str]:
+        try:
+            result = subprocess.run(
+                [self.executable, *args],
+                capture_output=True,
+                text=True,
+                timeout=OSASCRIPT_TIMEOUT,
+            )
+        except (subprocess.TimeoutExpired, subprocess.SubprocessError):
+            return None
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    def forget_game(self):
+        self._window = None
+
+    def _find_window(self) -> Optional[str]:
+        for name in GAME_PROCESS_NAMES:
+            output = self._run("search", "--limit", "1", "--name", name)
+            if output:
+                self._window = output.split()[0]
+                return name
+        return None
+
+    def find_game_process(self) -> Optional[str]:
+        return self._find_window()
+
+    def window_position(self) -> Optional[Tuple[int, int]]:
+        if self._window is None and self._find_window() is None:
+            return None
+        output = self._run("getwindowgeometry", "--shell", self._window)
+        if output is None:
+            return None
+        values = dict(line.split("=", 1) for line in output.splitlines() if "=" in line)
+        try:
+            return int(values["X"]), int(values["Y"])
+        except (KeyError, ValueError):
+            return None
+
+    def position_window(self, x: int, y: int, width: int, height: int) -> bool:
+        if self._window is None and self._find_window() is None:
+            return False
+        return self._run(
+            "windowmove", self._window, str(x), str(y),
+            "windowsize", self._window, str(width), str(height),
+        ) is not None
+
+    def activate(self, pid: Optional[int] = None) -> bool:
+        if pid is not None:
+            output = self._run("search", "--limit", "1", "--pid", str(pid))
+            if not output:
+                return False
+            self._window = output.split()[0]
+        elif self._window is None and self._find_window() is None:
+            return False
+        return self._run("windowactivate", "--sync", self._window) is not None
+
+    def click(self, x: int, y: int):
+        if self._run("mousemove", str(x), str(y), "click", "1") is None:
+            raise GuiBackendError("xdotool click failed")
+
+    def _press(self, key: str, hold: float):
+        # Only used by the base send_keys, which this backend replaces
+        self.send_keys([key], hold=hold)
+
+    def send_keys(
+        self, keys: Sequence[str], interval: float = 0.0, hold: float = 0.0
+    ) -> List[KeyTiming]:
+        if not keys:
+            return []
+        args: List[str] = []
+        for i, key in enumerate(keys):
+            keysym = X11_KEYS.get(key, key)
+            if i and interval > 0:
+                args += ["sleep", f"{interval:.3f}"]
+            if hold > 0:
+                args += ["keydown", keysym, "sleep", f"{hold:.3f}", "keyup", keysym]
+            else:
+                args += ["key", keysym]
+        start = time.perf_counter()
+        if self._run(*args) is None:
+            raise GuiBackendError(f"xdotool could not send {list(keys)}")
+        waited = interval * (len(keys) - 1) + hold * len(keys)
+        # One process for the whole sequence: its overhead is spread evenly
+        latency = max(time.perf_counter() - start - waited, 0.0) / len(keys)
+        return [KeyTiming(key, latency) for key in keys]
+
+
+class FakeBackend(GuiBackend):
+    """Records every action with its time instead of touching the screen.
+
+    `on_key` is called for each key, e.g. to let a simulator react to it.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        process_name: Optional[str] = GAME_PROCESS_NAMES[0],
+        position: Tuple[int, int] = (0, 0),
+        on_key: Optional[Callable[[str], None]] = None,
+    ):
+        self.latency = latency
+        self.process_name = process_name
+        self.position = position
+        self.on_key = on_key
+        self.events: List[Tuple[float, str, tuple]] = []
+
+    def _record(self, action: str, *args):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        self.events.append((time.monotonic(), action, args))
+
+    @property
+    def keys(self) -> List[str]:
+        return [args[0] for _, action, args in self.events if action == "key"]
+
+    def find_game_process(self) -> Optional[str]:
+        return self.process_name
+
+    def window_position(self) -> Optional[Tuple[int, int]]:
+        return self.position if self.process_name else None
+
+    def position_window(self, x: int, y: int, width: int, height: int) -> bool:
+        self._record("position", x, y, width, height)
+        self.position = (x, y)
+        return self.process_name is not None
+
+    def activate(self, pid: Optional[int] = None) -> bool:
+        self._record("activate", pid)
+        return self.process_name is not None
+
+    def click(self, x: int, y: int):
+        self._record("click", x, y)
+
+    def _press(self, key: str, hold: float):
+        if hold > 0:
+            time.sleep(hold)
+        self._record("key", key, hold)
+        if self.on_key is not None:
+            self.on_key(key)
+
+
+BACKENDS = {
+    "quartz": QuartzBackend,
+    "osascript": OsascriptBackend,
+    "xdotool": XdotoolBackend,
+    "fake": FakeBackend,
+}
+
+
+def create_backend(name: str = GUI_BACKEND) -> GuiBackend:
+    """Backend by name; "auto" picks quartz (or osascript) on macOS, else xdotool.
+
+    Raises:
+        ValueError: Unknown backend name
+    """
+    if name == "auto":
+        if sys.platform == "darwin":
+            try:
+                return QuartzBackend()
+            except ImportError:
+                return OsascriptBackend()
+        return XdotoolBackend()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown GUI backend {name!r} (choose from auto, {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
@@ -1,18 +1,19 @@
 #!/usr/bin/env python3
 """
 GUI controller for Baba Is You automation.
-Handles window management and startup interactions using osascript and pyautogui.
+Handles window management and startup interactions through a GUI backend
+(see gui_backend.py; Quartz in-process on macOS by default).
 """
 
 import subprocess
+import threading
 import time
-from typing import Optional, Tuple
-import pyautogui
+from typing import List, Optional, Sequence, Tuple
 
-# Safety and timing for pyautogui
-pyautogui.FAILSAFE = True
-pyautogui.PAUSE = 0.5
+from automation.gui_backend import GuiBackend, KeyTiming, create_backend
 
+_BACKEND: Optional[GuiBackend] = None
+_BACKEND_LOCK = threading.Lock()
 _GAME_PROCESS_NAME: Optional[str] = None
 _VERBOSE = False
 
@@ -29,10 +30,32 @@ def _log(message: str):
         print(f"[GUI] {message}")
 
 
+def get_backend() -> GuiBackend:
+    """The GUI backend in use, created on first use from GUI_BACKEND."""
+    global _BACKEND
+    with _BACKEND_LOCK:
+        if _BACKEND is None:
+            _BACKEND = create_backend()
+            _log(f"Using GUI backend: {_BACKEND.name}")
+        return _BACKEND
+
+
+def set_backend(backend: GuiBackend):
+    """Use `backend` from now on (e.g. a FakeBackend in tests)."""
+    global _BACKEND
+    with _BACKEND_LOCK:
+        if _BACKEND is not None and _BACKEND is not backend:
+            _BACKEND.close()
+        _BACKEND = backend
+    reset_game_process_name()
+
+
 def reset_game_process_name():
     """Reset the cached game process name. Call after killing the game."""
     global _GAME_PROCESS_NAME
     _GAME_PROCESS_NAME = None
+    if _BACKEND is not None:
+        _BACKEND.forget_game()
     _log("Reset cached game process name")
 
 
@@ -48,36 +71,17 @@ def get_game_process_name() -> Optional[str]:
         _log(f"Using cached process name: {_GAME_PROCESS_NAME}")
         return _GAME_PROCESS_NAME
 
-    script = """
-    tell application "System Events"
-        set processNames to name of every process
-        if processNames contains "Baba Is You" then
-            return "Baba Is You"
-        else if processNames contains "Chowdren" then
-            return "Chowdren"
-        else
-            return ""
-        end if
-    end tell
-    """
-    try:
-        result = subprocess.run(
-            ["osascript", "-e", script], capture_output=True, text=True, timeout=5
-        )
-        name = result.stdout.strip()
-        if name:
-            _GAME_PROCESS_NAME = name
-            _log(f"Detected game process name: {name}")
-            return _GAME_PROCESS_NAME
-        else:
-            _log("No game process found")
-    except (subprocess.TimeoutExpired, subprocess.SubprocessError) as e:
-        _log(f"Error detecting game process: {e}")
+    name = get_backend().find_game_process()
+    if name:
+        _GAME_PROCESS_NAME = name
+        _log(f"Detected game process name: {name}")
+        return _GAME_PROCESS_NAME
+    _log("No game process found")
     return None
 
 
 def find_game_window() -> bool:
-    """Check if game window exists using osascript.
+    """Check if game window exists.
 
     Returns:
         True if window found, False otherwise
@@ -91,38 +95,11 @@ def get_window_position() -> Optional[Tuple[int, int]]:
     Returns:
         Tuple of (x, y) coordinates, or None if window not found
     """
-    process_name = get_game_process_name()
-    if not process_name:
-        return None
-
-    script = f"""
-    tell application "System Events"
-        tell process "{process_name}"
-            set frontWindow to window 1
-            return position of frontWindow
-        end tell
-    end tell
-    """
-    try:
-        result = subprocess.run(
-            ["osascript", "-e", script], capture_output=True, text=True, timeout=5
-        )
-        if result.returncode == 0:
-            # Parse "{x, y}" format
-            coords = result.stdout.strip().strip("{}").split(", ")
-            return (int(coords[0]), int(coords[1]))
-    except (
-        subprocess.TimeoutExpired,
-        subprocess.SubprocessError,
-        ValueError,
-        IndexError,
-    ):
-        pass
-    return None
+    return get_backend().window_position()
 
 
 def position_window(x: int, y: int, width: int, height: int) -> bool:
-    """Position game window using osascript.
+    """Position game window.
 
     Args:
         x: Left edge position
@@ -133,34 +110,12 @@ def position_window(x: int, y: int, width: int, height: int) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    process_name = get_game_process_name()
-    if not process_name:
-        _log("Failed to position window: no game process found")
-        return False
-
-    script = f"""
-    tell application "System Events"
-        tell process "{process_name}"
-            set position of window 1 to {{{x}, {y}}}
-            set size of window 1 to {{{width}, {height}}}
-        end tell
-    end tell
-    """
-    try:
-        result = subprocess.run(
-            ["osascript", "-e", script], capture_output=True, text=True, timeout=5
-        )
-        success = result.returncode == 0
-        if success:
-            _log(f"Positioned window to ({x}, {y}) size {width}x{height}")
-        else:
-            _log(
-                f"Failed to position window: osascript returned {result.returncode}, stderr: {result.stderr}"
-            )
-        return success
-    except (subprocess.TimeoutExpired, subprocess.SubprocessError) as e:
-        _log(f"Failed to position window: {e}")
-        return False
+    success = get_backend().position_window(x, y, width, height)
+    if success:
+        _log(f"Positioned window to ({x}, {y}) size {width}x{height}")
+    else:
+        _log("Failed to position window")
+    return success
 
 
 def wait_for_window(timeout: int = 30) -> bool:
@@ -183,44 +138,27 @@ def wait_for_window(timeout: int = 30) -> bool:
     return False
 
 
-# ========== Pyautogui-based functions ==========
+# ========== Input functions ==========
 
 
-def activate_game_window() -> bool:
-    """Bring the game window to the foreground using System Events.
+def activate_game_window(pid: Optional[int] = None) -> bool:
+    """Bring the game window to the foreground.
 
-    Uses 'set frontmost to true' which works with any running process
-    (including raw binaries like Chowdren), unlike 'tell application ... activate'
-    which only works with registered macOS .app bundles.
+    Args:
+        pid: Unix PID of a specific game process. Needed when several game
+            instances run at once, since they all share the same process name.
 
     Returns:
         True if successful, False otherwise
     """
-    process_name = get_game_process_name()
-    if not process_name:
-        _log("Failed to activate game: no game process found")
-        return False
-
-    script = f'''
-    tell application "System Events"
-        set frontmost of process "{process_name}" to true
-    end tell
-    '''
-    try:
-        result = subprocess.run(
-            ["osascript", "-e", script], capture_output=True, text=True, timeout=5
-        )
-        success = result.returncode == 0
-        if success:
-            _log("Activated game window via System Events")
-        else:
-            _log(
-                f"Failed to activate game: osascript returned {result.returncode}, stderr: {result.stderr}"
-            )
-        return success
-    except (subprocess.TimeoutExpired, subprocess.SubprocessError) as e:
-        _log(f"Failed to activate game: {e}")
-        return False
+    start = time.perf_counter()
+    success = get_backend().activate(pid)
+    elapsed = time.perf_counter() - start
+    if success:
+        _log(f"Activated game window in {elapsed * 1000:.1f}ms")
+    else:
+        _log("Failed to activate game window")
+    return success
 
 
 def focus_game_pyautogui(x: int, y: int) -> bool:
@@ -234,63 +172,75 @@ def focus_game_pyautogui(x: int, y: int) -> bool:
         True if click executed successfully, False otherwise
     """
     try:
-        pyautogui.click(x, y)
+        get_backend().click(x, y)
         _log(f"Focused game window by clicking at ({x}, {y})")
         time.sleep(0.2)
         return True
     except Exception as e:
-        _log(f"Failed to focus game with pyautogui click: {e}")
+        _log(f"Failed to focus game with a click: {e}")
+        return False
+
+
+def _log_timings(timings: List[KeyTiming]):
+    if timings:
+        average = sum(t.latency for t in timings) / len(timings)
+        worst = max(t.latency for t in timings)
+        _log(
+            f"Sent {len(timings)} keys {[t.key for t in timings]}: "
+            f"{average * 1000:.1f}ms average, {worst * 1000:.1f}ms worst latency"
+        )
+
+
+def send_keys(keys: Sequence[str], interval: float = 0.0, hold_duration: float = 0.0) -> bool:
+    """Press a sequence of keys as one batch.
+
+    Args:
+        keys: Keys to press in order (e.g., ["right", "up", "up"])
+        interval: Seconds between presses
+        hold_duration: Seconds to hold each key down
+
+    Returns:
+        True if all presses were sent, False otherwise
+    """
+    try:
+        _log_timings(get_backend().send_keys(list(keys), interval, hold_duration))
+        return True
+    except Exception as e:
+        _log(f"Failed to send keys {list(keys)}: {e}")
         return False
 
 
 def press_key_pyautogui(
     key: str, delay: float = 0.5, hold_duration: float = 0.0
 ) -> bool:
-    """Press a key using pyautogui.
+    """Press a key through the GUI backend (the name predates the backends).
 
     Args:
         key: Key to press (e.g., "enter", "escape", "up", "down", "left", "right")
-        delay: Seconds to wait after the press (in addition to pyautogui.PAUSE)
+        delay: Seconds to wait after the press
         hold_duration: Seconds to hold the key down (0 for instant press)
 
     Returns:
         True if press executed successfully, False otherwise
     """
-    try:
-        if hold_duration > 0:
-            with pyautogui.hold(key):
-                time.sleep(hold_duration)
-            _log(
-                f"Held key '{key}' for {hold_duration}s using pyautogui, waiting additional {delay}s"
-            )
-        else:
-            pyautogui.press(key)
-            _log(f"Pressed key '{key}' using pyautogui, waiting additional {delay}s")
-        time.sleep(delay)
-        return True
-    except Exception as e:
-        _log(f"Failed to press key '{key}' with pyautogui: {e}")
+    if not send_keys([key], hold_duration=hold_duration):
         return False
+    time.sleep(delay)
+    return True
 
 
 def press_key_multiple(key: str, count: int, interval: float = 0.5) -> bool:
-    """Press a key multiple times using pyautogui.
+    """Press a key multiple times.
 
     Args:
         key: Key to press (e.g., "enter", "escape", "up", "down", "left", "right")
         count: Number of times to press the key
-        interval: Seconds between presses (overrides pyautogui.PAUSE for just this call)
+        interval: Seconds between presses
 
     Returns:
         True if all presses executed successfully, False otherwise
     """
-    try:
-        pyautogui.press(key, presses=count, interval=interval)
-        _log(f"Pressed key '{key}' {count} times with {interval}s interval")
-        return True
-    except Exception as e:
-        _log(f"Failed to press key '{key}' {count} times with pyautogui: {e}")
-        return False
+    return send_keys([key] * count, interval=interval)
 
 
 # ========== Legacy osascript-based functions (deprecated but kept for reference) ==========
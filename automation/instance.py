@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Isolated game instances for parallel evaluation.
+
+Every instance is a full copy of the game's .app bundle, so each one has its
+own mod install, its own world_data.txt and its own commands directory.
+Instance 0 of a non-isolated run is the regular Steam install.
+"""
+
+import shutil
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+from automation.command_bridge import ack_path_for
+from automation.config import GAME_APP_DIR, INSTANCES_DIR
+
+DATA_SUBPATH = Path("Contents/Resources/Data")
+STATE_SUBPATH = Path("Worlds/baba/world_data.txt")
+COMMANDS_SUBPATH = Path("baba_is_eval/commands")
+SNAPSHOT_SUBPATH = Path("baba_is_eval/state.bin")
+DELTA_SUBPATH = Path("baba_is_eval/state.delta")
+TRAJECTORY_SUBPATH = Path("baba_is_eval/trajectory.txt")
+BINARY_SUBPATH = Path("Contents/MacOS/Chowdren")
+
+
+class GameInstance:
+    """Paths belonging to one game installation."""
+
+    def __init__(self, index: int, app_dir: Path, isolated: bool = False):
+        self.index = index
+        self.app_dir = app_dir
+        self.isolated = isolated
+
+    def __repr__(self) -> str:
+        return f"GameInstance(index={self.index}, app_dir={str(self.app_dir)!r})"
+
+    @property
+    def data_dir(self) -> Path:
+        return self.app_dir / DATA_SUBPATH
+
+    @property
+    def state_path(self) -> Path:
+        return self.data_dir / STATE_SUBPATH
+
+    @property
+    def commands_dir(self) -> Path:
+        return self.data_dir / COMMANDS_SUBPATH
+
+    @property
+    def ack_path(self) -> Path:
+        return ack_path_for(self.commands_dir)
+
+    @property
+    def snapshot_path(self) -> Path:
+        return self.data_dir / SNAPSHOT_SUBPATH
+
+    @property
+    def delta_path(self) -> Path:
+        return self.data_dir / DELTA_SUBPATH
+
+    @property
+    def trajectory_path(self) -> Path:
+        return self.data_dir / TRAJECTORY_SUBPATH
+
+    @property
+    def binary_path(self) -> Path:
+        return self.app_dir / BINARY_SUBPATH
+
+    def tool_env(self) -> dict:
+        """Environment variables pointing the opencode tools at this instance."""
+        return {
+            "BABA_STATE_PATH": str(self.state_path),
+            "BABA_COMMANDS_DIR": str(self.commands_dir),
+        }
+
+    def find_pid(self) -> Optional[int]:
+        """Return the PID of this instance's game binary, if it is running."""
+        try:
+            result = subprocess.run(
+                ["pgrep", "-f", str(self.binary_path)],
+                capture_output=True,
+                text=True,
+                timeout=5,
+            )
+        except (subprocess.TimeoutExpired, subprocess.SubprocessError):
+            return None
+        pids = result.stdout.split()
+        return int(pids[0]) if pids else None
+
+
+def default_instance() -> GameInstance:
+    """The regular Steam install, shared by all sequential runs."""
+    return GameInstance(0, GAME_APP_DIR)
+
+
+def prepare_instances(count: int, source: Path = GAME_APP_DIR) -> List[GameInstance]:
+    """Create (or reuse) `count` isolated copies of the game bundle.
+
+    Copies live under INSTANCES_DIR/game_<i>/ and are only created once; later
+    sessions reuse them. The mod must already be installed in `source`.
+
+    Raises:
+        FileNotFoundError: The source game bundle does not exist
+    """
+    if not source.exists():
+        raise FileNotFoundError(f"Game bundle not found: {source}")
+
+    instances = []
+    for i in range(count):
+        app_dir = INSTANCES_DIR / f"game_{i}" / source.name
+        if not app_dir.exists():
+            print(f"Creating game instance {i} at {app_dir}...")
+            app_dir.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copytree(source, app_dir, symlinks=True)
+        instances.append(GameInstance(i, app_dir, isolated=True))
+    return instances
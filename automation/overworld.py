@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Overworld router: shortest cursor path to a level, from the exported map.
+
+While the game is on the overworld (level_name=map), lua/io.lua exports the
+map's units like any level's, plus a [map] levels= key with the position,
+file, name and displayed number of every level icon. The cursor can only
+move onto cells holding one of MAP_WALKABLE (levels and the lines/paths
+between them), so a BFS over those cells gives the shortest move list from
+wherever the cursor is to any level. The moves are sent as one command file
+instead of paced key presses.
+
+Usage:
+    from automation.overworld import OverworldMap
+
+    overworld = OverworldMap.from_world_data(STATE_PATH)
+    target = overworld.find_level("3")
+    moves = overworld.route(target.position)
+"""
+
+import argparse
+from collections import deque
+from pathlib import Path
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from automation.config import MAP_CURSOR, MAP_WALKABLE, OVERWORLD_LEVEL_NAME, STATE_PATH
+from automation.state_codec import FIELD_SEPARATOR, UNIT_SEPARATOR, StateTable
+from automation.world_data import WorldData
+
+Cell = Tuple[int, int]
+
+# Command name -> (dx, dy) in game coordinates (y grows downwards)
+DIRECTIONS = {
+    "up": (0, -1),
+    "down": (0, 1),
+    "left": (-1, 0),
+    "right": (1, 0),
+}
+
+
+class MapLevel(NamedTuple):
+    """One level icon on the overworld."""
+
+    x: int
+    y: int
+    file: str  # level file without extension, e.g. "1level"
+    name: str  # display name, e.g. "where do i go?"
+    number: str  # number (or letter) shown on the icon
+
+    @property
+    def position(self) -> Cell:
+        return (self.x, self.y)
+
+    def label(self) -> str:
+        return self.name or self.file or f"{self.number} at {self.position}"
+
+
+def parse_levels(value: str) -> List[MapLevel]:
+    """Decode the [map] levels= value written by lua/io.lua."""
+    levels = []
+    for record in value.split(UNIT_SEPARATOR):
+        fields = record.split(FIELD_SEPARATOR)
+        if len(fields) < 5:
+            continue
+        try:
+            x, y = int(float(fields[0])), int(float(fields[1]))
+        except ValueError:
+            continue
+        number = fields[4]
+        if number.endswith(".0"):
+            number = number[:-2]
+        levels.append(MapLevel(x, y, fields[2], fields[3], number))
+    return levels
+
+
+class OverworldMap:
+    """Cursor position, walkable cells and level icons of the overworld."""
+
+    def __init__(
+        self,
+        cursor: Optional[Cell],
+        walkable: FrozenSet[Cell],
+        levels: List[MapLevel],
+    ):
+        self.cursor = cursor
+        self.walkable = walkable
+        self.levels = levels
+
+    @classmethod
+    def from_table(cls, table: StateTable, levels: List[MapLevel]) -> "OverworldMap":
+        cursors = table.positions(MAP_CURSOR)
+        walkable = set()
+        for name in MAP_WALKABLE:
+            walkable.update(table.positions(name))
+        walkable.update(level.position for level in levels)
+        return cls(cursors[0] if cursors else None, frozenset(walkable), levels)
+
+    @classmethod
+    def from_world_data(cls, path: Path = STATE_PATH) -> Optional["OverworldMap"]:
+        """The overworld as last exported, None unless the game is on it."""
+        world = WorldData.for_path(path)
+        if world.level_name() != OVERWORLD_LEVEL_NAME:
+            return None
+        table = StateTable.from_world_data(path)
+        if table is None:
+            return None
+        return cls.from_table(table, parse_levels(world.get("levels") or ""))
+
+    def find_level(self, level: str) -> Optional[MapLevel]:
+        """The icon for `level`: its number ("3", "level_3"), file ("3level")
+        or display name (case-insensitive)."""
+        wanted = str(level).strip().lower()
+        if wanted.startswith("level_"):
+            wanted = wanted[len("level_"):]
+        for matches in (
+            lambda l: l.number.lower() == wanted,
+            lambda l: l.file.lower() in (wanted, f"{wanted}level"),
+            lambda l: l.name.lower() == wanted,
+        ):
+            for candidate in self.levels:
+                if matches(candidate):
+                    return candidate
+        return None
+
+    def route(self, target: Cell, start: Optional[Cell] = None) -> Optional[List[str]]:
+        """Shortest list of moves from `start` (default: the cursor) to `target`.
+
+        Returns None if either end is unknown or no walkable path connects them.
+        """
+        start = start or self.cursor
+        if start is None or target not in self.walkable:
+            return None
+        previous: Dict[Cell, Tuple[Cell, str]] = {}
+        seen = {start}
+        frontier = deque([start])
+        while frontier:
+            cell = frontier.popleft()
+            if cell == target:
+                moves = []
+                while cell != start:
+                    cell, move = previous[cell]
+                    moves.append(move)
+                moves.reverse()
+                return moves
+            x, y = cell
+            for move, (dx, dy) in DIRECTIONS.items():
+                neighbour = (x + dx, y + dy)
+                if neighbour in self.walkable and neighbour not in seen:
+                    seen.add(neighbour)
+                    previous[neighbour] = (cell, move)
+                    frontier.append(neighbour)
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the cursor route to a level")
+    parser.add_argument("--level", required=True, help="Level number, file or name")
+    parser.add_argument("--state-path", type=Path, default=STATE_PATH)
+    args = parser.parse_args()
+
+    overworld = OverworldMap.from_world_data(args.state_path)
+    if overworld is None:
+        print("Error: The game is not on the overworld")
+        exit(1)
+    target = overworld.find_level(args.level)
+    if target is None:
+        print(f"Error: No level {args.level} on the map")
+        exit(1)
+    moves = overworld.route(target.position)
+    if moves is None:
+        print(f"Error: No path from the cursor to {target.label()}")
+        exit(1)
+    print(f"{target.label()}: {','.join(moves) or '(already there)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Readiness probes: wait for something the game shows instead of sleeping.
+
+Each probe polls (or, for stdout lines, blocks on) an observable condition,
+gives up after its timeout and logs how long the wait actually took, so the
+pipeline continues as soon as the game is ready and a slow machine shows up
+in the log instead of as a misnavigated menu.
+
+Signals:
+    - lines on the game's stdout (GameOutput): "baba_is_eval loaded." when
+      lua/io.lua is loaded, "World state saved." from the level_start hook
+    - world_data.txt being rewritten (file signature) with the expected
+      level_name, room_size, ... (wait_for_world)
+    - anything else through wait_until, e.g. the binary snapshot's seq
+
+Usage:
+    output = GameOutput(game_process.stdout)
+    output.wait_for_line(MOD_LOADED_LINE, since=0, timeout=GAME_INIT_TIMEOUT)
+
+    since = file_signature(state_path)
+    press_key_pyautogui("enter")
+    wait_for_world(state_path, since, 10, "level loaded",
+                   lambda world: world.level_name() != "map")
+"""
+
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, NamedTuple, Optional, TextIO, Tuple
+
+from automation.command_bridge import adaptive_intervals
+from automation.config import READY_POLL_INITIAL, READY_POLL_MAX
+from automation.world_data import Signature, WorldData, file_signature
+
+
+class ProbeResult(NamedTuple):
+    """Outcome of a wait: whether the condition held and how long it took."""
+
+    ready: bool
+    waited: float
+
+    def __bool__(self) -> bool:
+        return self.ready
+
+
+def _report(description: str, ready: bool, waited: float) -> ProbeResult:
+    if ready:
+        print(f"[ready] {description} after {waited:.2f}s")
+    else:
+        print(f"[ready] Timed out after {waited:.2f}s waiting for {description}")
+    return ProbeResult(ready, waited)
+
+
+def wait_until(
+    condition: Callable[[], bool],
+    timeout: float,
+    description: str,
+    poll_initial: float = READY_POLL_INITIAL,
+    poll_max: float = READY_POLL_MAX,
+) -> ProbeResult:
+    """Poll `condition` with growing intervals until it holds or `timeout` passes."""
+    start = time.monotonic()
+    deadline = start + timeout
+    for interval in adaptive_intervals(poll_initial, poll_max):
+        if condition():
+            return _report(description, True, time.monotonic() - start)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(interval, remaining))
+    return _report(description, False, time.monotonic() - start)
+
+
+def wait_for_world(
+    state_path: Path,
+    since: Optional[Signature],
+    timeout: float,
+    description: str,
+    check: Callable[[WorldData], bool] = lambda world: True,
+) -> ProbeResult:
+    """Wait until world_data.txt is rewritten (signature differs from `since`)
+    and `check` accepts its contents.
+
+    Take `since` with file_signature() before the action that should cause
+    the export, so a file left over from earlier does not count.
+    """
+    state_path = Path(state_path)
+    world = WorldData.for_path(state_path)
+    return wait_until(
+        lambda: file_signature(state_path) != since and check(world),
+        timeout,
+        description,
+    )
+
+
+class GameOutput:
+    """Drains the game's stdout in a background thread and remembers recent lines.
+
+    Lines are numbered from 1 in the order they arrive; mark() returns the
+    number of the last line seen, to wait only for output after that point.
+    Reading also keeps the pipe from filling up and blocking the game.
+    """
+
+    def __init__(self, stream: TextIO, echo: bool = False, history: int = 500):
+        self.echo = echo
+        self._lines: Deque[Tuple[int, str]] = deque(maxlen=history)
+        self._count = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._read, args=(stream,), daemon=True)
+        self._thread.start()
+
+    def _read(self, stream: TextIO):
+        try:
+            for line in iter(stream.readline, ""):
+                line = line.rstrip("\r\n")
+                if self.echo:
+                    print(f"[game] {line}")
+                with self._cond:
+                    self._count += 1
+                    self._lines.append((self._count, line))
+                    self._cond.notify_all()
+        except (OSError, ValueError):
+            pass  # pipe closed under us
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+
+    def mark(self) -> int:
+        with self._cond:
+            return self._count
+
+    def _seen(self, text: str, since: int) -> bool:
+        return any(n > since and line.strip() == text for n, line in self._lines)
+
+    def wait_for_line(
+        self,
+        text: str,
+        since: int,
+        timeout: float,
+        description: Optional[str] = None,
+    ) -> ProbeResult:
+        """Wait for a line equal to `text` (ignoring surrounding whitespace)
+        after line number `since`. Gives up early if the game's output ends.
+        """
+        description = description or repr(text)
+        start = time.monotonic()
+        deadline = start + timeout
+        with self._cond:
+            while not self._seen(text, since):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._closed:
+                    return _report(description, False, time.monotonic() - start)
+                self._cond.wait(remaining)
+        return _report(description, True, time.monotonic() - start)
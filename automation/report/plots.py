@@ -6,154 +6,236 @@ Uses matplotlib and seaborn. Install with:
     uv sync --extra reporting
 """
 
+import hashlib
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import matplotlib
+
+matplotlib.use("Agg")  # plots are only written to files, also from worker processes
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 from matplotlib.lines import Line2D
 
-REPORT_DIR = Path(__file__).parent
-
-
-def parse_trace(trace_path: Path) -> tuple[list[int], list[int]]:
-    """Parse trace.jsonl and return cumulative tool_calls and tokens per step."""
-    tool_calls = []
-    tokens = []
-    current_tool_calls = 0
-    current_tokens = 0
-
-    with trace_path.open("r") as f:
-        for line in f:
-            event = json.loads(line)
-
-            if event.get("type") == "tool_use":
-                current_tool_calls += 1
-
-            elif event.get("type") == "step_finish":
-                tokens_data = event.get("part", {}).get("tokens", {})
-                current_tokens += tokens_data.get("input", 0)
-                current_tokens += tokens_data.get("output", 0)
-                tool_calls.append(current_tool_calls)
-                tokens.append(current_tokens)
-
-    # Traces often end mid-step (no step_finish after winning).
-    # Append final state so last tool calls aren't lost.
-    if current_tool_calls > 0 and (not tool_calls or tool_calls[-1] != current_tool_calls):
-        tool_calls.append(current_tool_calls)
-        tokens.append(current_tokens)
-
-    # Always start from (0, 0) so short runs don't look weird.
-    if tool_calls:
-        tool_calls.insert(0, 0)
-        tokens.insert(0, 0)
-
-    return tool_calls, tokens
-
+from automation.results_index import ResultsIndex, trace_series
 
-def generate_level_progress_plots(runs: list[dict]) -> list[Path]:
-    """Generate per-level progress plots showing cumulative tokens vs tool calls."""
+REPORT_DIR = Path(__file__).parent
+FINGERPRINTS_PATH = REPORT_DIR / ".plot_fingerprints.json"
+PLOT_VERSION = 1  # bump when the plot layout changes to re-render everything
+MAX_PLOT_POINTS = 500  # longer series are downsampled with LTTB
+
+# (model, status, tool calls, tokens) of one run in a level plot
+PlotEntry = tuple[str, str, list[int], list[int]]
+
+
+def parse_trace(run_dir: Path) -> tuple[list[int], list[int]]:
+    """Parse a run's trace and return cumulative tool_calls and tokens per step.
+
+    Uses the trace index when present, so only step_finish events are read.
+    """
+    return trace_series(run_dir)
+
+
+def lttb(xs: list[int], ys: list[int], threshold: int) -> tuple[list[int], list[int]]:
+    """Downsample a series to `threshold` points with Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last point and, per bucket, the point spanning the
+    largest triangle with its neighbours, so spikes and plateaus survive.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return xs, ys
+
+    out_x = [xs[0]]
+    out_y = [ys[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        # Average of the next bucket (or the last point)
+        next_start = end
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / count
+        avg_y = sum(ys[next_start:next_end]) / count
+
+        ax, ay = xs[a], ys[a]
+        best = start
+        best_area = -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+        out_x.append(xs[best])
+        out_y.append(ys[best])
+        a = best
+
+    out_x.append(xs[-1])
+    out_y.append(ys[-1])
+    return out_x, out_y
+
+
+def _fingerprint(level: str, entries: list[PlotEntry], model_colors: dict) -> str:
+    data = [PLOT_VERSION, level]
+    for model, status, tool_calls, tokens in entries:
+        data.append([model, status, [round(c, 4) for c in model_colors[model]], tool_calls, tokens])
+    return hashlib.sha256(json.dumps(data).encode()).hexdigest()
+
+
+def _load_fingerprints() -> dict[str, str]:
+    try:
+        return json.loads(FINGERPRINTS_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def render_level_plot(level: str, entries: list[PlotEntry], model_colors: dict, plot_path: Path) -> Path:
+    """Render one level's plot to `plot_path` (runs in a worker process)."""
     sns.set_theme(style="whitegrid")
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    for model, status, tool_calls, tokens in entries:
+        if tool_calls:
+            ax.plot(
+                tool_calls, tokens,
+                color=model_colors[model],
+                marker="o", markersize=4, alpha=0.7,
+                label=model,
+            )
+
+    ax.set_xlabel("# Tool Calls")
+    ax.set_ylabel("Cumulative Tokens")
+    ax.set_title(f"{level}: Cumulative Tokens vs Tool Calls")
+
+    # Secondary axis for win/loss glyphs at final positions
+    ax2 = ax.twinx()
+    ax2.set_ylim(ax.get_ylim())
+    ax2.set_yticks([])
+    ax2.spines["right"].set_visible(False)
+
+    has_won = False
+    has_lost = False
+    has_timeout = False
+
+    for model, status, tool_calls, tokens in entries:
+        if not tool_calls:
+            continue
+        final_tc = tool_calls[-1]
+        final_tok = tokens[-1]
+        color = model_colors[model]
+
+        if status == "won":
+            ax2.scatter(
+                final_tc, final_tok,
+                marker="*", s=350,
+                color=color, edgecolors="black", linewidths=1.2,
+                zorder=10,
+            )
+            has_won = True
+        elif status == "timeout":
+            ax2.scatter(
+                final_tc, final_tok,
+                marker="s", s=150,
+                color=color, edgecolors="black", linewidths=1.2,
+                zorder=10,
+            )
+            has_timeout = True
+        else:
+            ax2.scatter(
+                final_tc, final_tok,
+                marker="X", s=150,
+                color=color, edgecolors="black", linewidths=1.2,
+                zorder=10,
+            )
+            has_lost = True
+
+    # Build custom legend combining models and status glyphs
+    handles, labels = ax.get_legend_handles_labels()
+    by_label = dict(zip(labels, handles))
+
+    if has_won:
+        by_label["Won"] = Line2D(
+            [0], [0], marker="*", color="w", markerfacecolor="gray",
+            markeredgecolor="black", markersize=15, linestyle="None",
+        )
+    if has_lost:
+        by_label["Not Won"] = Line2D(
+            [0], [0], marker="X", color="w", markerfacecolor="gray",
+            markeredgecolor="black", markersize=10, linestyle="None",
+        )
+    if has_timeout:
+        by_label["Timeout"] = Line2D(
+            [0], [0], marker="s", color="w", markerfacecolor="gray",
+            markeredgecolor="black", markersize=10, linestyle="None",
+        )
+
+    ax.legend(by_label.values(), by_label.keys(), title="Model / Status", loc="upper left")
+    plt.tight_layout()
+
+    plt.savefig(plot_path, dpi=150, bbox_inches="tight")
+    plt.close()
+
+    return plot_path
+
+
+def generate_level_progress_plots(runs: list[dict], index: ResultsIndex | None = None) -> list[Path]:
+    """Generate per-level progress plots showing cumulative tokens vs tool calls.
+
+    Series stored in the results index are used as they are; only runs it
+    does not know are read from their traces. Levels whose input (runs,
+    series, colors) is unchanged since the last report keep their PNG; the
+    others are rendered in parallel worker processes.
+    """
     saved_paths = []
 
     models = sorted({run.get("model", "Unknown") for run in runs})
     palette = sns.color_palette("husl", n_colors=len(models))
-    model_colors = dict(zip(models, palette))
+    model_colors = {model: tuple(color) for model, color in zip(models, palette)}
+
+    fingerprints = _load_fingerprints()
+    pending: list[tuple[str, list[PlotEntry], Path, str]] = []
 
     for level in sorted({run["level"] for run in runs}):
-        level_runs = [run for run in runs if run["level"] == level]
-
-        fig, ax = plt.subplots(figsize=(10, 6))
-        parsed_runs: list[tuple[dict, str, list[int], list[int]]] = []
-
-        for run in level_runs:
-            model = run.get("model", "Unknown")
-            trace_path = Path(run["_run_dir"]) / "trace.jsonl"
-            tool_calls, tokens = parse_trace(trace_path)
-            parsed_runs.append((run, model, tool_calls, tokens))
-            if tool_calls:
-                ax.plot(
-                    tool_calls, tokens,
-                    color=model_colors[model],
-                    marker="o", markersize=4, alpha=0.7,
-                    label=model,
-                )
-
-        ax.set_xlabel("# Tool Calls")
-        ax.set_ylabel("Cumulative Tokens")
-        ax.set_title(f"{level}: Cumulative Tokens vs Tool Calls")
-
-        # Secondary axis for win/loss glyphs at final positions
-        ax2 = ax.twinx()
-        ax2.set_ylim(ax.get_ylim())
-        ax2.set_yticks([])
-        ax2.spines["right"].set_visible(False)
-
-        has_won = False
-        has_lost = False
-        has_timeout = False
-
-        for run, model, tool_calls, tokens in parsed_runs:
-            if not tool_calls:
+        entries: list[PlotEntry] = []
+        for run in runs:
+            if run["level"] != level:
                 continue
-            final_tc = tool_calls[-1]
-            final_tok = tokens[-1]
-            status = run.get("status", "")
-            color = model_colors[model]
-
-            if status == "won":
-                ax2.scatter(
-                    final_tc, final_tok,
-                    marker="*", s=350,
-                    color=color, edgecolors="black", linewidths=1.2,
-                    zorder=10,
-                )
-                has_won = True
-            elif status == "timeout":
-                ax2.scatter(
-                    final_tc, final_tok,
-                    marker="s", s=150,
-                    color=color, edgecolors="black", linewidths=1.2,
-                    zorder=10,
-                )
-                has_timeout = True
-            else:
-                ax2.scatter(
-                    final_tc, final_tok,
-                    marker="X", s=150,
-                    color=color, edgecolors="black", linewidths=1.2,
-                    zorder=10,
-                )
-                has_lost = True
-
-        # Build custom legend combining models and status glyphs
-        handles, labels = ax.get_legend_handles_labels()
-        by_label = dict(zip(labels, handles))
-
-        if has_won:
-            by_label["Won"] = Line2D(
-                [0], [0], marker="*", color="w", markerfacecolor="gray",
-                markeredgecolor="black", markersize=15, linestyle="None",
-            )
-        if has_lost:
-            by_label["Not Won"] = Line2D(
-                [0], [0], marker="X", color="w", markerfacecolor="gray",
-                markeredgecolor="black", markersize=10, linestyle="None",
-            )
-        if has_timeout:
-            by_label["Timeout"] = Line2D(
-                [0], [0], marker="s", color="w", markerfacecolor="gray",
-                markeredgecolor="black", markersize=10, linestyle="None",
-            )
-
-        ax.legend(by_label.values(), by_label.keys(), title="Model / Status", loc="upper left")
-        plt.tight_layout()
+            series = index.series(run["_run_dir"]) if index is not None else None
+            tool_calls, tokens = series or parse_trace(Path(run["_run_dir"]))
+            tool_calls, tokens = lttb(tool_calls, tokens, MAX_PLOT_POINTS)
+            entries.append((run.get("model", "Unknown"), run.get("status", ""), tool_calls, tokens))
 
         plot_path = REPORT_DIR / f"{level}_progress.png"
-        plt.savefig(plot_path, dpi=150, bbox_inches="tight")
-        plt.close()
-
+        fingerprint = _fingerprint(level, entries, model_colors)
         saved_paths.append(plot_path)
+        if fingerprints.get(plot_path.name) == fingerprint and plot_path.exists():
+            print(f"Plot unchanged: {plot_path}")
+            continue
+        pending.append((level, entries, plot_path, fingerprint))
+
+    if len(pending) > 1:
+        workers = min(len(pending), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(render_level_plot, level, entries, model_colors, plot_path)
+                for level, entries, plot_path, _ in pending
+            ]
+            for future in futures:
+                future.result()
+    elif pending:
+        level, entries, plot_path, _ = pending[0]
+        render_level_plot(level, entries, model_colors, plot_path)
+
+    for _, _, plot_path, fingerprint in pending:
+        fingerprints[plot_path.name] = fingerprint
         print(f"Plot saved: {plot_path}")
+    FINGERPRINTS_PATH.write_text(json.dumps(fingerprints, indent=2, sort_keys=True))
 
     return saved_paths
@@ -9,7 +9,6 @@ Usage:
 Output: automation/report/report.md
 """
 
-import json
 from datetime import datetime, timezone
 from pathlib import Path
 from string import Template
@@ -17,8 +16,14 @@ from string import Template
 try:
     from .plots import generate_level_progress_plots
 except ImportError:
+    # Run as a script: make the `automation` package importable
+    import sys
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
     from plots import generate_level_progress_plots
 
+from automation.results_index import ResultsIndex
+
 
 REPORT_DIR = Path(__file__).parent
 TEMPLATE_PATH = REPORT_DIR / "template.md"
@@ -86,22 +91,18 @@ def format_error(error) -> str:
     return error
 
 
-def collect_runs() -> list[dict]:
-    """Walk results directory and collect all run.json entries."""
-    runs = []
-    if not RESULTS_DIR.exists():
-        print(f"Results directory not found: {RESULTS_DIR}")
-        return runs
-
-    for run_json in sorted(RESULTS_DIR.rglob("run.json")):
-        try:
-            data = json.loads(run_json.read_text())
-            data["_run_dir"] = str(run_json.parent)
-            runs.append(data)
-        except (json.JSONDecodeError, OSError) as e:
-            print(f"Warning: skipping {run_json}: {e}")
+def collect_runs(index: ResultsIndex) -> list[dict]:
+    """Query all runs from the results index.
 
-    return runs
+    The index is filled by run_solver. Runs it missed (copied in, or whose
+    solver crashed before indexing) are added and runs deleted from disk are
+    dropped; both only look at run directories, so this stays cheap.
+    """
+    added = index.sync()
+    removed = index.remove_missing()
+    if added or removed:
+        print(f"Indexed {added} new runs from {RESULTS_DIR}, dropped {removed} missing")
+    return index.query()
 
 
 def build_table_row(run: dict) -> str:
@@ -182,7 +183,16 @@ def build_matrix_table(runs: list[dict]) -> str:
 
 def generate_report() -> None:
     """Generate the markdown report."""
-    runs = collect_runs()
+    if not RESULTS_DIR.exists():
+        print(f"Results directory not found: {RESULTS_DIR}")
+        return
+
+    with ResultsIndex(results_dir=RESULTS_DIR) as index:
+        _generate_report(index)
+
+
+def _generate_report(index: ResultsIndex) -> None:
+    runs = collect_runs(index)
 
     if not runs:
         print("No runs found.")
@@ -201,7 +211,7 @@ def generate_report() -> None:
     matrix_table = build_matrix_table(latest_runs)
 
     # Generate per-level progress plots (latest run per model/level only)
-    level_plot_paths = generate_level_progress_plots(latest_runs)
+    level_plot_paths = generate_level_progress_plots(latest_runs, index)
     level_plots_md = "\n".join(
         f"### {p.name.replace('_progress.png', '').replace('level_', 'Level ')}\n\n"
         f"![{p.name}]({p.name})"
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+SQLite index over the runs in the results directory.
+
+run_solver adds every finished run here, together with its per-step progress
+series (tool calls and cumulative tokens at each step_finish), so building a
+report is a query instead of a walk over every run.json and trace. Runs that
+were recorded before the index existed are picked up by `sync`, which only
+reads run directories the index does not know yet.
+
+Usage:
+    index = ResultsIndex()
+    for run in index.query(model="opencode/glm-5-free", level="3"):
+        tool_calls, tokens = index.series(run["_run_dir"])
+
+    python -m automation.results_index --model glm --since 2026-03-01
+    python -m automation.results_index --sync
+"""
+
+import argparse
+import json
+import sqlite3
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from automation.config import RESULTS_DIR, RESULTS_INDEX_PATH
+from automation.trace_store import TraceReader
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_dir TEXT PRIMARY KEY,
+    model TEXT,
+    level TEXT,
+    tools_hash TEXT,
+    commit_hash TEXT,
+    status TEXT,
+    timestamp_start TEXT,
+    timestamp_end TEXT,
+    tokens_total INTEGER,
+    tool_calls INTEGER,
+    cost_total REAL,
+    run_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_model_level ON runs (model, level);
+CREATE INDEX IF NOT EXISTS runs_tools_hash ON runs (tools_hash);
+CREATE INDEX IF NOT EXISTS runs_timestamp ON runs (timestamp_start);
+CREATE TABLE IF NOT EXISTS series (
+    run_dir TEXT PRIMARY KEY REFERENCES runs (run_dir) ON DELETE CASCADE,
+    tool_calls BLOB NOT NULL,
+    tokens BLOB NOT NULL
+);
+"""
+
+BUSY_TIMEOUT = 30  # seconds; parallel solves finish at the same time
+
+
+def progress_series(
+    step_tool_calls: Sequence[int],
+    step_tokens: Sequence[int],
+    total_tool_calls: int,
+) -> Tuple[List[int], List[int]]:
+    """Plot-ready (tool calls, cumulative tokens) points of a run.
+
+    Takes the values at each step_finish. Traces often end mid-step (no
+    step_finish after winning), so the final tool call count is appended, and
+    the series always starts from (0, 0) so short runs don't look weird.
+    """
+    tool_calls = list(step_tool_calls)
+    tokens = list(step_tokens)
+    if total_tool_calls > 0 and (not tool_calls or tool_calls[-1] != total_tool_calls):
+        tool_calls.append(total_tool_calls)
+        tokens.append(tokens[-1] if tokens else 0)
+    if tool_calls:
+        tool_calls.insert(0, 0)
+        tokens.insert(0, 0)
+    return tool_calls, tokens
+
+
+def trace_series(run_dir: Path) -> Tuple[List[int], List[int]]:
+    """Progress series of a run read from its trace."""
+    reader = TraceReader(run_dir)
+    if not reader.exists():
+        return progress_series([], [], 0)  # the solver died before writing a trace
+    step_tool_calls = []
+    step_tokens = []
+    current_tokens = 0
+    for tool_calls_so_far, event in reader.iter_step_finish():
+        tokens_data = event.get("part", {}).get("tokens", {})
+        current_tokens += tokens_data.get("input", 0)
+        current_tokens += tokens_data.get("output", 0)
+        step_tool_calls.append(tool_calls_so_far)
+        step_tokens.append(current_tokens)
+    return progress_series(step_tool_calls, step_tokens, reader.tool_calls())
+
+
+class ResultsIndex:
+    """Runs and their progress series, keyed by run directory."""
+
+    def __init__(self, path: Path = RESULTS_INDEX_PATH, results_dir: Path = RESULTS_DIR):
+        self.path = Path(path)
+        self.results_dir = Path(results_dir)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> "ResultsIndex":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _key(self, run_dir: Path) -> str:
+        """Run directories are stored relative to the results directory."""
+        run_dir = Path(run_dir).resolve()
+        try:
+            return str(run_dir.relative_to(self.results_dir.resolve()))
+        except ValueError:
+            return str(run_dir)
+
+    def _run_dir(self, key: str) -> Path:
+        return self.results_dir / key
+
+    # -- writing -------------------------------------------------------------
+
+    def add_run(
+        self,
+        run_dir: Path,
+        run_data: Dict[str, Any],
+        tool_calls: Sequence[int],
+        tokens: Sequence[int],
+    ):
+        """Insert or replace a run and its progress series."""
+        key = self._key(run_dir)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    run_data.get("model"),
+                    run_data.get("level"),
+                    run_data.get("tools_hash"),
+                    run_data.get("commit_hash"),
+                    run_data.get("status"),
+                    run_data.get("timestamp_start"),
+                    run_data.get("timestamp_end"),
+                    run_data.get("tokens_total"),
+                    run_data.get("tool_calls"),
+                    run_data.get("cost_total"),
+                    json.dumps(run_data),
+                ),
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?)",
+                (key, array("q", tool_calls).tobytes(), array("q", tokens).tobytes()),
+            )
+
+    def sync(self) -> int:
+        """Index runs on disk that are missing (or still `running`). Returns how many."""
+        known = {
+            row["run_dir"]
+            for row in self.conn.execute("SELECT run_dir FROM runs WHERE status != 'running'")
+        }
+        added = 0
+        for run_json in sorted(self.results_dir.rglob("run.json")):
+            run_dir = run_json.parent
+            if self._key(run_dir) in known:
+                continue
+            try:
+                run_data = json.loads(run_json.read_text())
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"Warning: skipping {run_json}: {e}")
+                continue
+            self.add_run(run_dir, run_data, *trace_series(run_dir))
+            added += 1
+        return added
+
+    def remove_missing(self) -> int:
+        """Drop runs whose directory no longer exists. Returns how many."""
+        missing = [
+            (row["run_dir"],)
+            for row in self.conn.execute("SELECT run_dir FROM runs")
+            if not (self._run_dir(row["run_dir"]) / "run.json").exists()
+        ]
+        with self.conn:
+            self.conn.executemany("DELETE FROM runs WHERE run_dir = ?", missing)
+        return len(missing)
+
+    # -- reading -------------------------------------------------------------
+
+    def query(
+        self,
+        model: Optional[str] = None,
+        level: Optional[str] = None,
+        tools_hash: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """run.json dicts (plus `_run_dir`) matching the filters, oldest first.
+
+        `model` matches a substring; `level` accepts "3" or "level_3"; `since`
+        and `until` are ISO dates or timestamps compared against the start
+        time (`until` is inclusive of the whole day for a plain date).
+        """
+        clauses = []
+        params: List[Any] = []
+        if model:
+            clauses.append("model LIKE ?")
+            params.append(f"%{model}%")
+        if level:
+            clauses.append("level = ?")
+            params.append(level if level.startswith("level_") else f"level_{level}")
+        if tools_hash:
+            clauses.append("(tools_hash LIKE ? OR commit_hash LIKE ?)")
+            params += [f"{tools_hash}%", f"{tools_hash}%"]
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if since:
+            clauses.append("timestamp_start >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp_start <= ?")
+            # "2026-03-01T99" sorts after every timestamp of that day
+            params.append(until + "T99" if len(until) == 10 else until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        runs = []
+        for row in self.conn.execute(
+            f"SELECT run_dir, run_json FROM runs {where} ORDER BY timestamp_start", params
+        ):
+            run = json.loads(row["run_json"])
+            run["_run_dir"] = str(self._run_dir(row["run_dir"]))
+            runs.append(run)
+        return runs
+
+    def series(self, run_dir: Path) -> Optional[Tuple[List[int], List[int]]]:
+        """Stored (tool calls, cumulative tokens) series of a run."""
+        row = self.conn.execute(
+            "SELECT tool_calls, tokens FROM series WHERE run_dir = ?", (self._key(run_dir),)
+        ).fetchone()
+        if row is None:
+            return None
+        return array("q", row["tool_calls"]).tolist(), array("q", row["tokens"]).tolist()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the results index")
+    parser.add_argument("--model", help="Substring of the model name")
+    parser.add_argument("--level", help="Level number")
+    parser.add_argument("--tools-hash", help="Prefix of the tools or commit hash")
+    parser.add_argument("--status", help="won, not_won, timeout, error or running")
+    parser.add_argument("--since", help="Start date (YYYY-MM-DD or ISO timestamp)")
+    parser.add_argument("--until", help="End date (YYYY-MM-DD or ISO timestamp)")
+    parser.add_argument("--sync", action="store_true", help="Index runs on disk that are missing first")
+    parser.add_argument("--prune", action="store_true", help="Drop runs whose directory was deleted")
+    parser.add_argument("--json", action="store_true", help="Print run.json dicts as JSON lines")
+    args = parser.parse_args()
+
+    with ResultsIndex() as index:
+        if args.sync:
+            print(f"Indexed {index.sync()} new runs")
+        if args.prune:
+            print(f"Removed {index.remove_missing()} deleted runs")
+        runs = index.query(
+            model=args.model,
+            level=args.level,
+            tools_hash=args.tools_hash,
+            status=args.status,
+            since=args.since,
+            until=args.until,
+        )
+
+    for run in runs:
+        if args.json:
+            print(json.dumps(run))
+        else:
+            print(
+                f"{run.get('timestamp_start', '-')[:19]}  {run.get('model', '-')}  "
+                f"{run.get('level', '-')}  {run.get('status', '-')}  "
+                f"{run.get('commit_hash') or run.get('tools_hash', '-')}  "
+                f"{run.get('tokens_total', 0):,} tokens  {run.get('tool_calls', 0)} tools  "
+                f"{run['_run_dir']}"
+            )
+    if not args.json:
+        print(f"{len(runs)} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Full-grammar rule parsing with property indexes over the current state.
+
+automation.sim.rules (and rulesFromRow in the TS tools) only read
+`NOUN IS NOUN|PROPERTY`. This reads whole sentences from the text tiles of a
+StateTable, left-to-right and top-to-bottom:
+
+    [NOT] [LONELY] [NOT] noun {AND [NOT] noun}
+        {ON|NEAR|FACING [NOT] noun {AND [NOT] noun}}
+        IS|HAS|MAKE [NOT] target {AND [NOT] target} {AND IS|HAS|MAKE ...}
+
+Text tiles stacked on one cell are all read (every combination, as in
+automation.sim.rules); units that are not text never take part. A sentence
+read from inside a longer one on the same line (`BABA IS YOU` in
+`NOT BABA IS YOU`) is dropped, sentences that only overlap are both kept.
+
+Rules without conditions are folded into hash indexes, entity ->
+properties and property -> entities, so "is wall STOP" is one lookup. `NOT`
+subjects and `ALL` cover the object entities of the level (never text),
+`X IS NOT P` cancels P for X, and `X IS X` protects X from transforms.
+Conditional rules depend on each unit's surroundings and are only listed.
+
+RuleIndex.update re-parses only when a text tile moved, appeared or went
+away; when only the set of objects changed it re-folds the parsed rules.
+
+Usage:
+    index = RuleIndex(StateTable.from_world_data(STATE_PATH))
+    index.has_property("wall", "stop")   # True
+    index.entities_with("you")           # frozenset({"baba"})
+    index.update(table)                  # False: no text tile moved
+
+    python -m automation.rule_index [world_data.txt] [--query wall stop]
+"""
+
+import argparse
+import itertools
+import sys
+from pathlib import Path
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from automation.config import STATE_PATH
+from automation.sim.rules import PROPERTIES, TEXT_NOUN, is_noun
+from automation.state_codec import TEXT_PREFIX, VOCABULARY, StateTable
+
+# Words joining a subject to its targets
+VERBS = frozenset({"is", "has", "make"})
+
+# Conditions between the subject and the verb, each taking nouns
+CONDITIONS = frozenset({"on", "near", "facing"})
+
+# Conditions written before the subject, taking nothing
+PREFIXES = frozenset({"lonely"})
+
+# Subject covering every object entity
+ALL_NOUN = "all"
+
+Line = Tuple[Tuple[str, ...], ...]  # words on each consecutive text cell
+
+
+class Condition(NamedTuple):
+    kind: str  # "on", "near", "facing" or "lonely"
+    noun: Optional[str]  # None for prefixes
+    negated: bool = False  # NOT ON ROCK: on no rock
+    noun_negated: bool = False  # ON NOT ROCK: on something other than rock
+
+    def __str__(self) -> str:
+        words = ["not"] if self.negated else []
+        words.append(self.kind)
+        if self.noun is not None:
+            words += (["not"] if self.noun_negated else []) + [self.noun]
+        return " ".join(words)
+
+
+class Sentence(NamedTuple):
+    """One rule: a subject, a verb and a target, with their negations."""
+
+    subject: str
+    verb: str  # "is", "has" or "make"
+    target: str
+    negated: bool = False  # X IS NOT Y
+    subject_negated: bool = False  # NOT X IS Y
+    conditions: Tuple[Condition, ...] = ()
+
+    def __str__(self) -> str:
+        prefixes = [str(c) for c in self.conditions if c.noun is None]
+        infixes = [str(c) for c in self.conditions if c.noun is not None]
+        words = prefixes + (["not"] if self.subject_negated else []) + [self.subject]
+        if infixes:
+            words.append(" and ".join(infixes))
+        words += [self.verb] + (["not"] if self.negated else []) + [self.target]
+        return " ".join(words)
+
+    @property
+    def is_property(self) -> bool:
+        return self.verb == "is" and self.target in PROPERTIES
+
+    @property
+    def is_transform(self) -> bool:
+        return self.verb == "is" and self.target not in PROPERTIES
+
+
+def _is_subject(word: str) -> bool:
+    return is_noun(word) and word not in PREFIXES
+
+
+def _nots(words: Tuple[str, ...], i: int) -> Tuple[bool, int]:
+    """Skip the NOTs at `i`: (odd number of them, index after them)."""
+    negated = False
+    while i < len(words) and words[i] == "not":
+        negated = not negated
+        i += 1
+    return negated, i
+
+
+def _parse(words: Tuple[str, ...], start: int) -> Optional[Tuple[int, List[Sentence]]]:
+    """The sentence starting at `words[start]`: (end, rules), None if there is none."""
+    n = len(words)
+    conditions: List[Condition] = []
+    negated, i = _nots(words, start)
+    if i < n and words[i] in PREFIXES:
+        conditions.append(Condition(words[i], None, negated))
+        negated, i = _nots(words, i + 1)
+
+    subjects: List[Tuple[str, bool]] = []
+    while True:
+        if i >= n or not _is_subject(words[i]):
+            return None
+        subjects.append((words[i], negated))
+        i += 1
+        if i < n and words[i] == "and":
+            negated, i = _nots(words, i + 1)
+            continue
+        break
+
+    while True:
+        negated, j = _nots(words, i)
+        if j >= n or words[j] not in CONDITIONS:
+            break
+        kind = words[j]
+        i = j + 1
+        while True:
+            noun_negated, k = _nots(words, i)
+            if k >= n or not _is_subject(words[k]):
+                return None
+            conditions.append(Condition(kind, words[k], negated, noun_negated))
+            i = k + 1
+            if i < n and words[i] == "and":
+                i += 1
+                _, k = _nots(words, i)
+                if k < n and words[k] in CONDITIONS:
+                    break  # AND before the next condition
+                continue
+            break
+
+    if i >= n or words[i] not in VERBS:
+        return None
+    targets: List[Tuple[str, str, bool]] = []
+    verb = words[i]
+    end = i = i + 1  # moved past each target that parses
+    while True:
+        negated, j = _nots(words, i)
+        if j >= n or not (_is_subject(words[j]) or (verb == "is" and words[j] in PROPERTIES)):
+            break
+        targets.append((verb, words[j], negated))
+        end = i = j + 1
+        if i + 1 < n and words[i] == "and":
+            i += 1
+            if words[i] in VERBS:
+                verb = words[i]
+                i += 1
+            continue
+        break
+    if not targets:
+        return None
+
+    rules = [
+        Sentence(subject, verb, target, negated, subject_negated, tuple(conditions))
+        for subject, subject_negated in subjects
+        for verb, target, negated in targets
+    ]
+    return end, rules
+
+
+def parse_line(line: Line) -> List[Sentence]:
+    """Rules on one line of consecutive text cells, in reading order."""
+    rules: List[Sentence] = []
+    for words in itertools.product(*line):
+        spans = []
+        for start in range(len(words)):
+            parsed = _parse(words, start)
+            if parsed is not None:
+                spans.append((start, parsed[0], parsed[1]))
+        for start, end, found in spans:
+            inside = any(
+                s <= start and end <= e and (s, e) != (start, end) for s, e, _ in spans
+            )
+            if not inside:
+                rules += [rule for rule in found if rule not in rules]
+    return rules
+
+
+def text_lines(tiles: Dict[Tuple[int, int], List[str]]) -> List[Line]:
+    """Runs of adjacent text cells, rows first, then columns."""
+    lines: List[Line] = []
+    for dx, dy in ((1, 0), (0, 1)):
+        for (x, y) in sorted(tiles, key=lambda cell: (cell[1], cell[0])):
+            if (x - dx, y - dy) in tiles:
+                continue  # not the start of a run
+            run = []
+            while (x, y) in tiles:
+                run.append(tuple(tiles[x, y]))
+                x, y = x + dx, y + dy
+            if len(run) >= 3:
+                lines.append(tuple(run))
+    return lines
+
+
+def parse_sentences(tiles: Dict[Tuple[int, int], List[str]]) -> List[Sentence]:
+    """All rules spelled by `tiles` ((x, y) -> words), without duplicates."""
+    rules: List[Sentence] = []
+    seen: Set[Sentence] = set()
+    for line in text_lines(tiles):
+        for rule in parse_line(line):
+            if rule not in seen:
+                seen.add(rule)
+                rules.append(rule)
+    return rules
+
+
+class RuleIndex:
+    """Rules of a StateTable with entity -> property hash indexes.
+
+    Entities are unit names as in the state ("wall"); text units all share
+    the entry of the TEXT noun, so "text_flag" and "text" look up the same.
+    """
+
+    def __init__(self, table: Optional[StateTable] = None):
+        self.rules: List[Sentence] = []
+        self.conditional: List[Sentence] = []
+        self.parses = 0  # times the text tiles were re-read
+        self._text_key: Optional[Tuple] = None
+        self._objects: FrozenSet[str] = frozenset()
+        self._props: Dict[str, FrozenSet[str]] = {}
+        self._holders: Dict[str, FrozenSet[str]] = {}
+        self._transforms: Dict[str, FrozenSet[str]] = {}
+        self._has: Dict[str, FrozenSet[str]] = {}
+        self._make: Dict[str, FrozenSet[str]] = {}
+        if table is not None:
+            self.update(table)
+
+    def update(self, table: StateTable) -> bool:
+        """Follow `table`. True if the text tiles changed and were re-read."""
+        tiles: Dict[Tuple[int, int], List[str]] = {}
+        for row in table.text_tiles():
+            tiles.setdefault((table.x[row], table.y[row]), []).append(table.name(row)[len(TEXT_PREFIX):])
+        text_key = tuple(sorted((cell, tuple(sorted(words))) for cell, words in tiles.items()))
+        names, is_text = VOCABULARY.names, VOCABULARY.is_text
+        objects = frozenset(names[e] for e in table.by_entity if not is_text[e])
+
+        parsed = text_key != self._text_key
+        if parsed:
+            self._text_key = text_key
+            self.rules = parse_sentences(tiles)
+            self.conditional = [rule for rule in self.rules if rule.conditions]
+            self.parses += 1
+        if parsed or objects != self._objects:
+            self._objects = objects
+            self._fold()
+        return parsed
+
+    # -- indexes -------------------------------------------------------------
+
+    def _covered(self, rule: Sentence) -> Set[str]:
+        """Index keys a rule's subject applies to."""
+        covered = self._objects if rule.subject == ALL_NOUN else {rule.subject}
+        if rule.subject_negated:
+            return set(self._objects - covered)
+        return set(covered)
+
+    def _fold(self):
+        positive: Dict[str, Dict[str, Set[str]]] = {"props": {}, "is": {}, "has": {}, "make": {}}
+        negative: Dict[str, Dict[str, Set[str]]] = {"props": {}, "is": {}, "has": {}, "make": {}}
+        for rule in self.rules:
+            if rule.conditions:
+                continue
+            kind = "props" if rule.is_property else rule.verb
+            into = negative if rule.negated else positive
+            for entity in self._covered(rule):
+                into[kind].setdefault(entity, set()).add(rule.target)
+
+        def folded(kind: str) -> Dict[str, FrozenSet[str]]:
+            result = {}
+            for entity, targets in positive[kind].items():
+                kept = targets - negative[kind].get(entity, set())
+                if kept:
+                    result[entity] = frozenset(kept)
+            return result
+
+        self._props = folded("props")
+        holders: Dict[str, Set[str]] = {}
+        for entity, props in self._props.items():
+            for prop in props:
+                holders.setdefault(prop, set()).add(entity)
+        self._holders = {prop: frozenset(entities) for prop, entities in holders.items()}
+
+        transforms = folded("is")
+        self._transforms = {
+            entity: targets for entity, targets in transforms.items() if entity not in targets
+        }
+        self._has = folded("has")
+        self._make = folded("make")
+
+    @staticmethod
+    def _key(entity: str) -> str:
+        return TEXT_NOUN if entity.startswith(TEXT_PREFIX) else entity
+
+    # -- queries -------------------------------------------------------------
+
+    def properties(self, entity: str) -> FrozenSet[str]:
+        """Properties `entity` has from unconditional rules."""
+        return self._props.get(self._key(entity), frozenset())
+
+    def entities_with(self, prop: str) -> FrozenSet[str]:
+        """Entities that unconditionally have `prop`."""
+        return self._holders.get(prop, frozenset())
+
+    def has_property(self, entity: str, prop: str) -> bool:
+        return prop in self._props.get(self._key(entity), ())
+
+    def transforms(self, entity: str) -> FrozenSet[str]:
+        """Nouns `entity` turns into (X IS Y), empty when X IS X protects it."""
+        return self._transforms.get(self._key(entity), frozenset())
+
+    def contents(self, entity: str) -> FrozenSet[str]:
+        """Nouns `entity` leaves behind when destroyed (X HAS Y)."""
+        return self._has.get(self._key(entity), frozenset())
+
+    def makes(self, entity: str) -> FrozenSet[str]:
+        """Nouns `entity` creates every turn (X MAKE Y)."""
+        return self._make.get(self._key(entity), frozenset())
+
+    def to_dict(self) -> Dict:
+        return {
+            "rules": [str(rule) for rule in self.rules],
+            "conditional": [str(rule) for rule in self.conditional],
+            "properties": {entity: sorted(props) for entity, props in sorted(self._props.items())},
+            "transforms": {entity: sorted(t) for entity, t in sorted(self._transforms.items())},
+            "has": {entity: sorted(t) for entity, t in sorted(self._has.items())},
+            "make": {entity: sorted(t) for entity, t in sorted(self._make.items())},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rules of the current state, full grammar")
+    parser.add_argument("path", type=Path, nargs="?", default=STATE_PATH, help="world_data.txt")
+    parser.add_argument("--query", nargs=2, metavar=("ENTITY", "PROPERTY"), help="e.g. wall stop")
+    args = parser.parse_args()
+
+    table = StateTable.from_world_data(args.path)
+    if table is None:
+        print(f"No state in {args.path}")
+        sys.exit(1)
+    index = RuleIndex(table)
+    if args.query:
+        entity, prop = args.query
+        holds = index.has_property(entity, prop)
+        print(f"{entity} is {prop}: {'yes' if holds else 'no'}")
+        sys.exit(0 if holds else 1)
+    for rule in index.rules:
+        print(f"{rule}{'  (conditional)' if rule.conditions else ''}")
+    for entity, props in index.to_dict()["properties"].items():
+        print(f"  {entity}: {', '.join(props)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,38 +7,29 @@ Usage:
 """
 
 import argparse
+import asyncio
 import json
 import os
-import select
-import subprocess
+import sqlite3
 import sys
 import time
+from array import array
 from pathlib import Path
 from datetime import datetime
-from automation.config import DEFAULT_TOKEN_BUDGET, STATE_PATH
+from automation.config import (
+    DEFAULT_TOKEN_BUDGET,
+    RUN_CHECKPOINT_INTERVAL,
+    STATE_PATH,
+)
+from automation.results_index import ResultsIndex, progress_series
+from automation.tools_hash import get_commit_hash, get_tools_hash
+from automation.trace_store import TraceWriter
+from automation.win_watcher import WinWatcher
+from automation.world_data import WorldData
 from typing import Dict, Any, Optional
 
-
-def get_tools_hash() -> str:
-    """Get the MD5 hash of the .opencode/tools directory contents."""
-    try:
-        result = subprocess.run(
-            ["tar", "c", ".opencode/tools"],
-            capture_output=True,
-            timeout=5,
-            cwd=Path(__file__).parent.parent,
-        )
-        if result.returncode != 0:
-            return "unknown"
-        md5_result = subprocess.run(
-            ["md5"],
-            input=result.stdout,
-            capture_output=True,
-            timeout=5,
-        )
-        return md5_result.stdout.decode().strip().split()[-1]
-    except (subprocess.TimeoutExpired, subprocess.SubprocessError):
-        return "unknown"
+# Max length of one NDJSON line (tool outputs can contain whole grids)
+STREAM_LIMIT = 64 * 1024 * 1024
 
 
 def sanitize_model_name(model: str) -> str:
@@ -91,50 +82,160 @@ def format_event_console(event: Dict[str, Any]) -> str:
     return f"[{event_type.upper()}]"
 
 
-def check_world_data_won() -> Optional[bool]:
+def check_world_data_won(state_path: Path = STATE_PATH) -> Optional[bool]:
     """Check if the level was won by reading the game's world_data.txt file.
 
     The game writes level_won = true to the [status] section when a level
     is completed. This serves as ground truth independent of tool output parsing.
 
+    Args:
+        state_path: world_data.txt of the game instance to check
+
     Returns:
         True if level_won = true, False if level_won = false,
         None if the file cannot be read or parsed.
     """
+    return WorldData.for_path(state_path).level_won()
+
+
+class TraceMetrics:
+    """Running totals over the opencode NDJSON event stream.
+
+    Updated once per event as lines arrive; apart from two integers per step
+    for the progress series, memory use does not grow with the length of the
+    run.
+    """
+
+    def __init__(self):
+        self.tokens_input = 0
+        self.tokens_output = 0
+        self.cost_total = 0.0
+        self.tool_calls = 0
+        self.steps = 0
+        # "total" of the latest step_finish, used for the token budget
+        self.cumulative_tokens = 0
+        self.first_tool_timestamp: Optional[int] = None
+        self.first_tool_name: Optional[str] = None
+        # Tool calls and tokens so far at each step_finish (results index)
+        self.step_tool_calls = array("q")
+        self.step_tokens = array("q")
+
+    @property
+    def tokens_total(self) -> int:
+        return self.tokens_input + self.tokens_output
+
+    def update(self, event: Dict[str, Any]):
+        """Fold one trace event into the totals."""
+        event_type = event.get("type")
+        if event_type == "step_finish":
+            part = event.get("part", {})
+            tokens = part.get("tokens", {})
+            self.tokens_input += tokens.get("input", 0)
+            self.tokens_output += tokens.get("output", 0)
+            self.cost_total += part.get("cost", 0.0)
+            self.cumulative_tokens = tokens.get("total", 0)
+            self.steps += 1
+            self.step_tool_calls.append(self.tool_calls)
+            self.step_tokens.append(self.tokens_total)
+        elif event_type == "tool_use":
+            self.tool_calls += 1
+            if self.first_tool_timestamp is None:
+                self.first_tool_timestamp = event.get("timestamp", 0)
+                self.first_tool_name = event.get("part", {}).get("tool", "unknown")
+
+
+def determine_status(won: bool, error: Optional[str]) -> str:
+    """Map the outcome of a run to its run.json status."""
+    if won:
+        return "won"
+    elif "Token budget" in str(error):
+        return "token_budget"
+    elif "Timeout" in str(error):
+        return "timeout"
+    elif error:
+        return "error"
+    return "not_won"
+
+
+def write_run_json(results_dir: Path, run_data: Dict[str, Any]):
+    """Atomically (re)write run.json so readers never see a partial file."""
+    tmp_path = results_dir / "run.json.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(run_data, f, indent=2)
+    os.replace(tmp_path, results_dir / "run.json")
+
+
+def index_run(results_dir: Path, run_data: Dict[str, Any], metrics: TraceMetrics):
+    """Add a finished run to the results index used by the report."""
     try:
-        content = STATE_PATH.read_text()
-        in_status = False
-        for line in content.splitlines():
-            stripped = line.strip()
-            if stripped == "[status]":
-                in_status = True
-                continue
-            if stripped.startswith("[") and stripped.endswith("]"):
-                in_status = False
-                continue
-            if in_status and "=" in stripped:
-                key, _, value = stripped.partition("=")
-                if key.strip() == "level_won":
-                    return value.strip().lower() == "true"
-        return None
-    except (OSError, FileNotFoundError):
-        return None
+        with ResultsIndex() as index:
+            index.add_run(
+                results_dir,
+                run_data,
+                *progress_series(metrics.step_tool_calls, metrics.step_tokens, metrics.tool_calls),
+            )
+    except sqlite3.Error as e:
+        # The index can be rebuilt from run.json; never fail a run over it
+        print(f"Warning: could not update the results index: {e}")
 
 
 def run_solver(
-    level: str, model: str, timeout: int, token_budget: int = DEFAULT_TOKEN_BUDGET
+    level: str,
+    model: str,
+    timeout: int,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    state_path: Path = STATE_PATH,
+    env: Optional[Dict[str, str]] = None,
+    console_prefix: str = "",
 ) -> Dict[str, Any]:
     """Run the solver with timeout and capture results.
 
+    Blocking wrapper around run_solver_async with its own event loop.
+
     Args:
         level: Level number to solve
         model: Model to use (provider/model format)
         timeout: Timeout in seconds
         token_budget: Max cumulative tokens before killing the solver
+        state_path: world_data.txt of the game instance being played
+        env: Extra environment variables for the opencode process
+        console_prefix: Prefix for console lines (tells parallel runs apart)
 
     Returns:
         Dictionary with run results and metadata
     """
+    return asyncio.run(
+        run_solver_async(
+            level,
+            model,
+            timeout,
+            token_budget,
+            state_path=state_path,
+            env=env,
+            console_prefix=console_prefix,
+        )
+    )
+
+
+async def run_solver_async(
+    level: str,
+    model: str,
+    timeout: int,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    state_path: Path = STATE_PATH,
+    env: Optional[Dict[str, str]] = None,
+    console_prefix: str = "",
+) -> Dict[str, Any]:
+    """Run the solver under an asyncio supervisor and capture results.
+
+    Stream reading, the wall-clock timeout, the win watcher and run.json
+    checkpoints run as concurrent tasks. Whichever stop condition fires first
+    kills the process right away; the reader then drains what was already
+    written. Several solvers can be supervised by one event loop, e.g. with
+    asyncio.gather(run_solver_async(...), run_solver_async(...)).
+
+    Args and return value are the same as for run_solver.
+    """
     tools_hash = get_tools_hash()
     model_sanitized = sanitize_model_name(model)
     timestamp = datetime.utcnow().strftime("%Y-%m-%d_%H-%M-%S")
@@ -162,157 +263,193 @@ def run_solver(
         "json",
     ]
 
+    run_data = {
+        "level": f"level_{level}",
+        "model": model,
+        "model_sanitized": model_sanitized,
+        "tools_hash": tools_hash,
+        "commit_hash": get_commit_hash(),
+        "timestamp_start": timestamp_start,
+        "timestamp_end": None,
+        "timeout_seconds": timeout,
+        "token_budget": token_budget,
+        "status": "running",
+        "cost_total": 0.0,
+        "tokens_total": 0,
+        "tokens_input": 0,
+        "tokens_output": 0,
+        "tool_calls": 0,
+        "error": None,
+        "time_to_win_seconds": None,
+        "tokens_after_win": None,
+    }
+
+    def checkpoint():
+        run_data.update(
+            cost_total=metrics.cost_total,
+            tokens_total=metrics.tokens_total,
+            tokens_input=metrics.tokens_input,
+            tokens_output=metrics.tokens_output,
+            tool_calls=metrics.tool_calls,
+        )
+        write_run_json(results_dir, run_data)
+
     # Run solver
-    trace_events = []
+    metrics = TraceMetrics()
     won = False
     error = None
-    cumulative_tokens = 0
-
-    trace_path = results_dir / "trace.jsonl"
-    trace_file = open(trace_path, "w")
+    # Kept apart from `error` so an earlier tool error never disables the budget
+    budget_error = None
+    start_time = None
+    win_time = None
+    # Tokens already counted when the win was detected; anything streamed
+    # after that was spent on a level that was already solved.
+    tokens_at_win = None
+    checkpoint()
+
+    loop = asyncio.get_running_loop()
+    win_detected = asyncio.Event()
+
+    def record_win():
+        nonlocal won, tokens_at_win, win_time
+        if tokens_at_win is None:
+            won = True
+            tokens_at_win = metrics.tokens_total
+            win_time = time.time()
+            win_detected.set()
+
+    watcher = WinWatcher(
+        state_path, lambda: loop.call_soon_threadsafe(record_win)
+    )
 
-    try:
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            cwd=Path(__file__).parent.parent,
-            env={**os.environ, "PYTHONUNBUFFERED": "1"},
-        )
+    trace_writer = TraceWriter(results_dir)
+    process = None
 
-        start_time = time.time()
+    def kill():
+        if process is not None and process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
 
+    async def read_events():
+        nonlocal error, budget_error
+        assert process.stdout is not None
         while True:
-            if timeout and (time.time() - start_time) > timeout:
-                process.kill()
-                error = f"Timeout after {timeout} seconds"
-                won = False
+            try:
+                raw = await process.stdout.readline()
+            except ValueError:
+                # Line longer than the stream limit; skip it
+                continue
+            if not raw:
                 break
+            line = raw.decode("utf-8", errors="replace")
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            metrics.update(event)
+            trace_writer.write_event(event)
 
-            if token_budget and cumulative_tokens > token_budget:
-                process.kill()
-                error = (
-                    f"Token budget exceeded: {cumulative_tokens:,} / {token_budget:,}"
-                )
-                won = False
-                break
+            # Output drained after a kill is recorded but not acted upon
+            if process.returncode is not None or won:
+                continue
 
-            if process.stdout is None:
-                break
+            console_output = format_event_console(event)
+            print(f"{console_prefix}{console_output}", flush=True)
+
+            if event.get("type") == "error":
+                error_msg = event.get("error", {}).get("data", {}).get(
+                    "message"
+                ) or event.get("part", {}).get("text", "")
+                if error_msg:
+                    error = error_msg
+
+            if (
+                token_budget
+                and budget_error is None
+                and metrics.cumulative_tokens > token_budget
+            ):
+                budget_error = f"Token budget exceeded: {metrics.cumulative_tokens:,} / {token_budget:,}"
+                kill()
+
+            if event.get("type") == "tool_use":
+                tool_status = event.get("part", {}).get("state", {}).get("status", "")
+                if tool_status == "completed" and check_world_data_won(state_path):
+                    print(
+                        f"{console_prefix}[WIN] Level won detected via world_data",
+                        flush=True,
+                    )
+                    record_win()
+
+    async def enforce_timeout():
+        nonlocal error
+        await asyncio.sleep(timeout)
+        if not won:
+            error = f"Timeout after {timeout} seconds"
+            kill()
+
+    async def watch_win():
+        await win_detected.wait()
+        kill()
+        print(f"{console_prefix}[WIN] Level won, solver stopped", flush=True)
+
+    async def checkpoints():
+        while True:
+            await asyncio.sleep(RUN_CHECKPOINT_INTERVAL)
+            # Periodic partial run.json so killed runs keep usable numbers
+            checkpoint()
 
-            ready, _, _ = select.select([process.stdout], [], [], 1.0)
-
-            if ready:
-                line = process.stdout.readline()
-                if not line:
-                    break
-
-                if line.strip():
-                    try:
-                        event = json.loads(line)
-                        trace_events.append(event)
-                        trace_file.write(line)
-                        trace_file.flush()
-
-                        if event.get("type") == "step_finish":
-                            cumulative_tokens = (
-                                event.get("part", {}).get("tokens", {}).get("total", 0)
-                            )
-
-                        console_output = format_event_console(event)
-                        print(console_output, flush=True)
-
-                        if event.get("type") == "error":
-                            error_msg = event.get("error", {}).get("data", {}).get(
-                                "message"
-                            ) or event.get("part", {}).get("text", "")
-                            if error_msg:
-                                error = error_msg
-
-                        if event.get("type") == "tool_use":
-                            tool_name = event.get("part", {}).get("tool", "")
-                            tool_status = (
-                                event.get("part", {}).get("state", {}).get("status", "")
-                            )
-                            if tool_status == "completed" and check_world_data_won():
-                                won = True
-                                print(
-                                    "[WIN] Level won detected via world_data",
-                                    flush=True,
-                                )
-                                process.kill()
-                                break
-                    except json.JSONDecodeError:
-                        pass
-
-            if process.poll() is not None:
-                break
+    helpers = []
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            cwd=Path(__file__).parent.parent,
+            env={**os.environ, **(env or {}), "PYTHONUNBUFFERED": "1"},
+            limit=STREAM_LIMIT,
+        )
+        start_time = time.time()
+        watcher.start()
+
+        helpers = [asyncio.create_task(watch_win()), asyncio.create_task(checkpoints())]
+        if timeout:
+            helpers.append(asyncio.create_task(enforce_timeout()))
 
-    except subprocess.TimeoutExpired:
-        error = f"Timeout after {timeout} seconds"
-        won = False
+        # The reader ends at EOF, i.e. once the process exited or was killed
+        await read_events()
+        await process.wait()
     except Exception as e:
         error = str(e)
-        won = False
+        kill()
     finally:
-        trace_file.close()
+        for task in helpers:
+            task.cancel()
+        await asyncio.gather(*helpers, return_exceptions=True)
+        watcher.stop()
+        trace_writer.close()
+
+    if budget_error is not None:
+        error = budget_error if error is None else f"{budget_error}; {error}"
 
     timestamp_end = datetime.utcnow().isoformat() + "Z"
 
     # Final win check in case process exited before we polled
-    if not won and check_world_data_won():
+    if not won and check_world_data_won(state_path):
         won = True
 
-    # Extract metrics from trace
-    tokens_input = 0
-    tokens_output = 0
-    cost_total = 0.0
-    tool_calls = 0
-
-    for event in trace_events:
-        if event.get("type") == "step_finish":
-            part = event.get("part", {})
-            tokens = part.get("tokens", {})
-            tokens_input += tokens.get("input", 0)
-            tokens_output += tokens.get("output", 0)
-            cost_total += part.get("cost", 0.0)
-        elif event.get("type") == "tool_use":
-            tool_calls += 1
-
-    # Determine status
-    if won:
-        status = "won"
-    elif "Token budget" in str(error):
-        status = "token_budget"
-    elif "Timeout" in str(error):
-        status = "timeout"
-    elif error:
-        status = "error"
-    else:
-        status = "not_won"
+    status = determine_status(won, error)
 
     # Write run.json
-    run_data = {
-        "level": f"level_{level}",
-        "model": model,
-        "model_sanitized": model_sanitized,
-        "tools_hash": tools_hash,
-        "timestamp_start": timestamp_start,
-        "timestamp_end": timestamp_end,
-        "timeout_seconds": timeout,
-        "token_budget": token_budget,
-        "status": status,
-        "cost_total": cost_total,
-        "tokens_total": tokens_input + tokens_output,
-        "tokens_input": tokens_input,
-        "tokens_output": tokens_output,
-        "tool_calls": tool_calls,
-        "error": error,
-    }
-
-    with open(results_dir / "run.json", "w") as f:
-        json.dump(run_data, f, indent=2)
+    run_data.update(timestamp_end=timestamp_end, status=status, error=error)
+    if won and tokens_at_win is not None and start_time is not None:
+        run_data["time_to_win_seconds"] = round(win_time - start_time, 3)
+        run_data["tokens_after_win"] = metrics.tokens_total - tokens_at_win
+    checkpoint()
+    index_run(results_dir, run_data, metrics)
 
     # Write summary.md
     duration_seconds = (
@@ -324,9 +461,9 @@ def run_solver(
 
 **Status**: {"Won" if won else "Not Won"}
 **Duration**: {duration_seconds:.0f}s
-**Cost**: ${cost_total:.2f}
-**Tokens**: {tokens_input + tokens_output:,} (input: {tokens_input:,}, output: {tokens_output:,})
-**Tool Calls**: {tool_calls}
+**Cost**: ${metrics.cost_total:.2f}
+**Tokens**: {metrics.tokens_total:,} (input: {metrics.tokens_input:,}, output: {metrics.tokens_output:,})
+**Tool Calls**: {metrics.tool_calls}
 **Tools Hash**: {tools_hash}
 
 ## Timeline
@@ -334,15 +471,9 @@ def run_solver(
 - {timestamp_start} - Started
 """
 
-    if trace_events:
-        first_tool = next(
-            (e for e in trace_events if e.get("type") == "tool_use"), None
-        )
-        if first_tool:
-            first_tool_time = datetime.fromtimestamp(
-                first_tool.get("timestamp", 0) / 1000
-            )
-            summary += f"- {first_tool_time.strftime('%H:%M:%S')} - First tool call: {first_tool.get('part', {}).get('tool', 'unknown')}\n"
+    if metrics.first_tool_timestamp is not None:
+        first_tool_time = datetime.fromtimestamp(metrics.first_tool_timestamp / 1000)
+        summary += f"- {first_tool_time.strftime('%H:%M:%S')} - First tool call: {metrics.first_tool_name}\n"
 
     summary += f"- {timestamp_end} - Completed\n"
 
@@ -382,14 +513,31 @@ def main():
         default=DEFAULT_TOKEN_BUDGET,
         help=f"Max cumulative tokens before killing solver (default: {DEFAULT_TOKEN_BUDGET})",
     )
+    parser.add_argument(
+        "--sim-dir",
+        type=Path,
+        help="Play against a headless simulator serving this directory "
+        "(python -m automation.sim) instead of the game",
+    )
 
     args = parser.parse_args()
 
+    sim_kwargs = {}
+    if args.sim_dir:
+        sim_kwargs = {
+            "state_path": args.sim_dir / "world_data.txt",
+            "env": {
+                "BABA_STATE_PATH": str(args.sim_dir / "world_data.txt"),
+                "BABA_COMMANDS_DIR": str(args.sim_dir / "commands"),
+            },
+        }
+
     result = run_solver(
         level=args.level,
         model=args.model,
         timeout=args.timeout,
         token_budget=args.token_budget,
+        **sim_kwargs,
     )
 
     print(f"Solver completed: {result['status']}")
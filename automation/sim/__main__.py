@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Run the headless simulator.
+
+Usage:
+    # Serve a level to the tools / run_solver through the file protocol
+    python -m automation.sim .opencode/tests/fixtures/raw_state.json
+
+    # Play a move sequence and print the result
+    python -m automation.sim level.json --play right,right,up
+"""
+
+import argparse
+import shutil
+import sys
+from pathlib import Path
+
+from automation.config import SIM_DATA_DIR
+from automation.sim.backend import POLL_INTERVAL, SimBackend
+from automation.sim.engine import Game
+from automation.sim.levels import load_level
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Headless Baba Is You simulator speaking the mod's file protocol"
+    )
+    parser.add_argument(
+        "level", help="Level file: grid JSON or a world_data.txt captured from the game"
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=SIM_DATA_DIR,
+        help=f"Directory for world_data.txt and commands/ (default: {SIM_DATA_DIR})",
+    )
+    parser.add_argument(
+        "--play",
+        help="Comma-separated commands to apply instead of serving, e.g. right,right,undo",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=POLL_INTERVAL,
+        help=f"Seconds between command file checks (default: {POLL_INTERVAL})",
+    )
+    parser.add_argument(
+        "--timeout", type=float, help="Stop serving after this many seconds"
+    )
+
+    args = parser.parse_args()
+
+    game = Game(load_level(args.level))
+
+    if args.play:
+        for command in (c.strip() for c in args.play.split(",")):
+            if command:
+                game.apply(command)
+        print("Rules: " + ", ".join(str(rule) for rule in game.rules))
+        print(f"Turns: {game.turns}")
+        print(f"Won: {game.won}")
+        sys.exit(0 if game.won else 1)
+
+    backend = SimBackend(game, args.data_dir, poll_interval=args.poll_interval)
+    # Start from an empty command queue, like a freshly started game
+    shutil.rmtree(backend.commands_dir, ignore_errors=True)
+
+    print(f"Serving {args.level} from {backend.data_dir}")
+    for key, value in backend.tool_env().items():
+        print(f"  export {key}={value}")
+    try:
+        backend.serve_forever(timeout=args.timeout)
+    except KeyboardInterrupt:
+        pass
+    print(f"Stopped after {backend.last_command_key} command files (won: {game.won})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+File-protocol backend that stands in for the game.
+
+Speaks the same protocol as lua/io.lua: command files `commands/0.lua`,
+`commands/1.lua`, ... are consumed in order, and after each one the whole
+level is written to world_data.txt with the same sections and keys the mod
+stores ([state] state/room_size, [file] last_processed, [status] level_won),
+then the `ack` file is updated. The TS tools and run_solver can therefore be
+pointed at it through BABA_STATE_PATH / BABA_COMMANDS_DIR without any change.
+
+Usage:
+    backend = SimBackend(Game(level), data_dir)
+    backend.serve_forever()
+"""
+
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from automation.command_bridge import ack_path_for
+from automation.sim.engine import Game
+
+POLL_INTERVAL = 0.02  # seconds between checks for the next command file
+
+# command("right",1) / undo() as written by the tools
+_CALL = re.compile(r'command\(\s*"([a-z_]+)"\s*(?:,\s*\d+\s*)?\)|(undo)\(\s*\)')
+
+
+def parse_command_file(text: str) -> List[str]:
+    """Commands of a command file, in order ("undo" for undo())."""
+    return [match.group(1) or match.group(2) for match in _CALL.finditer(text)]
+
+
+class SimBackend:
+    """Serves one simulated level through world_data.txt and commands/."""
+
+    def __init__(
+        self,
+        game: Game,
+        data_dir: Path,
+        poll_interval: float = POLL_INTERVAL,
+    ):
+        self.game = game
+        self.data_dir = Path(data_dir)
+        self.state_path = self.data_dir / "world_data.txt"
+        self.commands_dir = self.data_dir / "commands"
+        self.ack_path = ack_path_for(self.commands_dir)
+        self.poll_interval = poll_interval
+        self.last_command_key = 0
+        self.last_processed = 0
+        self._stop = threading.Event()
+
+    def tool_env(self) -> Dict[str, str]:
+        """Environment pointing the TS tools at this backend."""
+        return {
+            "BABA_STATE_PATH": str(self.state_path),
+            "BABA_COMMANDS_DIR": str(self.commands_dir),
+        }
+
+    def start_level(self):
+        """Write the initial state, like the mod's level_start hook."""
+        self.commands_dir.mkdir(parents=True, exist_ok=True)
+        self.ack_path.unlink(missing_ok=True)
+        self.last_processed = 0
+        self.write_world_data()
+
+    def write_world_data(self):
+        """Atomically replace world_data.txt with the current state."""
+        level = self.game.to_level_state()
+        content = (
+            "[state]\n"
+            f"state={level.to_state_string()}\n"
+            f"room_size={level.room_size}\n"
+            "[file]\n"
+            f"last_processed={self.last_processed}\n"
+            "[status]\n"
+            f"level_won={'true' if self.game.won else 'false'}\n"
+        )
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp_path.write_text(content, encoding="utf-8")
+        os.replace(tmp_path, self.state_path)
+
+    def write_ack(self):
+        """Acknowledge the last executed command file, like io.lua."""
+        tmp_path = self.ack_path.with_name(self.ack_path.name + ".tmp")
+        tmp_path.write_text(f"{self.last_processed}\n")
+        os.replace(tmp_path, self.ack_path)
+
+    def poll_once(self) -> bool:
+        """Execute the next command file if it exists. Returns True if one ran."""
+        command_file = self.commands_dir / f"{self.last_command_key}.lua"
+        try:
+            text = command_file.read_text(encoding="utf-8")
+        except (FileNotFoundError, UnicodeDecodeError):
+            return False
+        # The tools write files non-atomically and always end them with a
+        # newline; a file without one is still being written
+        if not text.endswith("\n"):
+            return False
+
+        for command in parse_command_file(text):
+            try:
+                self.game.apply(command)
+            except ValueError:
+                # The game silently ignores unknown commands as well
+                pass
+        self.last_processed = self.last_command_key
+        self.last_command_key += 1
+        self.write_world_data()
+        self.write_ack()
+        return True
+
+    def serve_forever(self, timeout: Optional[float] = None):
+        """Process command files until stop() is called (or `timeout` passes)."""
+        self.start_level()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._stop.is_set():
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if not self.poll_once():
+                self._stop.wait(self.poll_interval)
+
+    def stop(self):
+        self._stop.set()
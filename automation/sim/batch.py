@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Vectorized batch simulator: advances B copies of a level in lockstep.
+
+Each state is a stack of boolean layers (entity × H × W), bit-packed along the
+entity axis, and every phase of a turn (rule parsing, YOU movement with push chains, transforms, destruction,
+win) is expressed as array operations over the whole batch, so thousands of
+rollouts cost about as much as a handful of interpreted ones.
+
+The layer representation trades some fidelity for speed compared to
+automation.sim.engine: units have no identity or facing direction, two units
+of the same kind on one cell merge, a noun with several transforms takes
+the first target in vocabulary order, and transforms into or out of TEXT
+(`X IS TEXT`, `TEXT IS X`) are ignored. Levels whose text can spell those
+are flagged by `BatchLevel.text_transforms`; run them with the object engine.
+Use the object engine to replay and verify anything found here.
+
+Uses NumPy. Install with:
+    uv sync --extra sim
+
+Usage:
+    sim = BatchSim(level, batch_size=4096)
+    sim.step(actions)          # int array (B,), see ACTIONS
+    sim.won, sim.lost          # (B,) masks
+    sim.layers                 # (B, E, H, W) boolean entity layers
+
+    python -m automation.sim.batch level.json --rollouts 10000 --horizon 40
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from automation.sim.rules import TEXT_NOUN, is_noun
+from automation.sim.state import LevelState, is_text
+
+# Action codes; the order matches the game's direction values
+ACTIONS = ("right", "up", "left", "down", "idle")
+IDLE = ACTIONS.index("idle")
+
+# Properties the batch engine gives behaviour to
+PROPS = ("you", "win", "stop", "push", "defeat", "sink", "hot", "melt")
+YOU, WIN, STOP, PUSH, DEFEAT, SINK, HOT, MELT = range(len(PROPS))
+
+# Entity kinds are bit-packed into one uint64 per cell
+MAX_ENTITIES = 64
+
+
+def _to_right(a: np.ndarray, direction: int) -> np.ndarray:
+    """Re-orient the two last axes so that `direction` points along +x."""
+    if direction == 0:
+        return a
+    if direction == 2:
+        return a[..., ::-1]
+    if direction == 3:
+        return np.swapaxes(a, -1, -2)
+    return np.swapaxes(a, -1, -2)[..., ::-1]
+
+
+def _from_right(a: np.ndarray, direction: int) -> np.ndarray:
+    """Inverse of _to_right."""
+    if direction == 0:
+        return a
+    if direction == 2:
+        return a[..., ::-1]
+    if direction == 3:
+        return np.swapaxes(a, -1, -2)
+    return np.swapaxes(a[..., ::-1], -1, -2)
+
+
+class BatchLevel:
+    """Entity vocabulary, rule tables and initial layers of one level."""
+
+    def __init__(self, level: LevelState):
+        self.width = level.width
+        self.height = level.height
+
+        names = {unit.name for unit in level.units}
+        words = {name[len("text_"):] for name in names if is_text(name)}
+        nouns = {name for name in names if not is_text(name)}
+        nouns |= {word for word in words if is_noun(word)}
+        nouns.add(TEXT_NOUN)
+        self.nouns: List[str] = sorted(nouns)
+        # Transform targets need a layer even if no such object exists yet
+        self.entities: List[str] = sorted(
+            names | {noun for noun in nouns if noun != TEXT_NOUN}
+        )
+        if len(self.entities) > MAX_ENTITIES:
+            raise ValueError(
+                f"Level has {len(self.entities)} entity kinds, at most {MAX_ENTITIES} are supported"
+            )
+        self.entity_index: Dict[str, int] = {e: i for i, e in enumerate(self.entities)}
+        self.bits = np.left_shift(np.uint64(1), np.arange(len(self.entities), dtype=np.uint64))
+        # Rule targets: behavioural properties first, then nouns
+        self.targets: List[str] = list(PROPS) + self.nouns
+
+        E, N = len(self.entities), len(self.nouns)
+        noun_index = {noun: i for i, noun in enumerate(self.nouns)}
+        # entity -> noun it answers to (text answers to "text")
+        self.entity_noun = np.zeros(E, dtype=np.intp)
+        self.text_mask = np.uint64(0)
+        for i, entity in enumerate(self.entities):
+            if is_text(entity):
+                self.text_mask |= self.bits[i]
+                self.entity_noun[i] = noun_index[TEXT_NOUN]
+            else:
+                self.entity_noun[i] = noun_index[entity]
+        # Bits of the entities each noun refers to
+        self.noun_mask = np.zeros(N, dtype=np.uint64)
+        for i, noun in enumerate(self.entity_noun):
+            self.noun_mask[noun] |= self.bits[i]
+
+        # Bit of the text spelling each noun / target (0 = not in the level)
+        def text_bit(word: str) -> np.uint64:
+            index = self.entity_index.get(f"text_{word}")
+            return self.bits[index] if index is not None else np.uint64(0)
+
+        self.noun_text = np.array([text_bit(n) for n in self.nouns], dtype=np.uint64)
+        self.target_text = np.array([text_bit(t) for t in self.targets], dtype=np.uint64)
+        self.is_bit = text_bit("is")
+
+        # X IS TEXT / TEXT IS X have no layer to go to (which text_<x> depends on
+        # the unit), so they are left out; this says whether the level can
+        # form one at all
+        self.text_transforms = {"text", "is"} <= words and any(
+            is_noun(word) and word != TEXT_NOUN for word in words
+        )
+        # (subject noun, rule target column, bit of the resulting entity)
+        self.transforms = [
+            (n, len(PROPS) + t, self.bits[self.entity_index[target]])
+            for n, subject in enumerate(self.nouns)
+            for t, target in enumerate(self.nouns)
+            if target != subject and target != TEXT_NOUN and subject != TEXT_NOUN
+        ]
+
+        self.initial = np.zeros((self.height, self.width), dtype=np.uint64)
+        for unit in level.units:
+            if 0 <= unit.x < self.width and 0 <= unit.y < self.height:
+                self.initial[unit.y, unit.x] |= self.bits[self.entity_index[unit.name]]
+
+        self.border = np.ones((self.height, self.width), dtype=bool)
+        self.border[1:-1, 1:-1] = False
+
+
+class BatchSim:
+    """B states of one level, stepped together.
+
+    The boolean entity layers of a state are bit-packed: `cells[b, y, x]`
+    has bit e set when entity e is on that cell, so "is there a YOU unit
+    here" is one AND with the per-state YOU entity mask. `layers` unpacks
+    them to a (B, E, H, W) boolean array.
+    """
+
+    def __init__(self, level: LevelState, batch_size: int):
+        self.level = level if isinstance(level, BatchLevel) else BatchLevel(level)
+        self.batch_size = batch_size
+        self.reset()
+
+    def reset(self):
+        lv = self.level
+        self.cells = np.broadcast_to(
+            lv.initial, (self.batch_size,) + lv.initial.shape
+        ).copy()
+        self.won = np.zeros(self.batch_size, dtype=bool)
+        self.turns = np.zeros(self.batch_size, dtype=np.int32)
+        self._update_rules()
+
+    @property
+    def layers(self) -> np.ndarray:
+        """(B, E, H, W) boolean entity layers."""
+        shifts = np.arange(len(self.level.entities), dtype=np.uint64)
+        return ((self.cells[:, None] >> shifts[None, :, None, None]) & np.uint64(1)).astype(bool)
+
+    # -- rules ---------------------------------------------------------------
+
+    def _update_rules(self, select: Optional[np.ndarray] = None):
+        """Re-parse rules from the text on the board and derive prop masks.
+
+        With `select`, only those states are re-parsed.
+        """
+        lv = self.level
+        if select is None:
+            select = np.ones(self.batch_size, dtype=bool)
+            self.rules = np.zeros((self.batch_size, len(lv.nouns), len(lv.targets)), dtype=bool)
+            self.masks = np.zeros((self.batch_size, len(PROPS)), dtype=np.uint64)
+        states = np.flatnonzero(select)
+        if len(states) == 0:
+            return
+        board = self.cells[states]
+        rules = np.zeros((len(states), len(lv.nouns), len(lv.targets)), dtype=bool)
+        if lv.is_bit:
+            # NOUN IS TARGET along x, then along y; IS tiles are few, so
+            # gather their neighbours instead of scanning every cell pair
+            for cells in (board, board.swapaxes(1, 2)):
+                b, y, x = np.nonzero(cells[:, :, 1:-1] & lv.is_bit)
+                subjects = (cells[b, y, x][:, None] & lv.noun_text[None, :]) != 0
+                targets = (cells[b, y, x + 2][:, None] & lv.target_text[None, :]) != 0
+                k, noun, target = np.nonzero(subjects[:, :, None] & targets[:, None, :])
+                rules[b[k], noun, target] = True
+        self.rules[states] = rules
+
+        # (B, E, PROPS) -> one entity bit mask per state and property
+        props = rules[:, lv.entity_noun, : len(PROPS)]
+        masks = np.bitwise_or.reduce(
+            np.where(props, lv.bits[None, :, None], np.uint64(0)), axis=1
+        )
+        masks[:, PUSH] |= lv.text_mask
+        self.masks[states] = masks
+
+    def _text_changed(self, before: np.ndarray) -> np.ndarray:
+        """(B,) states whose text tiles differ from `before`."""
+        diff = (before ^ self.cells) & self.level.text_mask
+        return diff.reshape(self.batch_size, -1).any(axis=1)
+
+    def _has(self, cells: np.ndarray, masks: np.ndarray, prop: int) -> np.ndarray:
+        """Cells holding an entity with `prop`."""
+        return (cells & masks[:, prop, None, None]) != 0
+
+    # -- turn phases ---------------------------------------------------------
+
+    def _move(self, select: np.ndarray, direction: int):
+        # Scan axis first and contiguous: (W, b, H)
+        cells = np.ascontiguousarray(np.moveaxis(_to_right(self.cells[select], direction), -1, 0))
+        masks = self.masks[select]
+        border = np.ascontiguousarray(_to_right(self.level.border, direction).T)[:, None, :]
+
+        you_mask = masks[None, :, YOU, None]
+        push_mask = masks[None, :, PUSH, None]
+        stop_only = (masks[:, STOP] & ~masks[:, PUSH])[None, :, None]
+        you_c = (cells & you_mask) != 0
+        push_c = (cells & push_mask) != 0
+        stop_c = ((cells & stop_only) != 0) | border
+
+        # ok[x]: whatever is at x can move to x+1, pushing the chain ahead
+        W = cells.shape[0]
+        ok = np.zeros(cells.shape, dtype=bool)
+        for x in range(W - 2, -1, -1):
+            ok[x] = ~stop_c[x + 1] & (~push_c[x + 1] | ok[x + 1])
+
+        you_move = you_c & ok
+        push_move = np.zeros_like(you_move)
+        carry = np.zeros(cells.shape[1:], dtype=bool)
+        for x in range(W):
+            push_move[x] = push_c[x] & carry & ok[x]
+            carry = you_move[x] | push_move[x]
+
+        zero = np.uint64(0)
+        moving = np.where(you_move, cells & you_mask, zero) | np.where(
+            push_move, cells & push_mask, zero
+        )
+        moved = cells & ~moving
+        moved[1:] |= moving[:-1]
+        self.cells[select] = _from_right(np.moveaxis(moved, 0, -1), direction)
+
+    def _transform(self) -> bool:
+        lv = self.level
+        if not lv.transforms:
+            return False
+        before = self.cells.copy()
+        changed = False
+        nouns = np.arange(len(lv.nouns))
+        # A noun IS itself blocks its transforms
+        protected = self.rules[:, nouns, len(PROPS) + nouns]
+        done = np.zeros((self.batch_size, len(lv.nouns)), dtype=bool)
+        for noun, target, bit in lv.transforms:
+            active = self.rules[:, noun, target] & ~protected[:, noun] & ~done[:, noun]
+            if not active.any():
+                continue
+            done[:, noun] |= active
+            changed = True
+            source = lv.noun_mask[noun]
+            hit = active[:, None, None] & ((before & source) != 0)
+            self.cells[hit] = (self.cells[hit] & ~source) | bit
+        return changed
+
+    def _destroy(self) -> bool:
+        cells, masks = self.cells, self.masks
+        if not masks[:, [SINK, DEFEAT, HOT]].any():
+            return False
+        sink = self._has(cells, masks, SINK) & (np.bitwise_count(cells) > 1)
+        defeat = self._has(cells, masks, DEFEAT)
+        hot = self._has(cells, masks, HOT)
+        if not (sink.any() or defeat.any() or hot.any()):
+            return False
+        zero = np.uint64(0)
+        kill = (
+            np.where(sink, ~zero, zero)
+            | np.where(defeat, masks[:, YOU, None, None], zero)
+            | np.where(hot, masks[:, MELT, None, None], zero)
+        )
+        killed = (cells & kill) != 0
+        if not killed.any():
+            return False
+        self.cells = cells & ~kill
+        return True
+
+    # -- public API ----------------------------------------------------------
+
+    def step(self, actions: np.ndarray):
+        """Play one turn; `actions[b]` is an index into ACTIONS.
+
+        States that are already won do not change.
+        """
+        actions = np.asarray(actions)
+        if actions.ndim == 0:
+            actions = np.full(self.batch_size, int(actions))
+        won = self.won.copy()
+        before = self.cells.copy()
+        self.turns += ~won
+        for direction in range(4):
+            select = ~won & (actions == direction)
+            if select.any():
+                self._move(select, direction)
+        self._update_rules(self._text_changed(before))
+        if self._transform():
+            self._update_rules(self._text_changed(before))
+        if self._destroy():
+            self._update_rules(self._text_changed(before))
+        if won.any():
+            self.cells[won] = before[won]
+            self._update_rules(won)
+
+        you = self._has(self.cells, self.masks, YOU)
+        win = self._has(self.cells, self.masks, WIN)
+        self.won |= (you & win).reshape(self.batch_size, -1).any(axis=1)
+
+    @property
+    def lost(self) -> np.ndarray:
+        """States without any YOU unit left (and not won)."""
+        you = self._has(self.cells, self.masks, YOU)
+        return ~self.won & ~you.reshape(self.batch_size, -1).any(axis=1)
+
+
+def encode_moves(moves: Sequence[str]) -> List[int]:
+    """["right", "up"] -> [0, 1]"""
+    return [ACTIONS.index(move) for move in moves]
+
+
+def rollout(level: LevelState, sequences: np.ndarray) -> np.ndarray:
+    """Play (B, T) action sequences; return the turn each one won at (-1: never)."""
+    sequences = np.asarray(sequences)
+    sim = BatchSim(level, sequences.shape[0])
+    won_at = np.full(sequences.shape[0], -1, dtype=np.int32)
+    for t in range(sequences.shape[1]):
+        sim.step(sequences[:, t])
+        won_at[(won_at < 0) & sim.won] = t + 1
+        if sim.won.all():
+            break
+    return won_at
+
+
+def random_rollout_stats(
+    level: LevelState,
+    rollouts: int,
+    horizon: int,
+    seed: Optional[int] = None,
+) -> Dict[str, float]:
+    """Win rate and turns-to-win of uniformly random move sequences."""
+    rng = np.random.default_rng(seed)
+    sequences = rng.integers(0, 4, size=(rollouts, horizon))
+    start = time.perf_counter()
+    won_at = rollout(level, sequences)
+    elapsed = time.perf_counter() - start
+    wins = won_at[won_at > 0]
+    return {
+        "rollouts": rollouts,
+        "horizon": horizon,
+        "win_rate": float(len(wins)) / rollouts,
+        "mean_turns_to_win": float(wins.mean()) if len(wins) else float("nan"),
+        "min_turns_to_win": int(wins.min()) if len(wins) else -1,
+        "seconds": elapsed,
+        "steps_per_second": rollouts * horizon / elapsed if elapsed else float("inf"),
+    }
+
+
+def main():
+    from automation.sim.levels import load_level
+
+    parser = argparse.ArgumentParser(description="Random rollout statistics for a level")
+    parser.add_argument("level", type=Path, help="Grid JSON or captured world_data.txt")
+    parser.add_argument("--rollouts", type=int, default=4096)
+    parser.add_argument("--horizon", type=int, default=40)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    level = load_level(args.level)
+    if BatchLevel(level).text_transforms:
+        print("Warning: X IS TEXT / TEXT IS X are ignored here; use automation.sim.engine for this level")
+    stats = random_rollout_stats(level, args.rollouts, args.horizon, args.seed)
+    for key, value in stats.items():
+        print(f"{key}: {value:.4g}" if isinstance(value, float) else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Turn resolution for the headless simulator.
+
+Implements the core of Baba Is You's rules: YOU units move and push chains of
+PUSH units (text is always PUSH), STOP blocks, nouns transform into other
+nouns, SINK/DEFEAT/HOT+MELT destroy units, and a YOU unit on a WIN unit wins
+the level. Rules are re-read after every move, so pushing text takes effect
+on the same turn like in the game.
+
+Usage:
+    game = Game(level)
+    game.step("right")
+    game.undo()
+    game.restart()
+"""
+
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from automation.sim.rules import (
+    TEXT_NOUN,
+    Rule,
+    parse_rules,
+    properties_by_noun,
+    transforms_by_noun,
+)
+from automation.sim.state import DIRECTIONS, LevelState, Unit, is_text
+
+TEXT_PROPERTIES = frozenset({"push"})
+
+# Commands accepted by step() besides the four directions
+IDLE = "idle"
+
+Snapshot = List[Tuple[int, str, int, int, int, Optional[str]]]
+
+
+def _snapshot(units: List[Unit]) -> Snapshot:
+    return [(u.uid, u.name, u.x, u.y, u.dir, u.record) for u in units]
+
+
+def _restore(snapshot: Snapshot) -> List[Unit]:
+    return [Unit(*entry) for entry in snapshot]
+
+
+class Game:
+    """Mutable game state for one level, with undo history."""
+
+    def __init__(self, level: LevelState):
+        self.level = level
+        self.name = level.name
+        self.width = level.width
+        self.height = level.height
+        self._initial = _snapshot(level.units)
+        self.units: List[Unit] = _restore(self._initial)
+        self.history: List[Snapshot] = []
+        self.won = False
+        self.turns = 0
+        self._update_rules()
+
+    # -- rules ---------------------------------------------------------------
+
+    def _update_rules(self):
+        self.rules: List[Rule] = parse_rules(self.units)
+        self._props = properties_by_noun(self.rules)
+        self._text_props = self._props.get(TEXT_NOUN, frozenset()) | TEXT_PROPERTIES
+
+    def properties(self, unit: Unit) -> FrozenSet[str]:
+        if is_text(unit.name):
+            return self._text_props
+        return self._props.get(unit.name, frozenset())
+
+    def has(self, unit: Unit, prop: str) -> bool:
+        return prop in self.properties(unit)
+
+    # -- commands ------------------------------------------------------------
+
+    def apply(self, command: str) -> bool:
+        """Apply "undo", "restart"/"restart_instant" or a move. Returns won."""
+        if command == "undo":
+            self.undo()
+        elif command in ("restart", "restart_instant"):
+            self.restart()
+        else:
+            self.step(command)
+        return self.won
+
+    def step(self, direction: str) -> bool:
+        """Play one turn ("right", "up", "left", "down" or "idle").
+
+        Once the level is won further moves are ignored, like in the game
+        where the level is left. Returns whether the level is won.
+
+        Raises:
+            ValueError: Unknown command
+        """
+        if direction != IDLE and direction not in DIRECTIONS:
+            raise ValueError(f"Unknown command: {direction}")
+        if self.won:
+            return True
+
+        self.history.append(_snapshot(self.units))
+        self.turns += 1
+        if direction != IDLE:
+            self._move_you(*DIRECTIONS[direction])
+            self._update_rules()
+        if self._transform():
+            self._update_rules()
+        if self._destroy():
+            self._update_rules()
+        self.won = self._check_win()
+        return self.won
+
+    def undo(self) -> bool:
+        """Revert the last turn. Returns False if there is nothing to undo."""
+        if not self.history:
+            return False
+        self.units = _restore(self.history.pop())
+        self.won = False
+        self._update_rules()
+        return True
+
+    def restart(self):
+        """Back to the initial state. Like the game, restart is undoable."""
+        self.history.append(_snapshot(self.units))
+        self.units = _restore(self._initial)
+        self.won = False
+        self._update_rules()
+
+    # -- turn phases ---------------------------------------------------------
+
+    def _cells(self) -> Dict[Tuple[int, int], List[Unit]]:
+        cells: Dict[Tuple[int, int], List[Unit]] = {}
+        for unit in self.units:
+            cells.setdefault((unit.x, unit.y), []).append(unit)
+        return cells
+
+    def _in_bounds(self, x: int, y: int) -> bool:
+        return 1 <= x <= self.width - 2 and 1 <= y <= self.height - 2
+
+    def _push_chain(
+        self,
+        cells: Dict[Tuple[int, int], List[Unit]],
+        x: int,
+        y: int,
+        dx: int,
+        dy: int,
+        chain: List[Unit],
+    ) -> bool:
+        """Can something at (x, y) move by (dx, dy)? Collects pushed units."""
+        while True:
+            x, y = x + dx, y + dy
+            if not self._in_bounds(x, y):
+                return False
+            pushed = []
+            for unit in cells.get((x, y), ()):
+                props = self.properties(unit)
+                if "push" in props:
+                    pushed.append(unit)
+                elif "stop" in props:
+                    return False
+            if not pushed:
+                return True
+            chain.extend(pushed)
+
+    def _move_you(self, dx: int, dy: int, dir: int):
+        movers = [u for u in self.units if self.has(u, "you")]
+        # Units furthest along the direction move first, so a line of YOU
+        # units moves together instead of blocking itself
+        movers.sort(key=lambda u: -(u.x * dx + u.y * dy))
+        cells = self._cells()
+        moved = set()
+        for mover in movers:
+            mover.dir = dir
+            if id(mover) in moved:
+                continue
+            chain: List[Unit] = []
+            if not self._push_chain(cells, mover.x, mover.y, dx, dy, chain):
+                continue
+            for unit in [mover] + chain:
+                if id(unit) in moved:
+                    continue
+                moved.add(id(unit))
+                cells[(unit.x, unit.y)].remove(unit)
+                unit.x += dx
+                unit.y += dy
+                unit.dir = dir
+                cells.setdefault((unit.x, unit.y), []).append(unit)
+
+    def _transform(self) -> bool:
+        transforms = transforms_by_noun(self.rules)
+        if not transforms:
+            return False
+        changed = False
+        for unit in self.units:
+            noun = TEXT_NOUN if is_text(unit.name) else unit.name
+            target = transforms.get(noun)
+            if target is None:
+                continue
+            if target == TEXT_NOUN:
+                if is_text(unit.name):
+                    continue
+                target = f"text_{unit.name}"
+            unit.name = target
+            changed = True
+        return changed
+
+    def _destroy(self) -> bool:
+        destroyed = set()
+        for units in self._cells().values():
+            props = [self.properties(u) for u in units]
+            if len(units) > 1 and any("sink" in p for p in props):
+                destroyed.update(id(u) for u in units)
+                continue
+            if any("defeat" in p for p in props):
+                destroyed.update(id(u) for u, p in zip(units, props) if "you" in p)
+            if any("hot" in p for p in props):
+                destroyed.update(id(u) for u, p in zip(units, props) if "melt" in p)
+        if not destroyed:
+            return False
+        self.units = [u for u in self.units if id(u) not in destroyed]
+        return True
+
+    def _check_win(self) -> bool:
+        for units in self._cells().values():
+            props = [self.properties(u) for u in units]
+            if any("you" in p for p in props) and any("win" in p for p in props):
+                return True
+        return False
+
+    # -- export --------------------------------------------------------------
+
+    def to_level_state(self) -> LevelState:
+        return LevelState(self.width, self.height, self.units, self.name)
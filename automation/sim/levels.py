@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Loading levels for the headless simulator.
+
+Two sources are supported:
+    - a world_data.txt captured from the real game (the [state] section)
+    - a grid JSON as produced by the tools' getRawGameState()
+      ({"grid": [[cell, ...], ...], "width": W, "height": H}, cells joined
+      with "<"), e.g. .opencode/tests/fixtures/raw_state.json
+"""
+
+import json
+from pathlib import Path
+
+from automation.sim.state import LevelState, Unit, units_from_table
+from automation.state_codec import StateTable
+from automation.world_data import WorldData
+
+
+def load_world_data(path: Path, name: str = "") -> LevelState:
+    """Level from a world_data.txt written by lua/io.lua.
+
+    Raises:
+        ValueError: The file has no state or room size
+    """
+    world = WorldData(path)
+    state = world.state()
+    room_size = world.room_size()
+    if state is None or room_size is None:
+        raise ValueError(f"No level state in {path}")
+    table = StateTable.parse(state, room_size)
+    return LevelState(table.width, table.height, units_from_table(table), name or Path(path).stem)
+
+
+def load_grid_json(path: Path, name: str = "") -> LevelState:
+    """Level from a getRawGameState()-style grid JSON.
+
+    Grid coordinates are 0-based over the playable area, so they are shifted
+    by the one-cell border the game includes in its coordinates.
+    """
+    data = json.loads(Path(path).read_text())
+    units = []
+    for row_index, row in enumerate(data["grid"]):
+        for col_index, cell in enumerate(row):
+            if not cell:
+                continue
+            for unit_name in cell.split("<"):
+                if unit_name:
+                    units.append(Unit(len(units) + 1, unit_name, col_index + 1, row_index + 1))
+    return LevelState(data["width"] + 2, data["height"] + 2, units, name or Path(path).stem)
+
+
+def load_level(path: Path, name: str = "") -> LevelState:
+    """Dispatch on the file type: .json grids, anything else is world_data."""
+    path = Path(path)
+    if path.suffix == ".json":
+        return load_grid_json(path, name)
+    return load_world_data(path, name)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Rule parsing for the headless simulator.
+
+Rules are read the way the game reads them: text units forming
+`NOUN IS NOUN|PROPERTY` left-to-right or top-to-bottom. Several text units
+may share a cell, in which case every combination is considered, and any
+number of rules may apply to the same noun.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Set, Tuple
+
+from automation.sim.state import Unit, is_text
+
+# Words that are properties rather than nouns. Only a subset has behaviour in
+# the engine; the others are still parsed so they never turn into transforms.
+PROPERTIES = frozenset(
+    {
+        "you", "win", "stop", "push", "defeat", "sink", "hot", "melt",
+        "move", "open", "shut", "float", "weak", "tele", "pull", "shift",
+        "swap", "more", "right", "up", "left", "down", "red", "blue",
+        "best", "sleep", "fall", "word", "broken", "power", "still",
+        "select", "bonus", "end", "done", "safe", "hide", "lonely",
+    }
+)
+
+# Operators and conditions that are not nouns
+OPERATORS = frozenset({"is", "and", "not", "has", "on", "near", "facing", "make"})
+
+# Noun matching every text unit
+TEXT_NOUN = "text"
+
+
+class Rule(NamedTuple):
+    subject: str  # noun, e.g. "baba" or "text"
+    target: str  # property ("you") or noun ("rock")
+
+    def __str__(self) -> str:
+        return f"{self.subject} is {self.target}"
+
+    @property
+    def is_transform(self) -> bool:
+        return self.target not in PROPERTIES
+
+
+def word_of(unit: Unit) -> str:
+    """The word a text unit spells, e.g. "baba" for text_baba."""
+    return unit.name[len("text_"):]
+
+
+def is_noun(word: str) -> bool:
+    return word not in PROPERTIES and word not in OPERATORS
+
+
+def _text_cells(units: Iterable[Unit]) -> Dict[Tuple[int, int], List[str]]:
+    cells: Dict[Tuple[int, int], List[str]] = {}
+    for unit in units:
+        if is_text(unit.name):
+            cells.setdefault((unit.x, unit.y), []).append(word_of(unit))
+    return cells
+
+
+def parse_rules(units: Iterable[Unit]) -> List[Rule]:
+    """All active rules, in reading order and without duplicates."""
+    cells = _text_cells(units)
+    rules: List[Rule] = []
+    seen: Set[Rule] = set()
+    for (x, y), words in sorted(cells.items(), key=lambda item: (item[0][1], item[0][0])):
+        if "is" not in words:
+            continue
+        for dx, dy in ((1, 0), (0, 1)):
+            before = cells.get((x - dx, y - dy), ())
+            after = cells.get((x + dx, y + dy), ())
+            for subject in before:
+                if not is_noun(subject):
+                    continue
+                for target in after:
+                    if target in OPERATORS:
+                        continue
+                    rule = Rule(subject, target)
+                    if rule not in seen:
+                        seen.add(rule)
+                        rules.append(rule)
+    return rules
+
+
+def properties_by_noun(rules: Iterable[Rule]) -> Dict[str, FrozenSet[str]]:
+    """noun -> set of properties it currently has."""
+    props: Dict[str, Set[str]] = {}
+    for rule in rules:
+        if not rule.is_transform:
+            props.setdefault(rule.subject, set()).add(rule.target)
+    return {noun: frozenset(values) for noun, values in props.items()}
+
+
+def transforms_by_noun(rules: Iterable[Rule]) -> Dict[str, str]:
+    """noun -> noun it turns into.
+
+    `X IS X` protects X from being transformed; if several transforms apply
+    to the same noun, the first one in reading order wins.
+    """
+    protected = set()
+    transforms: Dict[str, str] = {}
+    for rule in rules:
+        if not rule.is_transform:
+            continue
+        if rule.target == rule.subject:
+            protected.add(rule.subject)
+        else:
+            transforms.setdefault(rule.subject, rule.target)
+    return {noun: target for noun, target in transforms.items() if noun not in protected}
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Level state for the headless simulator, in the format written by lua/io.lua.
+
+Decoding goes through automation.state_codec. Only name, position and
+direction matter to the rule engine; the raw record of each unit is kept so a
+state round-trips.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from automation.state_codec import (
+    F_DIR,
+    F_ID,
+    F_KEY,
+    F_NAME,
+    F_TYPE,
+    F_X,
+    F_Y,
+    FIELD_COUNT,
+    FIELD_SEPARATOR,
+    UNIT_SEPARATOR,
+    StateTable,
+)
+
+# Direction values used by the game
+DIR_RIGHT = 0
+DIR_UP = 1
+DIR_LEFT = 2
+DIR_DOWN = 3
+
+# Command name -> (dx, dy, dir)
+DIRECTIONS = {
+    "right": (1, 0, DIR_RIGHT),
+    "up": (0, -1, DIR_UP),
+    "left": (-1, 0, DIR_LEFT),
+    "down": (0, 1, DIR_DOWN),
+}
+
+
+def is_text(name: str) -> bool:
+    return name.startswith("text_")
+
+
+class Unit:
+    """One game object. Identity is kept across moves and transformations."""
+
+    __slots__ = ("uid", "name", "x", "y", "dir", "record")
+
+    def __init__(
+        self,
+        uid: int,
+        name: str,
+        x: int,
+        y: int,
+        dir: int = DIR_RIGHT,
+        record: Optional[str] = None,
+    ):
+        self.uid = uid
+        self.name = name
+        self.x = x
+        self.y = y
+        self.dir = dir
+        self.record = record
+
+    def __repr__(self) -> str:
+        return f"Unit({self.uid}, {self.name!r}, {self.x}, {self.y}, dir={self.dir})"
+
+    def to_record(self) -> str:
+        """Serialize to the 21-field record format of io.lua."""
+        fields = self.record.split(FIELD_SEPARATOR) if self.record else [""] * FIELD_COUNT
+        if not self.record:
+            fields[F_KEY] = str(self.uid)
+            fields[F_ID] = str(self.uid)
+        fields[F_NAME] = self.name
+        fields[F_TYPE] = "text" if is_text(self.name) else "object"
+        fields[F_X] = str(self.x)
+        fields[F_Y] = str(self.y)
+        fields[F_DIR] = str(self.dir)
+        return FIELD_SEPARATOR.join(fields)
+
+
+class LevelState:
+    """All units of a level plus its room size.
+
+    `width` and `height` are the room size reported by the game, which
+    includes a one-cell border; playable cells are 1..width-2 / 1..height-2.
+    """
+
+    def __init__(self, width: int, height: int, units: Iterable[Unit], name: str = ""):
+        self.width = width
+        self.height = height
+        self.units: List[Unit] = list(units)
+        self.name = name
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 1 <= x <= self.width - 2 and 1 <= y <= self.height - 2
+
+    def cells(self) -> Dict[Tuple[int, int], List[Unit]]:
+        """Map of (x, y) -> units on that cell."""
+        cells: Dict[Tuple[int, int], List[Unit]] = {}
+        for unit in self.units:
+            cells.setdefault((unit.x, unit.y), []).append(unit)
+        return cells
+
+    def to_state_string(self) -> str:
+        return UNIT_SEPARATOR.join(unit.to_record() for unit in self.units)
+
+    @property
+    def room_size(self) -> str:
+        return f"{self.width}{FIELD_SEPARATOR}{self.height}"
+
+
+def units_from_table(table: StateTable) -> List[Unit]:
+    """Mutable units for the engine from a decoded state."""
+    return [
+        Unit(table.uid[row], table.name(row), table.x[row], table.y[row], table.dir[row], table.record(row))
+        for row in range(len(table))
+    ]
+
+
+def parse_units(state: str) -> List[Unit]:
+    """Parse the `state=` value written by io.lua into units."""
+    return units_from_table(StateTable.parse(state, (0, 0)))
+
+
+def parse_room_size(value: str) -> Tuple[int, int]:
+    """Parse `room_size=W|H`."""
+    width, height = value.split(FIELD_SEPARATOR)
+    return int(width), int(height)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Reader for the binary level snapshot written by lua/io.lua.
+
+With BINARY_SNAPSHOT = true in io.lua, the mod writes state.bin next to the
+commands directory every time it exports the level. The file is replaced
+atomically and has a fixed layout (little-endian):
+
+    header (32 bytes)
+        magic           8s   b"BABASNAP"
+        version         u16
+        flags           u16  bit 0: level won
+        seq             u32  incremented on every write
+        last_processed  i32  last executed command file
+        width, height   u16  room size, including the border
+        name_count      u16
+        row_size        u16  12
+        unit_count      u32
+    name table          name_count × (u8 length, bytes)
+    rows                unit_count × (u16 name index, i16 x, i16 y,
+                                      u8 dir, u8 is_text, u32 unit id)
+
+The reader memory-maps the file and decodes fields on access, so checking
+for a new state is one stat plus a 32-byte header read.
+
+Usage:
+    reader = SnapshotReader(SNAPSHOT_PATH)
+    snapshot = reader.read()
+    if snapshot is not None:
+        snapshot.seq, snapshot.level_won
+        for name, x, y, dir, uid in snapshot: ...
+"""
+
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from automation.config import SNAPSHOT_PATH
+from automation.state_codec import VOCABULARY, StateTable
+from automation.world_data import Signature, file_signature
+
+MAGIC = b"BABASNAP"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIiHHHHI")
+ROW = struct.Struct("<HhhBBI")
+FLAG_LEVEL_WON = 1
+
+Row = Tuple[str, int, int, int, int]
+
+
+class SnapshotError(ValueError):
+    """The file is not a snapshot this reader understands."""
+
+
+class Snapshot:
+    """Zero-copy view of one snapshot file."""
+
+    __slots__ = (
+        "version", "flags", "seq", "last_processed", "width", "height",
+        "names", "_buf", "_rows_offset", "_count",
+    )
+
+    def __init__(self, buf):
+        if len(buf) < HEADER.size:
+            raise SnapshotError("Snapshot is shorter than its header")
+        (
+            magic, self.version, self.flags, self.seq, self.last_processed,
+            self.width, self.height, name_count, row_size, self._count,
+        ) = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"Bad snapshot magic: {magic!r}")
+        if self.version != VERSION or row_size != ROW.size:
+            raise SnapshotError(f"Unsupported snapshot version {self.version}")
+
+        offset = HEADER.size
+        names = []
+        for _ in range(name_count):
+            length = buf[offset]
+            names.append(
+                VOCABULARY.names[VOCABULARY.intern(bytes(buf[offset + 1 : offset + 1 + length]).decode())]
+            )
+            offset += 1 + length
+        self.names = tuple(names)
+        self._rows_offset = offset
+        if offset + self._count * ROW.size > len(buf):
+            raise SnapshotError("Snapshot is truncated")
+        self._buf = buf
+
+    @property
+    def level_won(self) -> bool:
+        return bool(self.flags & FLAG_LEVEL_WON)
+
+    @property
+    def room_size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Row:
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        name_id, x, y, dir, _, uid = ROW.unpack_from(
+            self._buf, self._rows_offset + index * ROW.size
+        )
+        return self.names[name_id], x, y, dir, uid
+
+    def __iter__(self) -> Iterator[Row]:
+        names = self.names
+        end = self._rows_offset + self._count * ROW.size
+        rows = memoryview(self._buf)[self._rows_offset : end]
+        for name_id, x, y, dir, _, uid in ROW.iter_unpack(rows):
+            yield names[name_id], x, y, dir, uid
+
+    def to_table(self) -> StateTable:
+        """Decode into a StateTable for indexed queries."""
+        table = StateTable(self.width, self.height)
+        entity_ids = [VOCABULARY.intern(name) for name in self.names]
+        for name_id, x, y, dir, _, uid in ROW.iter_unpack(
+            memoryview(self._buf)[self._rows_offset : self._rows_offset + self._count * ROW.size]
+        ):
+            table.entity.append(entity_ids[name_id])
+            table.x.append(x)
+            table.y.append(y)
+            table.dir.append(dir)
+            table.uid.append(uid)
+        return table
+
+
+class SnapshotReader:
+    """Keeps the current snapshot mapped and re-maps it when it is replaced."""
+
+    def __init__(self, path: Path = SNAPSHOT_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._signature: Optional[Signature] = None
+        self._snapshot: Optional[Snapshot] = None
+
+    def read(self) -> Optional[Snapshot]:
+        """The current snapshot, or None if there is none (yet)."""
+        with self._lock:
+            signature = file_signature(self.path)
+            if signature is None:
+                self._signature, self._snapshot = None, None
+                return None
+            if signature == self._signature:
+                return self._snapshot
+            try:
+                with open(self.path, "rb") as f:
+                    if os.fstat(f.fileno()).st_size == 0:
+                        return None
+                    # The mapping stays valid after the file is replaced
+                    buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except OSError:
+                return None
+            try:
+                snapshot = Snapshot(buf)
+            except SnapshotError:
+                buf.close()
+                return None
+            self._signature, self._snapshot = signature, snapshot
+            return snapshot
+
+    def seq(self) -> Optional[int]:
+        snapshot = self.read()
+        return snapshot.seq if snapshot is not None else None
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Search a level offline for a reference solution.
+
+Usage:
+    # Shortest solution of a captured world_data.txt
+    python -m automation.solver world_data.txt
+
+    # Faster, near-optimal; JSON for storing as ground truth
+    python -m automation.solver level.json --algorithm astar --weight 2 --json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from automation.sim.levels import load_level
+from automation.solver.search import ALGORITHMS, MAX_STATES, TABLE_SIZE, solve
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline BFS / A* / IDA* solver for a level")
+    parser.add_argument("level", type=Path, help="Grid JSON or captured world_data.txt")
+    parser.add_argument("--algorithm", choices=ALGORITHMS, default="bfs")
+    parser.add_argument(
+        "--weight", type=float, default=1.0, help="Heuristic weight for astar/idastar (default: 1)"
+    )
+    parser.add_argument(
+        "--max-states",
+        type=int,
+        default=MAX_STATES,
+        help=f"Give up after expanding this many states (default: {MAX_STATES})",
+    )
+    parser.add_argument(
+        "--table-size",
+        type=int,
+        default=TABLE_SIZE,
+        help=f"Transposition table entries (default: {TABLE_SIZE})",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+
+    level = load_level(args.level)
+    solution = solve(level, args.algorithm, args.weight, args.max_states, args.table_size)
+
+    if args.json:
+        print(json.dumps({"level": level.name, **solution.to_dict()}, indent=2))
+    elif solution.found:
+        quality = "optimal" if solution.optimal else "not proven optimal"
+        print(f"Solution ({len(solution.moves)} moves, {solution.algorithm}, {quality}):")
+        print(",".join(solution.moves))
+        if not solution.verified:
+            print("Warning: the simulator does not win with these moves")
+    else:
+        print(f"No solution found ({solution.algorithm})")
+    if not args.json:
+        print(
+            f"Expanded {solution.expanded} states, generated {solution.generated} "
+            f"in {solution.seconds:.2f}s"
+        )
+    sys.exit(0 if solution.found and solution.verified else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Dead squares and frozen blocks: where pushed text can never move again.
+
+A pushable unit (text is always PUSH) only moves when YOU can stand behind it
+and the cell ahead is free, so walls (the room border and units that are STOP
+but not PUSH) decide where it gets stuck for good:
+
+- a corner (a wall on both axes) freezes it in place,
+- a wall line (cells along a wall whose open segment has the wall on the same
+  side all the way) keeps it on that line forever,
+- a block next to a frozen block is frozen too on that axis, so frozen blocks
+  spread from corners along walls (the frozen-block patterns).
+
+Chains of pushables move together in Baba, so unlike Sokoban two blocks side
+by side are not stuck by themselves. All of this holds while the rules that
+make the walls STOP hold.
+
+The square tables are computed once per layout and answer in O(1), so a
+planner can check every push and the command daemon can warn before a batch
+strands a rule word.
+
+Usage:
+    table = DeadlockTable(model, state)
+    table.is_dead(x, y)                    # corner or wall line
+    check_batch(level, ["left", "left", "up"])
+
+    python -m automation.solver.deadlock world_data.txt [--commands left,up]
+"""
+
+import argparse
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Set
+
+from automation.sim.levels import load_level
+from automation.sim.state import LevelState
+from automation.solver.model import MOVES, PUSH, STOP, SearchModel, SearchState
+
+# Square kinds
+LIVE = 0
+WALL_LINE = 1
+CORNER = 2
+
+SQUARE_NAMES = {WALL_LINE: "wall line", CORNER: "corner"}
+FROZEN_BLOCK = "frozen block"
+
+# Neighbour offsets per axis, in cells: (dx, dy) pairs
+_AXES = (((-1, 0), (1, 0)), ((0, -1), (0, 1)))
+
+
+class Strand(NamedTuple):
+    """A rule word that a batch leaves stuck."""
+
+    word: str
+    x: int
+    y: int
+    reason: str  # "corner", "wall line" or "frozen block"
+
+    def __str__(self) -> str:
+        return f"{self.word} at ({self.x}, {self.y}): {self.reason}"
+
+
+class DeadlockTable:
+    """Per-cell square kinds for the walls of one state."""
+
+    def __init__(self, model: SearchModel, state: SearchState):
+        self.model = model
+        self.width = model.width
+        self.height = model.height
+        cells = model.cells
+        props = model.rules(state).props
+
+        self.walls = bytearray(cells)
+        for cell in range(cells):
+            x, y = cell % self.width, cell // self.width
+            if not (1 <= x <= self.width - 2 and 1 <= y <= self.height - 2):
+                self.walls[cell] = 1
+        for unit in state.units:
+            bits = props[unit // cells]
+            if bits & STOP and not bits & PUSH:
+                self.walls[unit % cells] = 1
+
+        self.squares = bytearray(cells)
+        for cell in range(cells):
+            if not self.walls[cell] and all(self._blocked_axis(cell, axis) for axis in _AXES):
+                self.squares[cell] = CORNER
+        self._mark_wall_lines()
+
+    def _wall(self, cell: int, dx: int, dy: int) -> bool:
+        x, y = cell % self.width + dx, cell // self.width + dy
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return True
+        return bool(self.walls[y * self.width + x])
+
+    def _blocked_axis(self, cell: int, axis) -> bool:
+        return any(self._wall(cell, dx, dy) for dx, dy in axis)
+
+    def _mark_wall_lines(self):
+        # Along each line direction, an open segment where every cell has a
+        # wall on the same side: a block there can only slide along it
+        for (dx, dy), sides in (((1, 0), ((0, -1), (0, 1))), ((0, 1), ((-1, 0), (1, 0)))):
+            for cell in range(len(self.walls)):
+                if self.walls[cell] or not self._wall(cell, -dx, -dy):
+                    continue  # not the start of a segment
+                segment = []
+                current = cell
+                while not self.walls[current]:
+                    segment.append(current)
+                    current += dy * self.width + dx
+                for side in sides:
+                    if all(self._wall(c, *side) for c in segment):
+                        for c in segment:
+                            if self.squares[c] == LIVE:
+                                self.squares[c] = WALL_LINE
+
+    # -- lookups ---------------------------------------------------------------
+
+    def kind(self, x: int, y: int) -> int:
+        """LIVE, WALL_LINE or CORNER for the square at (x, y)."""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return CORNER
+        return self.squares[y * self.width + x]
+
+    def is_dead(self, x: int, y: int) -> bool:
+        return self.kind(x, y) != LIVE
+
+    def is_dead_cell(self, cell: int) -> bool:
+        return self.squares[cell] != LIVE
+
+    def frozen_cells(self, state: SearchState) -> Set[int]:
+        """Cells of pushable units that can never move again.
+
+        Corners first, then any pushable whose neighbours on both axes are
+        walls or frozen pushables, until nothing changes.
+        """
+        cells = self.model.cells
+        props = self.model.rules(state).props
+        pushable = {unit % cells for unit in state.units if props[unit // cells] & PUSH}
+        frozen = {cell for cell in pushable if self.squares[cell] == CORNER}
+        changed = True
+        while changed:
+            changed = False
+            for cell in pushable - frozen:
+                if all(
+                    any(self._wall(cell, dx, dy) or cell + dy * self.width + dx in frozen for dx, dy in axis)
+                    for axis in _AXES
+                ):
+                    frozen.add(cell)
+                    changed = True
+        return frozen
+
+    def stuck_words(self, state: SearchState) -> Dict[int, str]:
+        """Unit value -> reason, for every text unit that is stuck."""
+        model, cells = self.model, self.model.cells
+        frozen = self.frozen_cells(state)
+        stuck = {}
+        for unit in state.units:
+            if not model.is_text[unit // cells]:
+                continue
+            cell = unit % cells
+            if self.squares[cell] == CORNER:
+                stuck[unit] = SQUARE_NAMES[CORNER]
+            elif cell in frozen:
+                stuck[unit] = FROZEN_BLOCK
+            elif self.squares[cell] == WALL_LINE:
+                stuck[unit] = SQUARE_NAMES[WALL_LINE]
+        return stuck
+
+    def render(self) -> str:
+        """The table as text: '#' wall, 'X' corner, '-' wall line, '.' live."""
+        symbols = {LIVE: ".", WALL_LINE: "-", CORNER: "X"}
+        rows = []
+        for y in range(1, self.height - 1):
+            row = ""
+            for x in range(1, self.width - 1):
+                cell = y * self.width + x
+                row += "#" if self.walls[cell] else symbols[self.squares[cell]]
+            rows.append(row)
+        return "\n".join(rows)
+
+
+def _in_rule(model: SearchModel, state: SearchState, unit: int) -> bool:
+    """Whether the text unit takes part in an active rule: without it, the
+    rules would differ."""
+    units = list(state.units)
+    units.remove(unit)
+    without = model.make_state(units)
+    return model.rules(without).rules != model.rules(state).rules
+
+
+def stranded_words(
+    model: SearchModel, before: SearchState, after: SearchState, lines: bool = False
+) -> List[Strand]:
+    """Rule words stuck in `after` that could still move in `before`.
+
+    Words stuck inside an active rule are fine (that is how rules end up
+    against walls), so only words outside every rule count. A word on a wall
+    line can still form rules along it, so those are only reported with
+    `lines`.
+    """
+    was_stuck = DeadlockTable(model, before).stuck_words(before)
+    strands = []
+    for unit, reason in sorted(DeadlockTable(model, after).stuck_words(after).items()):
+        if reason == SQUARE_NAMES[WALL_LINE]:
+            if not lines or unit in was_stuck:
+                continue
+        elif was_stuck.get(unit, SQUARE_NAMES[WALL_LINE]) != SQUARE_NAMES[WALL_LINE]:
+            continue  # frozen before the batch already
+        if _in_rule(model, after, unit):
+            continue
+        entity, cell = divmod(unit, model.cells)
+        word = model.entities[entity][len("text_"):]
+        strands.append(Strand(word, cell % model.width, cell // model.width, reason))
+    return strands
+
+
+def check_batch(level: LevelState, commands: Iterable[str], lines: bool = False) -> List[Strand]:
+    """Rule words the commands would strand, predicted with the search model.
+
+    The prediction stops at the first undo/restart (what follows depends on
+    the game's history) and ignores idle turns. Nothing is reported for a
+    batch that wins.
+    """
+    model = SearchModel(level)
+    state = model.initial
+    for command in commands:
+        if command == "idle":
+            continue
+        if command not in MOVES:
+            break
+        state, won = model.step(state, command)
+        if won:
+            return []
+    return stranded_words(model, model.initial, state, lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dead squares of a level and words a batch would strand")
+    parser.add_argument("level", type=Path, help="Grid JSON or captured world_data.txt")
+    parser.add_argument("--commands", help="Comma-separated commands to check, e.g. left,left,up")
+    parser.add_argument("--lines", action="store_true", help="Also report words left on a wall line")
+    args = parser.parse_args()
+
+    level = load_level(args.level)
+    model = SearchModel(level)
+    print(DeadlockTable(model, model.initial).render())
+    if args.commands:
+        commands = [c.strip() for c in args.commands.split(",") if c.strip()]
+        strands = check_batch(level, commands, args.lines)
+        for strand in strands:
+            print(f"Warning: would strand {strand}")
+        if not strands:
+            print("No rule word stranded")
+
+
+if __name__ == "__main__":
+    main()
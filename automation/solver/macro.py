@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Push planner: the shortest move list that pushes a text tile to a cell.
+
+Walking paths (`shortest_path`) never push, so getting a word into place used
+to take several trial-and-error batches. This runs A* over full states
+(YOU, the pushed word and everything the pushes drag along), with the turn
+rules of SearchModel, so it plans around STOP, pushes chains and notices when
+walking through text changes the rules. The heuristic, the distance the word
+still has to travel plus the walk up to it, never overestimates while YOU
+moves one cell a turn; words pushed onto a dead square the target cannot be
+reached from (with the walls of the starting layout) are dropped, see
+automation.solver.deadlock.
+
+Words are tracked by kind, not identity: the goal is any `text_<word>` on the
+target cell. Rules formed or broken on the way are reported per move.
+
+Usage:
+    plan = plan_push(level, "flag", (7, 4))
+    plan.moves                 # ["left", "up", "right", ...] or None
+    plan.changes               # [RuleChange(step=3, move="up", formed=(...), broken=(...))]
+
+    python -m automation.solver.macro world_data.txt --word flag --to 7,4
+"""
+
+import argparse
+import math
+import time
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Tuple
+
+from automation.sim.levels import load_level
+from automation.sim.state import LevelState
+from automation.solver.deadlock import CORNER, LIVE, DeadlockTable
+from automation.solver.model import SearchModel, SearchState
+from automation.solver.search import TABLE_SIZE, TranspositionTable, SearchStats, astar
+
+# States expanded before giving up; plans are short, so less than a full solve
+MAX_STATES = 200_000
+
+Cell = Tuple[int, int]
+
+
+class RuleChange(NamedTuple):
+    step: int  # moves made when the rules changed (1 = after the first move)
+    move: str
+    formed: Tuple[str, ...]
+    broken: Tuple[str, ...]
+
+
+class PushPlan(NamedTuple):
+    word: str
+    target: Cell
+    moves: Optional[List[str]]  # None if no plan was found
+    changes: List[RuleChange]
+    expanded: int
+    seconds: float
+
+    @property
+    def found(self) -> bool:
+        return self.moves is not None
+
+    @property
+    def formed(self) -> List[str]:
+        """Rules active at the end that were not at the start."""
+        return _net(self.changes)[0]
+
+    @property
+    def broken(self) -> List[str]:
+        """Rules active at the start that are gone at the end."""
+        return _net(self.changes)[1]
+
+    def to_dict(self) -> dict:
+        return {
+            "word": self.word,
+            "target": list(self.target),
+            "moves": self.moves,
+            "formed": self.formed,
+            "broken": self.broken,
+            "changes": [change._asdict() for change in self.changes],
+            "expanded": self.expanded,
+            "seconds": self.seconds,
+        }
+
+
+def _net(changes: List[RuleChange]) -> Tuple[List[str], List[str]]:
+    formed: List[str] = []
+    broken: List[str] = []
+    for change in changes:
+        for rule in change.formed:
+            if rule in broken:
+                broken.remove(rule)
+            else:
+                formed.append(rule)
+        for rule in change.broken:
+            if rule in formed:
+                formed.remove(rule)
+            else:
+                broken.append(rule)
+    return formed, broken
+
+
+def rule_changes(model: SearchModel, moves: List[str]) -> List[RuleChange]:
+    """Replay `moves` from the initial state and list each change of rules."""
+    changes = []
+    state = model.initial
+    rules = [str(rule) for rule in model.rules(state).rules]
+    for step, move in enumerate(moves, 1):
+        state, _ = model.step(state, move)
+        after = [str(rule) for rule in model.rules(state).rules]
+        formed = tuple(rule for rule in after if rule not in rules)
+        broken = tuple(rule for rule in rules if rule not in after)
+        if formed or broken:
+            changes.append(RuleChange(step, move, formed, broken))
+        rules = after
+    return changes
+
+
+def plan_push(
+    level: LevelState,
+    word: str,
+    target: Cell,
+    max_states: int = MAX_STATES,
+    table_size: int = TABLE_SIZE,
+) -> PushPlan:
+    """Plan the shortest push of a `word` text tile onto `target` (x, y).
+
+    Raises:
+        ValueError: The level has no such text, or the target is off the board
+    """
+    model = SearchModel(level)
+    entity = model.entity_index.get(f"text_{word}")
+    if entity is None:
+        raise ValueError(f"No text_{word} in the level")
+    x, y = target
+    if not (1 <= x <= model.width - 2 and 1 <= y <= model.height - 2):
+        raise ValueError(f"Target {target} is outside the level")
+
+    cells, width = model.cells, model.width
+    goal_unit = entity * cells + y * width + x
+    dead = DeadlockTable(model, model.initial)
+    # From a wall line a word can only reach other dead squares
+    target_live = dead.kind(x, y) == LIVE
+
+    def heuristic(state: SearchState) -> float:
+        you = model.points(model.cells_of(state, model.rules(state).you))
+        best = math.inf
+        for unit in model.of_entity(state.units, entity):
+            cell = unit % cells
+            kind = dead.squares[cell]
+            if kind == CORNER or (kind != LIVE and target_live):
+                continue
+            bx, by = cell % width, cell // width
+            walk = min((abs(bx - ux) + abs(by - uy) for ux, uy in you), default=math.inf)
+            best = min(best, abs(bx - x) + abs(by - y) + max(0, walk - 1))
+        return best
+
+    def goal(state: SearchState, won: bool) -> bool:
+        return goal_unit in state.units
+
+    stats = SearchStats(max_states)
+    start = time.perf_counter()
+    moves = astar(model, TranspositionTable(table_size), stats, heuristic=heuristic, goal=goal)
+    seconds = time.perf_counter() - start
+    changes = rule_changes(model, moves) if moves else []
+    return PushPlan(word, (x, y), moves, changes, stats.expanded, seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shortest moves pushing a text tile onto a cell")
+    parser.add_argument("level", type=Path, help="Grid JSON or captured world_data.txt")
+    parser.add_argument("--word", required=True, help="Word on the text tile, e.g. flag")
+    parser.add_argument("--to", required=True, help="Target cell as x,y")
+    parser.add_argument("--max-states", type=int, default=MAX_STATES)
+    args = parser.parse_args()
+
+    x, y = (int(v) for v in args.to.split(","))
+    plan = plan_push(load_level(args.level), args.word, (x, y), args.max_states)
+    if not plan.found:
+        print(f"No way to push {args.word} to ({x}, {y}) ({plan.expanded} states)")
+        exit(1)
+    print(f"{len(plan.moves)} moves ({plan.expanded} states, {plan.seconds:.2f}s):")
+    print(",".join(plan.moves) or "(already there)")
+    for change in plan.changes:
+        parts = [f"+{rule}" for rule in change.formed] + [f"-{rule}" for rule in change.broken]
+        print(f"  after move {change.step} ({change.move}): {', '.join(parts)}")
+
+
+if __name__ == "__main__":
+    main()
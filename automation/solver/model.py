@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Compact search model of a level for the offline solver.
+
+Turn resolution is the one of automation.sim.engine (YOU moves with push
+chains, STOP, transforms, SINK/DEFEAT/HOT+MELT, WIN, rules re-read after each
+phase), but a state is only a sorted tuple of `entity * cells + cell` ints, so
+it can be hashed and compared cheaply. Unit identity and facing direction are
+dropped: neither changes what happens next.
+
+Objects whose noun is not spelled by any text in the level can never get a
+property or transform, so they are left out of the search entirely (floor
+tiles, decoration).
+
+Every state carries its Zobrist key: the sum (mod 2**64) of one random 64-bit
+number per (entity, cell) it contains, updated incrementally as units move.
+Keys are added rather than XOR-ed so two identical units on one cell do not
+cancel out. The key of the text units alone selects the cached rule table.
+
+Usage:
+    model = SearchModel(load_level(path))
+    state = model.initial
+    child, won = model.step(state, "right")
+"""
+
+import random
+from bisect import bisect_left
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from automation.sim.rules import (
+    TEXT_NOUN,
+    Rule,
+    is_noun,
+    parse_rules,
+    properties_by_noun,
+    transforms_by_noun,
+)
+from automation.sim.state import DIRECTIONS, LevelState, Unit, is_text
+
+# Properties the model gives behaviour to, as bit flags
+PROPS = ("you", "win", "stop", "push", "defeat", "sink", "hot", "melt")
+YOU, WIN, STOP, PUSH, DEFEAT, SINK, HOT, MELT = (1 << i for i in range(len(PROPS)))
+
+# Moves tried from every state, in the game's direction order
+MOVES = tuple(DIRECTIONS)
+
+# Fixed so keys (and tie-breaking between equal solutions) are reproducible
+ZOBRIST_SEED = 0xBABA
+
+KEY_MASK = (1 << 64) - 1
+
+
+class SearchState(NamedTuple):
+    units: Tuple[int, ...]  # sorted entity * cells + cell
+    key: int  # Zobrist key of all units
+    text_key: int  # Zobrist key of the text units only
+
+
+class RuleTable:
+    """A set of active rules as per-entity lookups."""
+
+    def __init__(self, model: "SearchModel", rules: Tuple[Rule, ...]):
+        self.rules = rules
+        props = properties_by_noun(self.rules)
+        text_props = props.get(TEXT_NOUN, frozenset()) | {"push"}
+        transforms = transforms_by_noun(self.rules)
+
+        self.props: List[int] = []
+        self.transform: List[int] = []
+        for entity in model.entities:
+            text = is_text(entity)
+            noun = TEXT_NOUN if text else entity
+            self.props.append(_prop_bits(text_props if text else props.get(noun, frozenset())))
+            target = transforms.get(noun)
+            if target == TEXT_NOUN:
+                target = None if text else f"text_{entity}"
+            self.transform.append(model.entity_index.get(target, -1) if target else -1)
+        self.transforms = any(t >= 0 for t in self.transform)
+        self.you = [e for e, p in enumerate(self.props) if p & YOU]
+        # (entity, pushable) for every entity that a move cannot pass through
+        self.blockers = [(e, bool(p & PUSH)) for e, p in enumerate(self.props) if p & (PUSH | STOP)]
+        self.win = [e for e, p in enumerate(self.props) if p & WIN]
+        # Whether any combination of units on a cell destroys something
+        self.destroys = any(p & SINK for p in self.props) or (
+            any(p & DEFEAT for p in self.props) and bool(self.you)
+        ) or (any(p & HOT for p in self.props) and any(p & MELT for p in self.props))
+        # Whether WIN units can be moved towards a YOU unit
+        self.win_moves = any(self.props[e] & (PUSH | YOU) for e in self.win)
+
+
+def _prop_bits(props: FrozenSet[str]) -> int:
+    bits = 0
+    for i, prop in enumerate(PROPS):
+        if prop in props:
+            bits |= 1 << i
+    return bits
+
+
+class SearchModel:
+    """Entity vocabulary, Zobrist keys and turn resolution for one level."""
+
+    def __init__(self, level: LevelState, seed: int = ZOBRIST_SEED):
+        self.level = level
+        self.width = level.width
+        self.height = level.height
+        self.cells = level.width * level.height
+
+        names = {unit.name for unit in level.units}
+        words = {name[len("text_"):] for name in names if is_text(name)}
+        nouns = {word for word in words if is_noun(word) and word != TEXT_NOUN}
+        entities = {name for name in names if is_text(name) or name in nouns} | nouns
+        if TEXT_NOUN in words:
+            # "X IS TEXT" turns objects into the text spelling them
+            entities |= {f"text_{noun}" for noun in nouns}
+        self.entities: List[str] = sorted(entities)
+        self.entity_index: Dict[str, int] = {e: i for i, e in enumerate(self.entities)}
+        self.is_text = [is_text(e) for e in self.entities]
+
+        rng = random.Random(seed)
+        self.zobrist = [rng.getrandbits(64) for _ in range(len(self.entities) * self.cells)]
+        self._rules: Dict[int, RuleTable] = {}  # text key -> rules
+        self._tables: Dict[Tuple[Rule, ...], RuleTable] = {}
+
+        units = sorted(
+            self.entity_index[u.name] * self.cells + u.y * self.width + u.x
+            for u in level.units
+            if u.name in self.entity_index and 0 <= u.x < self.width and 0 <= u.y < self.height
+        )
+        self.initial = self.make_state(units)
+
+    # -- states ----------------------------------------------------------------
+
+    def make_state(self, units) -> SearchState:
+        units = tuple(sorted(units))
+        key = text_key = 0
+        for unit in units:
+            if self.is_text[unit // self.cells]:
+                text_key += self.zobrist[unit]
+            key += self.zobrist[unit]
+        return SearchState(units, key & KEY_MASK, text_key & KEY_MASK)
+
+    def decode(self, state: SearchState) -> List[Tuple[str, int, int]]:
+        """(entity, x, y) of every unit in the state."""
+        result = []
+        for unit in state.units:
+            entity, cell = divmod(unit, self.cells)
+            y, x = divmod(cell, self.width)
+            result.append((self.entities[entity], x, y))
+        return result
+
+    def rules(self, state: SearchState) -> RuleTable:
+        return self._rules_for(state.text_key, state.units)
+
+    def _rules_for(self, text_key: int, units) -> RuleTable:
+        table = self._rules.get(text_key)
+        if table is None:
+            text_units = []
+            for unit in units:
+                entity, cell = divmod(unit, self.cells)
+                if self.is_text[entity]:
+                    y, x = divmod(cell, self.width)
+                    text_units.append(Unit(len(text_units), self.entities[entity], x, y))
+            rules = tuple(parse_rules(text_units))
+            table = self._tables.get(rules)
+            if table is None:
+                # Most text layouts spell the same rules
+                table = self._tables[rules] = RuleTable(self, rules)
+            self._rules[text_key] = table
+        return table
+
+    # -- turn resolution -------------------------------------------------------
+
+    def step(self, state: SearchState, move: str) -> Tuple[SearchState, bool]:
+        """The state after one move, and whether it is won."""
+        dx, dy, _ = DIRECTIONS[move]
+        cells, width, height = self.cells, self.width, self.height
+        zobrist, is_text_entity = self.zobrist, self.is_text
+        delta = dy * width + dx
+        units = state.units
+        key, text_key = state.key, state.text_key
+        rules = self._rules_for(text_key, units)
+
+        # Movement. Units are values, so a cell is probed by looking up
+        # entity * cells + cell for the few entities that can block or be
+        # pushed. `count` holds the number of units for every value touched
+        # this turn and `moved` those of them that already moved.
+        movers = [u for e in rules.you for u in self.of_entity(units, e)]
+        # Units furthest along the direction move first
+        if len(movers) > 1:
+            movers.sort(key=lambda u: -((u % cells % width) * dx + (u % cells // width) * dy))
+        present = set(units)
+        count: Dict[int, int] = {}
+        moved: Dict[int, int] = {}
+        blockers = rules.blockers
+        changes = []
+        for mover in movers:
+            if mover not in count:
+                count[mover] = units.count(mover)
+            if count[mover] <= moved.get(mover, 0):
+                continue
+            chain = []
+            cell = mover % cells
+            x, y = cell % width, cell // width
+            while chain is not None:
+                x, y, cell = x + dx, y + dy, cell + delta
+                if not (1 <= x <= width - 2 and 1 <= y <= height - 2):
+                    chain = None
+                    break
+                pushed = False
+                for entity, push in blockers:
+                    unit = entity * cells + cell
+                    if count[unit] if unit in count else unit in present:
+                        if not push:
+                            chain = None
+                            break
+                        chain.append(unit)
+                        pushed = True
+                if not pushed:
+                    break
+            if chain is None:
+                continue
+            for index, unit in enumerate([mover] + chain):
+                if unit not in count:
+                    count[unit] = units.count(unit)
+                # The mover moves alone, pushed units together with
+                # everything still unmoved on their cell
+                n = 1 if index == 0 else count[unit] - moved.get(unit, 0)
+                if n <= 0:
+                    continue
+                target = unit + delta
+                if target not in count:
+                    count[target] = units.count(target)
+                changes.append((unit, n))
+                count[unit] -= n
+                count[target] += n
+                moved[target] = moved.get(target, 0) + n
+        if changes:
+            units = list(units)
+            for unit, n in changes:
+                for _ in range(n):
+                    units.remove(unit)
+                    units.append(unit + delta)
+                change = (zobrist[unit + delta] - zobrist[unit]) * n
+                key += change
+                if is_text_entity[unit // cells]:
+                    text_key += change
+            units.sort()
+            text_key &= KEY_MASK
+            rules = self._rules_for(text_key, units)
+
+        if rules.transforms:
+            transform = rules.transform
+            changed = []
+            for i, unit in enumerate(units):
+                entity, cell = divmod(unit, cells)
+                target = transform[entity]
+                if target >= 0:
+                    changed.append((i, entity, target * cells + cell))
+            if changed:
+                units = list(units)
+                for i, entity, new in changed:
+                    old = units[i]
+                    units[i] = new
+                    key += zobrist[new] - zobrist[old]
+                    if is_text_entity[entity]:
+                        text_key -= zobrist[old]
+                    if is_text_entity[new // cells]:
+                        text_key += zobrist[new]
+                units.sort()
+                text_key &= KEY_MASK
+                rules = self._rules_for(text_key, units)
+
+        if rules.destroys:
+            destroyed = self._destroyed(units, rules)
+            if destroyed:
+                units = list(units)
+                for unit in destroyed:
+                    units.remove(unit)
+                    key -= zobrist[unit]
+                    if is_text_entity[unit // cells]:
+                        text_key -= zobrist[unit]
+                text_key &= KEY_MASK
+                rules = self._rules_for(text_key, units)
+
+        child = SearchState(tuple(units), key & KEY_MASK, text_key)
+        return child, self.is_won(child, rules)
+
+    def _destroyed(self, units, rules: RuleTable) -> List[int]:
+        """Units destroyed by SINK, DEFEAT or HOT/MELT, with repetitions."""
+        cells, props = self.cells, rules.props
+        occupancy: Dict[int, List[int]] = {}
+        for unit in units:
+            occupancy.setdefault(unit % cells, []).append(unit)
+        destroyed = []
+        for members in occupancy.values():
+            bits = [props[unit // cells] for unit in members]
+            if len(members) > 1 and any(b & SINK for b in bits):
+                destroyed.extend(members)
+                continue
+            if any(b & DEFEAT for b in bits):
+                destroyed.extend(u for u, b in zip(members, bits) if b & YOU)
+            if any(b & HOT for b in bits):
+                destroyed.extend(u for u, b in zip(members, bits) if b & MELT)
+        return destroyed
+
+    def of_entity(self, units, entity: int):
+        """The units of one entity: a slice, since units are sorted."""
+        start = bisect_left(units, entity * self.cells)
+        return units[start:bisect_left(units, (entity + 1) * self.cells, start)]
+
+    def is_won(self, state: SearchState, rules: Optional[RuleTable] = None) -> bool:
+        rules = rules or self.rules(state)
+        if not rules.you or not rules.win:
+            return False
+        return not self.cells_of(state, rules.you).isdisjoint(self.cells_of(state, rules.win))
+
+    def cells_of(self, state: SearchState, entities: List[int]) -> set:
+        """Cells holding a unit of any of `entities`."""
+        cells = self.cells
+        return {unit % cells for entity in entities for unit in self.of_entity(state.units, entity)}
+
+    def heuristic(self, state: SearchState) -> int:
+        """Estimated moves left, a lower bound while the rules hold.
+
+        With YOU and WIN units on the board: the Manhattan distance between
+        the nearest pair, halved when WIN units can move too. Without: the
+        distance from YOU to the nearest text, as some rule has to change.
+        Pushing text can change the rules in one move, so this guides the
+        search rather than bounding it.
+        """
+        rules = self.rules(state)
+        you = self.points(self.cells_of(state, rules.you))
+        if not you:
+            return 0
+        win = self.points(self.cells_of(state, rules.win))
+        if win:
+            distance = min(abs(x1 - x2) + abs(y1 - y2) for x1, y1 in you for x2, y2 in win)
+            return (distance + 1) // 2 if rules.win_moves else distance
+        cells = self.cells
+        text = self.points({u % cells for u in state.units if self.is_text[u // cells]})
+        if not text:
+            return 1
+        return max(1, min(abs(x1 - x2) + abs(y1 - y2) for x1, y1 in you for x2, y2 in text) - 1)
+
+    def points(self, cells) -> List[Tuple[int, int]]:
+        """(x, y) of each cell index."""
+        width = self.width
+        return [(c % width, c // width) for c in cells]
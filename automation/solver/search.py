@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+BFS, A* and IDA* over full level states.
+
+All three expand states with SearchModel.step, so pushing text to make or
+break rules is part of the search like any other move. Duplicates are found
+by Zobrist key in a TranspositionTable of bounded size: when it is full the
+oldest entries are dropped, which can only cost re-expansions, never a wrong
+answer.
+
+BFS returns a shortest solution. A* and IDA* use SearchModel.heuristic, which
+stays a lower bound only while the rules do not change, so their solutions
+are near-optimal; a weight above 1 trades more length for speed. Every
+solution is replayed through automation.sim.engine before it is returned.
+
+Usage:
+    solution = solve(load_level(path), algorithm="bfs")
+    solution.moves             # ["right", "right", "up", ...] or None
+"""
+
+import heapq
+import math
+import time
+from collections import deque
+from itertools import count
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from automation.sim.engine import Game
+from automation.sim.state import LevelState
+from automation.solver.model import MOVES, SearchModel, SearchState
+
+ALGORITHMS = ("bfs", "astar", "idastar")
+
+# Entries kept in the transposition table (Zobrist key -> depth)
+TABLE_SIZE = 2_000_000
+
+# States expanded before giving up
+MAX_STATES = 2_000_000
+
+# IDA* never searches deeper than this many moves
+MAX_DEPTH = 200
+
+
+class TranspositionTable:
+    """Zobrist key -> shallowest depth seen, evicting the oldest entries."""
+
+    def __init__(self, capacity: int = TABLE_SIZE):
+        self.capacity = capacity
+        self._depths: Dict[int, int] = {}
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._depths)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._depths
+
+    def get(self, key: int) -> Optional[int]:
+        return self._depths.get(key)
+
+    def store(self, key: int, depth: int) -> bool:
+        """Record `key` at `depth`. False if it was already seen as shallow."""
+        known = self._depths.get(key)
+        if known is not None and known <= depth:
+            return False
+        if known is None and len(self._depths) >= self.capacity:
+            del self._depths[next(iter(self._depths))]
+            self.evictions += 1
+        self._depths[key] = depth
+        return True
+
+    def clear(self):
+        self._depths.clear()
+
+
+class Solution(NamedTuple):
+    moves: Optional[List[str]]  # None if no solution was found
+    algorithm: str
+    optimal: bool  # moves is a shortest solution
+    expanded: int  # states whose children were generated
+    generated: int  # children generated
+    seconds: float
+    verified: bool  # the object engine wins with these moves
+
+    @property
+    def found(self) -> bool:
+        return self.moves is not None
+
+    def to_dict(self) -> dict:
+        return {**self._asdict(), "length": len(self.moves) if self.found else None}
+
+
+class _Node:
+    __slots__ = ("state", "parent", "move", "depth")
+
+    def __init__(self, state: SearchState, parent: Optional["_Node"], move: Optional[str], depth: int):
+        self.state = state
+        self.parent = parent
+        self.move = move
+        self.depth = depth
+
+    def moves(self) -> List[str]:
+        moves = []
+        node = self
+        while node.parent is not None:
+            moves.append(node.move)
+            node = node.parent
+        moves.reverse()
+        return moves
+
+
+class SearchStats:
+    """Expansion budget and counters shared by the searches."""
+
+    def __init__(self, max_states: int):
+        self.max_states = max_states
+        self.expanded = 0
+        self.generated = 0
+
+    def expand(self) -> bool:
+        """Count one expansion. False once the budget is used up."""
+        self.expanded += 1
+        return self.expanded <= self.max_states
+
+
+def bfs(model: SearchModel, table: TranspositionTable, stats: SearchStats) -> Optional[List[str]]:
+    """Breadth-first: the first win found is a shortest one."""
+    root = _Node(model.initial, None, None, 0)
+    if model.is_won(root.state):
+        return []
+    table.store(root.state.key, 0)
+    frontier = deque([root])
+    while frontier:
+        node = frontier.popleft()
+        if not stats.expand():
+            return None
+        for move in MOVES:
+            state, won = model.step(node.state, move)
+            stats.generated += 1
+            if won:
+                return _Node(state, node, move, node.depth + 1).moves()
+            if table.store(state.key, node.depth + 1):
+                frontier.append(_Node(state, node, move, node.depth + 1))
+    return None
+
+
+def astar(
+    model: SearchModel,
+    table: TranspositionTable,
+    stats: SearchStats,
+    weight: float = 1.0,
+    heuristic: Optional[Callable[[SearchState], float]] = None,
+    goal: Optional[Callable[[SearchState, bool], bool]] = None,
+) -> Optional[List[str]]:
+    """Best-first on depth + weight * heuristic, goal tested on expansion.
+
+    `goal(state, won)` defaults to winning the level; with another goal, won
+    states are dead ends since the game leaves the level. States the
+    heuristic rates infinite are dropped.
+    """
+    heuristic = heuristic or model.heuristic
+    goal = goal or (lambda state, won: won)
+    root = _Node(model.initial, None, None, 0)
+    if goal(root.state, model.is_won(root.state)):
+        return []
+    table.store(root.state.key, 0)
+    tie = count()
+    frontier = [(weight * heuristic(root.state), next(tie), root, False)]
+    while frontier:
+        _, _, node, reached = heapq.heappop(frontier)
+        if reached:
+            return node.moves()
+        known = table.get(node.state.key)
+        if known is not None and node.depth > known:
+            continue  # reached more cheaply since it was queued
+        if not stats.expand():
+            return None
+        depth = node.depth + 1
+        for move in MOVES:
+            state, won = model.step(node.state, move)
+            stats.generated += 1
+            reached = goal(state, won)
+            if reached:
+                heapq.heappush(frontier, (depth, next(tie), _Node(state, node, move, depth), True))
+            elif not won and table.store(state.key, depth):
+                estimate = heuristic(state)
+                if estimate != math.inf:
+                    priority = depth + weight * estimate
+                    heapq.heappush(frontier, (priority, next(tie), _Node(state, node, move, depth), False))
+    return None
+
+
+def idastar(
+    model: SearchModel,
+    table: TranspositionTable,
+    stats: SearchStats,
+    weight: float = 1.0,
+    max_depth: int = MAX_DEPTH,
+) -> Optional[List[str]]:
+    """Iterative deepening on depth + weight * heuristic.
+
+    Memory stays at the current path plus the table, which is cleared between
+    iterations and prunes states already reached at the same or a smaller
+    depth within one (including the states on the current path).
+    """
+    path: List[str] = []
+    exhausted = False
+
+    def search(state: SearchState, depth: int, bound: float) -> float:
+        nonlocal exhausted
+        estimate = depth + weight * model.heuristic(state)
+        if estimate > bound:
+            return estimate
+        if depth >= max_depth:
+            return float("inf")
+        if not stats.expand():
+            exhausted = True
+            return float("inf")
+        smallest = float("inf")
+        for move in MOVES:
+            child, won = model.step(state, move)
+            stats.generated += 1
+            if won:
+                path.append(move)
+                return -1
+            if not table.store(child.key, depth + 1):
+                continue
+            path.append(move)
+            result = search(child, depth + 1, bound)
+            if result < 0:
+                return result
+            path.pop()
+            if exhausted:
+                return float("inf")
+            smallest = min(smallest, result)
+        return smallest
+
+    if model.is_won(model.initial):
+        return []
+    bound = weight * model.heuristic(model.initial)
+    while True:
+        table.clear()
+        table.store(model.initial.key, 0)
+        result = search(model.initial, 0, bound)
+        if result < 0:
+            return path
+        if exhausted or result == float("inf"):
+            return None
+        bound = result
+
+
+def verify(level: LevelState, moves: List[str]) -> bool:
+    """Whether the object engine wins the level with exactly these moves."""
+    game = Game(level)
+    for move in moves:
+        if game.step(move):
+            return True
+    return game.won
+
+
+def solve(
+    level: LevelState,
+    algorithm: str = "bfs",
+    weight: float = 1.0,
+    max_states: int = MAX_STATES,
+    table_size: int = TABLE_SIZE,
+) -> Solution:
+    """Search `level` for a winning move list.
+
+    Raises:
+        ValueError: Unknown algorithm
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm: {algorithm} (expected one of {', '.join(ALGORITHMS)})")
+    model = SearchModel(level)
+    table = TranspositionTable(table_size)
+    stats = SearchStats(max_states)
+    start = time.perf_counter()
+    if algorithm == "bfs":
+        moves = bfs(model, table, stats)
+    elif algorithm == "astar":
+        moves = astar(model, table, stats, weight)
+    else:
+        moves = idastar(model, table, stats, weight)
+    seconds = time.perf_counter() - start
+    return Solution(
+        moves=moves,
+        algorithm=algorithm,
+        optimal=moves is not None and algorithm == "bfs",
+        expanded=stats.expanded,
+        generated=stats.generated,
+        seconds=seconds,
+        verified=moves is not None and verify(level, moves),
+    )
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Compact decoder for the unit records in world_data.txt's `state=` line.
+
+lua/io.lua writes every unit as a `|`-separated record of 21 fields and joins
+the records with `€`. This module parses that line once into parallel arrays
+(entity id, x, y, dir, unit id) with entity names interned in a process-wide
+vocabulary, and builds the indexes analysis code needs: cell -> units,
+entity -> units and the list of text tiles. Views over those indexes never
+copy or re-split strings.
+
+Usage:
+    from automation.state_codec import StateTable
+
+    table = StateTable.from_world_data(STATE_PATH)
+    table.positions("baba")     # [(x, y), ...]
+    table.names_at(x, y)        # ("baba", "tile")
+    table.grid()[y][x]          # same, 0-based over the playable area
+    for i in table.text_tiles(): ...
+"""
+
+import sys
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from automation.config import STATE_PATH
+from automation.world_data import WorldData
+
+UNIT_SEPARATOR = "€"
+FIELD_SEPARATOR = "|"
+FIELD_COUNT = 21
+
+# Field positions inside a unit record (see the unit_data table in io.lua)
+F_KEY = 0
+F_NAME = 1
+F_TYPE = 2
+F_X = 3
+F_Y = 4
+F_DIR = 5
+F_ID = 20
+
+TEXT_PREFIX = "text_"
+
+
+class Vocabulary:
+    """Process-wide entity name <-> small integer id mapping.
+
+    Ids are stable for the lifetime of the process, so tables decoded from
+    different states can be compared by id.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.is_text: List[bool] = []
+        self._lock = threading.Lock()
+
+    def intern(self, name: str) -> int:
+        entity_id = self._ids.get(name)
+        if entity_id is not None:
+            return entity_id
+        with self._lock:
+            entity_id = self._ids.get(name)
+            if entity_id is None:
+                entity_id = len(self.names)
+                self.names.append(sys.intern(name))
+                self.is_text.append(name.startswith(TEXT_PREFIX))
+                self._ids[name] = entity_id
+            return entity_id
+
+    def get(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+VOCABULARY = Vocabulary()
+
+
+def _int(value: str, default: int = 0) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return int(float(value))
+        except ValueError:
+            return default
+
+
+class StateTable:
+    """Units of one level state as parallel arrays.
+
+    Row i describes one unit: `entity[i]` (vocabulary id), `x[i]`, `y[i]`,
+    `dir[i]` and `uid[i]` (the game's unit id). Coordinates are the game's,
+    which include a one-cell border. Records with fewer than 21 fields are
+    skipped, like the TS tools do.
+    """
+
+    __slots__ = (
+        "width", "height", "entity", "x", "y", "dir", "uid",
+        "_source", "_spans", "_cells", "_by_entity", "_text",
+    )
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.entity = array("H")
+        self.x = array("h")
+        self.y = array("h")
+        self.dir = array("b")
+        self.uid = array("q")
+        self._source = ""
+        self._spans = array("l")  # start/end offsets of each record in _source
+        self._cells: Optional[Dict[Tuple[int, int], Tuple[int, ...]]] = None
+        self._by_entity: Optional[Dict[int, array]] = None
+        self._text: Optional[array] = None
+
+    # -- decoding ------------------------------------------------------------
+
+    @classmethod
+    def parse(
+        cls,
+        state: str,
+        room_size: Tuple[int, int],
+        vocabulary: Vocabulary = VOCABULARY,
+    ) -> "StateTable":
+        """Decode a `state=` value."""
+        table = cls(*room_size)
+        table._source = state
+        intern = vocabulary.intern
+        start = 0
+        length = len(state)
+        while start < length:
+            end = state.find(UNIT_SEPARATOR, start)
+            if end < 0:
+                end = length
+            if end > start:
+                fields = state[start:end].split(FIELD_SEPARATOR, FIELD_COUNT)
+                if len(fields) >= FIELD_COUNT:
+                    table.entity.append(intern(fields[F_NAME]))
+                    table.x.append(_int(fields[F_X]))
+                    table.y.append(_int(fields[F_Y]))
+                    table.dir.append(_int(fields[F_DIR]))
+                    table.uid.append(_int(fields[F_ID], len(table.uid)))
+                    table._spans.append(start)
+                    table._spans.append(end)
+            start = end + len(UNIT_SEPARATOR)
+        return table
+
+    @classmethod
+    def from_world_data(cls, path: Path = STATE_PATH) -> Optional["StateTable"]:
+        """Decode the current state of a world_data.txt, None if it has none."""
+        world = WorldData.for_path(path)
+        values = world.read(["state", "room_size"])
+        room_size = world.room_size()
+        if values["state"] is None or room_size is None:
+            return None
+        return cls.parse(values["state"], room_size)
+
+    # -- rows ----------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.entity)
+
+    def name(self, row: int) -> str:
+        return VOCABULARY.names[self.entity[row]]
+
+    def names(self) -> Iterator[str]:
+        names = VOCABULARY.names
+        return (names[e] for e in self.entity)
+
+    def is_text(self, row: int) -> bool:
+        return VOCABULARY.is_text[self.entity[row]]
+
+    def record(self, row: int) -> str:
+        """The raw 21-field record of a row, as written by the game.
+
+        Empty for tables that were not decoded from a `state=` value.
+        """
+        if not self._spans:
+            return ""
+        return self._source[self._spans[2 * row] : self._spans[2 * row + 1]]
+
+    # -- indexes -------------------------------------------------------------
+
+    @property
+    def cells(self) -> Dict[Tuple[int, int], Tuple[int, ...]]:
+        """(x, y) -> rows on that cell, in file order. Built on first use."""
+        if self._cells is None:
+            cells: Dict[Tuple[int, int], List[int]] = {}
+            for row, key in enumerate(zip(self.x, self.y)):
+                cells.setdefault(key, []).append(row)
+            self._cells = {key: tuple(rows) for key, rows in cells.items()}
+        return self._cells
+
+    @property
+    def by_entity(self) -> Dict[int, array]:
+        """entity id -> rows of that entity. Built on first use."""
+        if self._by_entity is None:
+            by_entity: Dict[int, array] = {}
+            for row, entity_id in enumerate(self.entity):
+                rows = by_entity.get(entity_id)
+                if rows is None:
+                    rows = by_entity[entity_id] = array("l")
+                rows.append(row)
+            self._by_entity = by_entity
+        return self._by_entity
+
+    def rows_of(self, name: str) -> Sequence[int]:
+        entity_id = VOCABULARY.get(name)
+        if entity_id is None:
+            return ()
+        return self.by_entity.get(entity_id, ())
+
+    def positions(self, name: str) -> List[Tuple[int, int]]:
+        """Game coordinates of every unit called `name`."""
+        xs, ys = self.x, self.y
+        return [(xs[row], ys[row]) for row in self.rows_of(name)]
+
+    def rows_at(self, x: int, y: int) -> Tuple[int, ...]:
+        return self.cells.get((x, y), ())
+
+    def names_at(self, x: int, y: int) -> Tuple[str, ...]:
+        names = VOCABULARY.names
+        return tuple(names[self.entity[row]] for row in self.rows_at(x, y))
+
+    def text_tiles(self) -> Sequence[int]:
+        """Rows of all text units."""
+        if self._text is None:
+            is_text = VOCABULARY.is_text
+            self._text = array("l", (r for r, e in enumerate(self.entity) if is_text[e]))
+        return self._text
+
+    def grid(self) -> "GridView":
+        """Row-major view over the playable area, like the TS string grids."""
+        return GridView(self)
+
+
+class GridView:
+    """grid[y][x] -> names on playable cell (x, y), both 0-based.
+
+    Mirrors the `string[][]` grids of the TS tools without materializing
+    them; `cell_string` gives the `<`-joined form when it is needed.
+    """
+
+    __slots__ = ("table", "width", "height")
+
+    def __init__(self, table: StateTable):
+        self.table = table
+        self.width = table.width - 2
+        self.height = table.height - 2
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __getitem__(self, y: int) -> "_RowView":
+        if not 0 <= y < self.height:
+            raise IndexError(y)
+        return _RowView(self.table, y, self.width)
+
+    def __iter__(self) -> Iterator["_RowView"]:
+        return (self[y] for y in range(self.height))
+
+    def cell_string(self, x: int, y: int) -> str:
+        return "<".join(self.table.names_at(x + 1, y + 1))
+
+
+class _RowView:
+    __slots__ = ("table", "y", "width")
+
+    def __init__(self, table: StateTable, y: int, width: int):
+        self.table = table
+        self.y = y
+        self.width = width
+
+    def __len__(self) -> int:
+        return self.width
+
+    def __getitem__(self, x: int) -> Tuple[str, ...]:
+        if not 0 <= x < self.width:
+            raise IndexError(x)
+        return self.table.names_at(x + 1, self.y + 1)
+
+    def __iter__(self) -> Iterator[Tuple[str, ...]]:
+        return (self[x] for x in range(self.width))
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Follows the delta log written by lua/io.lua and keeps the current state.
+
+With DELTA_EXPORT = true in io.lua, every state export appends one block to
+state.delta (next to the commands directory):
+
+    F <seq> <last_processed> <room width> <room height>    full state
+    D <seq> <last_processed>                              changes only
+    + <record>                                            added / changed unit
+    - <id>                                                removed unit
+    E <seq>                                               end of block
+
+Units are keyed by their ID field (or "k<key>" when the game leaves it
+empty). Level start writes a full block and truncates the log. Only complete
+blocks are applied; if a sequence number is missing, the state is resynced
+from the full `state=` value in world_data.txt before applying the block.
+
+Usage:
+    deltas = DeltaApplier(DELTA_PATH, STATE_PATH)
+    for block in deltas.poll():
+        print(block.seq, len(block.upserts), block.removals)
+    table = deltas.table()
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from automation.config import DELTA_PATH, STATE_PATH
+from automation.state_codec import (
+    F_ID,
+    F_KEY,
+    FIELD_COUNT,
+    FIELD_SEPARATOR,
+    UNIT_SEPARATOR,
+    StateTable,
+)
+from automation.world_data import WorldData
+
+
+class DeltaBlock(NamedTuple):
+    full: bool
+    seq: int
+    last_processed: int
+    room_size: Optional[Tuple[int, int]]
+    upserts: List[str]  # raw records
+    removals: List[str]  # unit keys
+
+
+def unit_key(record: str) -> str:
+    """Key of a record, the same way io.lua computes it."""
+    fields = record.split(FIELD_SEPARATOR, FIELD_COUNT)
+    if len(fields) > F_ID and fields[F_ID]:
+        return fields[F_ID]
+    return "k" + fields[F_KEY]
+
+
+def parse_blocks(data: bytes) -> Tuple[List[DeltaBlock], int]:
+    """Complete blocks in `data` and the number of bytes they span."""
+    blocks: List[DeltaBlock] = []
+    consumed = 0
+    position = 0
+    current = None
+    while True:
+        end = data.find(b"\n", position)
+        if end < 0:
+            break
+        line = data[position:end].decode("utf-8", errors="replace")
+        position = end + 1
+        if line.startswith("+ ") and current is not None:
+            current["upserts"].append(line[2:])
+        elif line.startswith("- ") and current is not None:
+            current["removals"].append(line[2:])
+        elif line.startswith(("F ", "D ")):
+            parts = line.split()
+            room_size = None
+            if parts[0] == "F" and len(parts) >= 5:
+                room_size = (int(parts[3]), int(parts[4]))
+            current = {
+                "full": parts[0] == "F",
+                "seq": int(parts[1]),
+                "last_processed": int(parts[2]),
+                "room_size": room_size,
+                "upserts": [],
+                "removals": [],
+            }
+        elif line.startswith("E ") and current is not None:
+            if int(line[2:]) == current["seq"]:
+                blocks.append(DeltaBlock(**current))
+            current = None
+            consumed = position
+    return blocks, consumed
+
+
+class DeltaApplier:
+    """Current level state rebuilt from the delta log."""
+
+    def __init__(self, delta_path: Path = DELTA_PATH, state_path: Path = STATE_PATH):
+        self.delta_path = Path(delta_path)
+        self.state_path = Path(state_path)
+        self.records: Dict[str, str] = {}
+        self.seq: Optional[int] = None
+        self.last_processed: Optional[int] = None
+        self.room_size: Optional[Tuple[int, int]] = None
+        self.resyncs = 0
+        self._offset = 0
+        self._inode: Optional[int] = None
+
+    def resync(self) -> bool:
+        """Reload the full state from world_data.txt."""
+        world = WorldData.for_path(self.state_path)
+        values = world.read(["state", "room_size", "last_processed"])
+        if values["state"] is None:
+            return False
+        self.records = {
+            unit_key(record): record
+            for record in values["state"].split(UNIT_SEPARATOR)
+            if record
+        }
+        self.room_size = world.room_size()
+        self.last_processed = world.last_processed()
+        self.resyncs += 1
+        return True
+
+    def _apply(self, block: DeltaBlock):
+        if block.full:
+            self.records = {unit_key(record): record for record in block.upserts}
+            self.room_size = block.room_size
+        else:
+            if self.seq is None or block.seq != self.seq + 1:
+                self.resync()
+            for record in block.upserts:
+                self.records[unit_key(record)] = record
+            for key in block.removals:
+                self.records.pop(key, None)
+        self.seq = block.seq
+        self.last_processed = block.last_processed
+
+    def poll(self) -> List[DeltaBlock]:
+        """Apply the blocks appended since the last call and return them."""
+        try:
+            with open(self.delta_path, "rb") as f:
+                st = os.fstat(f.fileno())
+                if st.st_ino != self._inode or st.st_size < self._offset:
+                    # Truncated by a level start or replaced: read from the top
+                    self._inode, self._offset = st.st_ino, 0
+                if st.st_size == self._offset:
+                    return []
+                f.seek(self._offset)
+                data = f.read()
+        except OSError:
+            return []
+
+        # A block still being written stays unread until its E line arrives
+        blocks, consumed = parse_blocks(data)
+        self._offset += consumed
+        for block in blocks:
+            self._apply(block)
+        return blocks
+
+    def state_string(self) -> str:
+        """The current state in `state=` format."""
+        return UNIT_SEPARATOR.join(self.records.values())
+
+    def table(self) -> StateTable:
+        return StateTable.parse(self.state_string(), self.room_size or (0, 0))
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Content hashes identifying the code a run was made with.
+
+`tools_hash` is the MD5 of a manifest of every file under .opencode/tools
+(POSIX relative path + MD5 of its contents, sorted by path), so identical
+trees hash the same on every platform regardless of mtimes, owners or tar
+implementations. Per-file digests are cached on disk keyed by (path, mtime,
+size), and the tree hash itself is computed once per process, i.e. once per
+evaluator session.
+
+`commit_hash` is the checked-out commit, read from .git without running git.
+
+Usage:
+    from automation.tools_hash import get_commit_hash, get_tools_hash
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from automation.config import PROJECT_ROOT, TOOLS_HASH_CACHE_PATH
+
+TOOLS_DIR = PROJECT_ROOT / ".opencode" / "tools"
+SKIP_DIRS = {"node_modules", "__pycache__"}
+CHUNK_SIZE = 1024 * 1024
+
+_session_lock = threading.Lock()
+_session_hashes: Dict[Path, str] = {}
+
+
+def file_md5(path: Path) -> str:
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DigestCache:
+    """Per-file digests keyed by path, remembered with the mtime and size."""
+
+    def __init__(self, path: Path = TOOLS_HASH_CACHE_PATH):
+        self.path = Path(path)
+        self.entries: Dict[str, list] = {}
+        self.dirty = False
+        try:
+            self.entries = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            pass
+
+    def digest(self, path: Path) -> str:
+        st = path.stat()
+        key = str(path.resolve())
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+        digest = file_md5(path)
+        self.entries[key] = [st.st_mtime_ns, st.st_size, digest]
+        self.dirty = True
+        return digest
+
+    def save(self):
+        if not self.dirty:
+            return
+        try:
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(self.entries, separators=(",", ":")))
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        except OSError:
+            # Only a cache; the next run hashes again
+            pass
+
+
+def tree_hash(root: Path, cache: Optional[DigestCache] = None) -> str:
+    """MD5 over "<relative path>\\0<file md5>\\n" of every file below `root`."""
+    root = Path(root)
+    cache = cache or DigestCache()
+    manifest = hashlib.md5()
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for name in filenames:
+            path = Path(dirpath) / name
+            files.append((path.relative_to(root).as_posix(), path))
+    for relative, path in sorted(files):
+        manifest.update(f"{relative}\0{cache.digest(path)}\n".encode("utf-8"))
+    cache.save()
+    return manifest.hexdigest()
+
+
+def get_tools_hash(root: Path = TOOLS_DIR) -> str:
+    """Hash of the tools directory, computed once per process."""
+    root = Path(root)
+    with _session_lock:
+        if root not in _session_hashes:
+            try:
+                _session_hashes[root] = tree_hash(root) if root.is_dir() else "unknown"
+            except OSError:
+                _session_hashes[root] = "unknown"
+        return _session_hashes[root]
+
+
+def _git_dir(repo: Path) -> Optional[Path]:
+    git = repo / ".git"
+    if git.is_file():
+        # Worktrees and submodules: "gitdir: <path>"
+        text = git.read_text().strip()
+        if text.startswith("gitdir:"):
+            return (repo / text[len("gitdir:"):].strip()).resolve()
+        return None
+    return git if git.is_dir() else None
+
+
+def _resolve_ref(git_dir: Path, ref: str) -> Optional[str]:
+    loose = git_dir / ref
+    if loose.is_file():
+        return loose.read_text().strip()
+    # Worktrees keep branches in the common directory
+    common = git_dir / "commondir"
+    if common.is_file():
+        common_dir = (git_dir / common.read_text().strip()).resolve()
+        if (common_dir / ref).is_file():
+            return (common_dir / ref).read_text().strip()
+        git_dir = common_dir
+    packed = git_dir / "packed-refs"
+    if packed.is_file():
+        for line in packed.read_text().splitlines():
+            if line.endswith(" " + ref):
+                return line.split(" ", 1)[0]
+    return None
+
+
+def get_commit_hash(repo: Path = PROJECT_ROOT, length: int = 7) -> str:
+    """Abbreviated hash of the checked-out commit, "unknown" outside git."""
+    try:
+        git_dir = _git_dir(Path(repo))
+        if git_dir is None:
+            return "unknown"
+        head = (git_dir / "HEAD").read_text().strip()
+        sha = _resolve_ref(git_dir, head[4:].strip()) if head.startswith("ref:") else head
+    except OSError:
+        return "unknown"
+    return sha[:length] if sha else "unknown"
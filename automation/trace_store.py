@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Compressed, deduplicated storage for solver traces.
+
+A run directory holds:
+
+    trace.jsonl.gz    concatenated compressed members (gzip, or zstd with
+                      the `zstandard` package: trace.jsonl.zst)
+    trace.idx.json    offsets of the members and of every step_finish event
+
+Large strings inside events (tool outputs are mostly repeated grid dumps) are
+stored once in a shared content-addressed blob directory and replaced by
+{"$blob": "<sha256>"} references. Every step_finish event gets a member of
+its own, so the report can read the token series by decompressing only those
+tiny members. Other events are flushed after tool calls and errors, and at
+least every MEMBER_EVENTS events or MEMBER_SECONDS, so a killed supervisor
+only loses a short tail of the trace.
+
+Runs recorded before this format (plain trace.jsonl) are read transparently.
+
+Usage:
+    with TraceWriter(run_dir) as writer:
+        writer.write_event(event)
+
+    reader = TraceReader(run_dir)
+    for tool_calls, event in reader.iter_step_finish():
+        ...
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from automation.config import RESULTS_DIR
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+BLOB_DIR = RESULTS_DIR / "blobs"
+BLOB_MIN_SIZE = 1024  # strings at least this long are stored as blobs
+MEMBER_SIZE = 256 * 1024  # flush a member once this much JSON is buffered
+# ... or this many events, or events this old, so a killed writer loses little
+MEMBER_EVENTS = 32
+MEMBER_SECONDS = 2.0
+# Event types flushed right away: the ones a post-mortem needs most
+FLUSH_EVENT_TYPES = frozenset({"tool_use", "error"})
+
+PLAIN_TRACE = "trace.jsonl"
+INDEX_FILE = "trace.idx.json"
+TRACE_FILES = {"gzip": "trace.jsonl.gz", "zstd": "trace.jsonl.zst"}
+INDEX_VERSION = 1
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    return gzip.compress(data, mtime=0)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+
+class BlobStore:
+    """Content-addressed, gzip-compressed payload store."""
+
+    def __init__(self, root: Path = BLOB_DIR):
+        self.root = Path(root)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.gz"
+
+    def put(self, text: str) -> str:
+        """Store `text` (once) and return its sha256 hex digest."""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(gzip.compress(data, mtime=0))
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> str:
+        return gzip.decompress(self._path(digest).read_bytes()).decode("utf-8")
+
+
+def _externalize(value: Any, blobs: BlobStore) -> Any:
+    if isinstance(value, str):
+        if len(value) >= BLOB_MIN_SIZE:
+            return {"$blob": blobs.put(value)}
+        return value
+    if isinstance(value, dict):
+        return {k: _externalize(v, blobs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_externalize(v, blobs) for v in value]
+    return value
+
+
+def _resolve(value: Any, blobs: BlobStore) -> Any:
+    if isinstance(value, dict):
+        if len(value) == 1 and "$blob" in value:
+            return blobs.get(value["$blob"])
+        return {k: _resolve(v, blobs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve(v, blobs) for v in value]
+    return value
+
+
+class TraceWriter:
+    """Append-only writer for one run's trace."""
+
+    def __init__(
+        self,
+        run_dir: Path,
+        blob_dir: Path = BLOB_DIR,
+        codec: Optional[str] = None,
+    ):
+        self.run_dir = Path(run_dir)
+        self.codec = codec or ("zstd" if zstandard is not None else "gzip")
+        self.blobs = BlobStore(blob_dir)
+        self.path = self.run_dir / TRACE_FILES[self.codec]
+        self._file = open(self.path, "wb")
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self._buffered_since = 0.0  # monotonic time of the oldest buffered event
+        self._members: List[Tuple[int, int]] = []
+        self._steps: List[Tuple[int, int]] = []  # (member, tool_calls before)
+        self._events = 0
+        self._tool_calls = 0
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write_event(self, event: Dict[str, Any]):
+        """Append one trace event."""
+        line = json.dumps(
+            _externalize(event, self.blobs), separators=(",", ":"), ensure_ascii=False
+        )
+        self._events += 1
+        event_type = event.get("type")
+        if event_type == "tool_use":
+            self._tool_calls += 1
+
+        if event_type == "step_finish":
+            # step_finish gets a member of its own so it can be read alone
+            self._flush()
+            self._buffer.append(line.encode("utf-8") + b"\n")
+            self._flush()
+            self._steps.append((len(self._members) - 1, self._tool_calls))
+            return
+
+        now = time.monotonic()
+        if not self._buffer:
+            self._buffered_since = now
+        self._buffer.append(line.encode("utf-8") + b"\n")
+        self._buffered += len(self._buffer[-1])
+        if (
+            event_type in FLUSH_EVENT_TYPES
+            or self._buffered >= MEMBER_SIZE
+            or len(self._buffer) >= MEMBER_EVENTS
+            or now - self._buffered_since >= MEMBER_SECONDS
+        ):
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        data = _compress(self.codec, b"".join(self._buffer))
+        offset = self._file.tell()
+        self._file.write(data)
+        self._file.flush()
+        self._members.append((offset, len(data)))
+        self._buffer.clear()
+        self._buffered = 0
+
+    def close(self):
+        """Flush buffered events and write the index."""
+        if self._file.closed:
+            return
+        self._flush()
+        self._file.close()
+        index = {
+            "version": INDEX_VERSION,
+            "codec": self.codec,
+            "file": self.path.name,
+            "events": self._events,
+            "tool_calls": self._tool_calls,
+            "members": self._members,
+            "steps": self._steps,
+        }
+        tmp_path = self.run_dir / f"{INDEX_FILE}.tmp"
+        tmp_path.write_text(json.dumps(index, separators=(",", ":")))
+        os.replace(tmp_path, self.run_dir / INDEX_FILE)
+
+
+class TraceReader:
+    """Reads a run's trace in either the compressed or the legacy format."""
+
+    def __init__(self, run_dir: Path, blob_dir: Path = BLOB_DIR):
+        self.run_dir = Path(run_dir)
+        self.blobs = BlobStore(blob_dir)
+        self.index: Optional[Dict[str, Any]] = None
+        self.codec: Optional[str] = None
+        self.path: Optional[Path] = None
+        self._tool_calls: Optional[int] = None
+
+        index_path = self.run_dir / INDEX_FILE
+        if index_path.exists():
+            try:
+                self.index = json.loads(index_path.read_text())
+                self.codec = self.index["codec"]
+                self.path = self.run_dir / self.index["file"]
+            except (OSError, ValueError, KeyError):
+                self.index = None
+        if self.path is None:
+            # No (valid) index, e.g. the writer was killed: scan the members
+            for codec, name in TRACE_FILES.items():
+                if (self.run_dir / name).exists():
+                    self.codec, self.path = codec, self.run_dir / name
+                    break
+        if self.path is None:
+            self.path = self.run_dir / PLAIN_TRACE
+
+    def exists(self) -> bool:
+        return self.path is not None and self.path.exists()
+
+    def _lines(self) -> Iterator[bytes]:
+        if self.codec is None:
+            with self.path.open("rb") as f:
+                yield from f
+        elif self.codec == "gzip":
+            with gzip.open(self.path, "rb") as f:
+                yield from f
+        else:
+            with self.path.open("rb") as raw:
+                reader = zstandard.ZstdDecompressor().stream_reader(
+                    raw, read_across_frames=True
+                )
+                yield from io.BufferedReader(reader)
+
+    def iter_events(self, resolve_blobs: bool = True) -> Iterator[Dict[str, Any]]:
+        """Yield every event in order, with blob references expanded."""
+        for line in self._lines():
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            yield _resolve(event, self.blobs) if resolve_blobs else event
+
+    def iter_step_finish(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (tool calls so far, step_finish event) pairs.
+
+        With an index only the step_finish members are read and
+        decompressed; otherwise the whole trace is scanned.
+        """
+        if self.index is None:
+            tool_calls = 0
+            for event in self.iter_events(resolve_blobs=False):
+                if event.get("type") == "tool_use":
+                    tool_calls += 1
+                elif event.get("type") == "step_finish":
+                    yield tool_calls, event
+            self._tool_calls = tool_calls
+            return
+
+        members = self.index["members"]
+        with self.path.open("rb") as f:
+            for member, tool_calls in self.index["steps"]:
+                offset, length = members[member]
+                f.seek(offset)
+                data = _decompress(self.codec, f.read(length))
+                yield tool_calls, json.loads(data)
+
+    def tool_calls(self) -> int:
+        """Total number of tool_use events."""
+        if self.index is not None:
+            return self.index["tool_calls"]
+        if self._tool_calls is not None:
+            return self._tool_calls
+        return sum(
+            1
+            for event in self.iter_events(resolve_blobs=False)
+            if event.get("type") == "tool_use"
+        )
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Intermediate states of one command file.
+
+io.lua normally stores the level only after a whole command file has run, so
+`right,right,up,up` shows the state after the fourth move. With
+TRAJECTORY_EXPORT = true it also records the units that changed after every
+command() / undo() call and replaces trajectory.txt (next to the commands
+directory) once the file is done:
+
+    T <command key> <room width> <room height>
+    S 0 start <level won>                  full state before the file
+    + <record>
+    S 1 right <level won>                  changes after the first step
+    + <record>                             added / changed unit
+    - <id>                                 removed unit
+    E <command key>
+
+Units are keyed like in the delta log (see state_delta.unit_key).
+
+Usage:
+    trajectory = execute_with_trajectory(["right", "right", "up", "up"])
+    for step in trajectory.steps:
+        print(step.command, step.level_won, trajectory.table(step.index).positions("baba"))
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from automation.command_bridge import CommandBridge
+from automation.config import ACK_TIMEOUT, TRAJECTORY_PATH
+from automation.state_codec import UNIT_SEPARATOR, StateTable
+from automation.state_delta import unit_key
+
+
+class TrajectoryStep(NamedTuple):
+    index: int
+    command: str  # "start" for the state before the command file
+    level_won: bool
+    upserts: List[str]  # raw records
+    removals: List[str]  # unit keys
+
+
+class Trajectory:
+    """Steps of one command file, with the full state after each one."""
+
+    def __init__(self, command_key: int, room_size: Tuple[int, int], steps: List[TrajectoryStep]):
+        self.command_key = command_key
+        self.room_size = room_size
+        self.steps = steps
+        self._states: List[Dict[str, str]] = []
+        records: Dict[str, str] = {}
+        for step in steps:
+            records = dict(records)
+            for record in step.upserts:
+                records[unit_key(record)] = record
+            for key in step.removals:
+                records.pop(key, None)
+            self._states.append(records)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    @property
+    def commands(self) -> List[str]:
+        return [step.command for step in self.steps[1:]]
+
+    def state_string(self, index: int) -> str:
+        """The state after step `index` (0 = before the file) in `state=` format."""
+        return UNIT_SEPARATOR.join(self._states[index].values())
+
+    def table(self, index: int) -> StateTable:
+        return StateTable.parse(self.state_string(index), self.room_size)
+
+    def first_won(self) -> Optional[int]:
+        """Index of the first step after which the level was won."""
+        for step in self.steps[1:]:
+            if step.level_won:
+                return step.index
+        return None
+
+
+def parse_trajectory(text: str) -> Optional[Trajectory]:
+    """Parse trajectory.txt; None if it is incomplete."""
+    header = None
+    steps: List[TrajectoryStep] = []
+    for line in text.split("\n"):
+        if line.startswith("+ ") and steps:
+            steps[-1].upserts.append(line[2:])
+        elif line.startswith("- ") and steps:
+            steps[-1].removals.append(line[2:])
+        elif line.startswith("S "):
+            parts = line.split()
+            steps.append(TrajectoryStep(int(parts[1]), parts[2], parts[3] == "true", [], []))
+        elif line.startswith("T "):
+            parts = line.split()
+            header = (int(parts[1]), (int(parts[2]), int(parts[3])))
+        elif line.startswith("E ") and header is not None:
+            if int(line[2:]) == header[0]:
+                return Trajectory(header[0], header[1], steps)
+    return None
+
+
+def read_trajectory(path: Path = TRAJECTORY_PATH, command_key: Optional[int] = None) -> Optional[Trajectory]:
+    """The trajectory in `path`, None if missing or not for `command_key`."""
+    try:
+        trajectory = parse_trajectory(Path(path).read_text(encoding="utf-8"))
+    except OSError:
+        return None
+    if trajectory is None or (command_key is not None and trajectory.command_key != command_key):
+        return None
+    return trajectory
+
+
+def execute_with_trajectory(
+    commands: Iterable[str],
+    bridge: Optional[CommandBridge] = None,
+    path: Path = TRAJECTORY_PATH,
+    timeout: float = ACK_TIMEOUT,
+) -> Optional[Trajectory]:
+    """Run `commands` as one command file and return all intermediate states.
+
+    None if the game did not acknowledge the file in time or does not record
+    trajectories (TRAJECTORY_EXPORT disabled).
+    """
+    bridge = bridge or CommandBridge()
+    key = bridge.send(commands)
+    if not bridge.wait_for_ack(key, timeout):
+        return None
+    return read_trajectory(path, key)
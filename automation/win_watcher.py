@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Background watcher that reports a level win the moment the game writes it.
+
+Follows world_data.txt with the cheapest change notification the platform
+offers (inotify on Linux, kqueue on macOS) and falls back to stat polling.
+Every change is checked with the cached WorldData reader, so a notification
+that does not touch level_won costs one stat and one small section scan.
+
+Usage:
+    watcher = WinWatcher(STATE_PATH, on_win=process.kill)
+    watcher.start()
+    ...
+    watcher.stop()
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from automation.world_data import WorldData, file_signature
+
+POLL_INTERVAL = 0.05  # seconds between stats in the polling fallback
+
+# inotify constants (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class WinWatcher(threading.Thread):
+    """Daemon thread calling `on_win` once when level_won becomes true."""
+
+    def __init__(
+        self,
+        state_path: Path,
+        on_win: Callable[[], None],
+        poll_interval: float = POLL_INTERVAL,
+    ):
+        super().__init__(name="win-watcher", daemon=True)
+        self.state_path = Path(state_path)
+        self.on_win = on_win
+        self.poll_interval = poll_interval
+        self.backend = "none"
+        self.won_at: Optional[float] = None
+        self._world = WorldData.for_path(self.state_path)
+        self._stop_r, self._stop_w = os.pipe()
+        # stop() owns the pipe: it is closed only once the thread is done
+        self._stop_lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def won(self) -> bool:
+        return self.won_at is not None
+
+    def stop(self):
+        """Stop watching, wait for the thread and close the pipe.
+
+        Safe to call more than once, after the thread returned on its own
+        and without the thread ever being started.
+        """
+        with self._stop_lock:
+            if self._closed:
+                return
+            self._closed = True
+            try:
+                os.write(self._stop_w, b"x")
+            except OSError:
+                pass
+            if self.is_alive() and threading.current_thread() is not self:
+                self.join()
+            for fd in (self._stop_r, self._stop_w):
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+    def run(self):
+        if self._check():
+            return
+        if sys.platform.startswith("linux") and self._run_inotify():
+            return
+        if hasattr(select, "kqueue") and self._run_kqueue():
+            return
+        self._run_polling()
+
+    def _check(self) -> bool:
+        """Fire the callback if the level is won. Returns True once fired."""
+        if self._world.level_won():
+            self.won_at = time.time()
+            self.on_win()
+            return True
+        return False
+
+    def _stopped(self, timeout: float = 0) -> bool:
+        ready, _, _ = select.select([self._stop_r], [], [], timeout)
+        return bool(ready)
+
+    def _run_polling(self):
+        self.backend = "polling"
+        last = file_signature(self.state_path)
+        while not self._stopped(self.poll_interval):
+            current = file_signature(self.state_path)
+            if current != last:
+                last = current
+                if self._check():
+                    return
+
+    def _run_inotify(self) -> bool:
+        """Watch the parent directory, so atomic replaces are seen too."""
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            return False
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            return False
+
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            return False
+        try:
+            mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+            wd = libc.inotify_add_watch(fd, bytes(self.state_path.parent), mask)
+            if wd < 0:
+                return False
+            self.backend = "inotify"
+            name = os.fsencode(self.state_path.name)
+            # The file may have changed between the first check and the watch
+            if self._check():
+                return True
+            while True:
+                ready, _, _ = select.select([fd, self._stop_r], [], [])
+                if self._stop_r in ready:
+                    return True
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                offset = 0
+                touched = False
+                while offset < len(data):
+                    _, _, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+                    offset += _INOTIFY_EVENT.size
+                    event_name = data[offset : offset + length].rstrip(b"\0")
+                    offset += length
+                    touched = touched or event_name == name
+                if touched and self._check():
+                    return True
+        finally:
+            os.close(fd)
+
+    def _run_kqueue(self) -> bool:
+        """Watch the file vnode, re-opening it whenever it is replaced."""
+        kq = select.kqueue()
+        self.backend = "kqueue"
+        file_fd = None
+        try:
+            stop_event = select.kevent(
+                self._stop_r, filter=select.KQ_FILTER_READ, flags=select.KQ_EV_ADD
+            )
+            kq.control([stop_event], 0, 0)
+            vnode_flags = (
+                select.KQ_NOTE_WRITE
+                | select.KQ_NOTE_EXTEND
+                | select.KQ_NOTE_DELETE
+                | select.KQ_NOTE_RENAME
+            )
+            while True:
+                if file_fd is None:
+                    try:
+                        file_fd = os.open(self.state_path, os.O_RDONLY)
+                    except OSError:
+                        file_fd = None
+                    if file_fd is not None:
+                        kq.control(
+                            [
+                                select.kevent(
+                                    file_fd,
+                                    filter=select.KQ_FILTER_VNODE,
+                                    flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR,
+                                    fflags=vnode_flags,
+                                )
+                            ],
+                            0,
+                            0,
+                        )
+                    # Catch writes that happened while no descriptor was open
+                    if self._check():
+                        return True
+
+                # Without an open file, wake up regularly to retry the open
+                timeout = None if file_fd is not None else self.poll_interval
+                for event in kq.control(None, 4, timeout):
+                    if event.ident == self._stop_r:
+                        return True
+                    if event.fflags & (select.KQ_NOTE_DELETE | select.KQ_NOTE_RENAME):
+                        os.close(file_fd)
+                        file_fd = None
+                if self._check():
+                    return True
+        finally:
+            if file_fd is not None:
+                os.close(file_fd)
+            kq.close()
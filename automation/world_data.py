@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Cached reader for the game's world_data.txt.
+
+The mod stores everything it exports in one INI file, and the [state] section
+holds a single line with every unit of the level. Most callers only need one
+small key (e.g. level_won), so instead of parsing the whole INI this module
+memory-maps the file and scans just the requested section for the requested
+key. Values are cached until the file's (inode, mtime, size) changes.
+
+Usage:
+    from automation.world_data import WorldData
+
+    world = WorldData.for_path(STATE_PATH)
+    if world.level_won():
+        ...
+"""
+
+import mmap
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from automation.config import STATE_PATH
+
+# Section each exported key lives in (see lua/io.lua)
+KEY_SECTIONS = {
+    "level_won": "status",
+    "level_name": "status",
+    "room_size": "state",
+    "state": "state",
+    "last_processed": "file",
+    "levels": "map",
+}
+
+_NEXT_SECTION = re.compile(rb"^\[", re.M)
+
+
+def _section_pattern(section: str) -> "re.Pattern[bytes]":
+    return re.compile(rb"^[ \t]*\[" + re.escape(section.encode()) + rb"\][ \t]*\r?$", re.M)
+
+
+def _key_pattern(key: str) -> "re.Pattern[bytes]":
+    return re.compile(
+        rb"^[ \t]*" + re.escape(key.encode()) + rb"[ \t]*=[ \t]*([^\r\n]*?)[ \t]*\r?$",
+        re.M,
+    )
+
+
+_SECTION_PATTERNS = {s: _section_pattern(s) for s in set(KEY_SECTIONS.values())}
+_KEY_PATTERNS = {k: _key_pattern(k) for k in KEY_SECTIONS}
+
+Signature = Tuple[int, int, int]
+
+
+def file_signature(path: Path) -> Optional[Signature]:
+    """(inode, mtime_ns, size) of `path`, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _find_value_span(buf, key: str) -> Optional[Tuple[int, int]]:
+    """Byte span of `key`'s value inside its section, or None if absent."""
+    section = KEY_SECTIONS[key]
+    header = _SECTION_PATTERNS[section].search(buf)
+    if header is None:
+        return None
+    start = header.end()
+    next_section = _NEXT_SECTION.search(buf, start + 1)
+    end = next_section.start() if next_section else len(buf)
+    match = _KEY_PATTERNS[key].search(buf, start, end)
+    if match is None:
+        return None
+    return match.span(1)
+
+
+class WorldData:
+    """Lazily scanned, stat-validated view of one world_data.txt."""
+
+    _readers: Dict[Path, "WorldData"] = {}
+    _readers_lock = threading.Lock()
+
+    def __init__(self, path: Path = STATE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._signature: Optional[Signature] = None
+        self._values: Dict[str, Optional[str]] = {}
+
+    @classmethod
+    def for_path(cls, path: Path = STATE_PATH) -> "WorldData":
+        """Shared reader for `path`, so the cache is reused across callers."""
+        path = Path(path)
+        with cls._readers_lock:
+            reader = cls._readers.get(path)
+            if reader is None:
+                reader = cls._readers[path] = cls(path)
+            return reader
+
+    def read(self, keys: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Return the raw string values of `keys` (None for missing keys).
+
+        Only keys that are not cached for the current file version are
+        scanned. If the file changes while it is being scanned, the scan is
+        retried against the new version.
+
+        Raises:
+            KeyError: A key that the mod does not export
+        """
+        keys = list(keys)
+        for key in keys:
+            if key not in KEY_SECTIONS:
+                raise KeyError(f"Unknown world_data key: {key}")
+
+        with self._lock:
+            for _ in range(3):
+                signature = file_signature(self.path)
+                if signature is None:
+                    self._signature = None
+                    self._values.clear()
+                    return {key: None for key in keys}
+                if signature != self._signature:
+                    self._signature = signature
+                    self._values.clear()
+
+                missing = [key for key in keys if key not in self._values]
+                if not missing:
+                    break
+                scanned = self._scan(missing)
+                if file_signature(self.path) == signature:
+                    self._values.update(scanned)
+                    break
+            return {key: self._values.get(key) for key in keys}
+
+    def _scan(self, keys: Iterable[str]) -> Dict[str, Optional[str]]:
+        values: Dict[str, Optional[str]] = {key: None for key in keys}
+        try:
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return values
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    for key in values:
+                        span = _find_value_span(buf, key)
+                        if span is not None:
+                            values[key] = buf[span[0] : span[1]].decode(
+                                "utf-8", errors="replace"
+                            )
+        except OSError:
+            pass
+        return values
+
+    def get(self, key: str) -> Optional[str]:
+        return self.read([key])[key]
+
+    def level_won(self) -> Optional[bool]:
+        """True/False from [status] level_won, None if unreadable."""
+        value = self.get("level_won")
+        if value is None:
+            return None
+        return value.lower() == "true"
+
+    def level_name(self) -> Optional[str]:
+        """Name of the current level ("map" on the overworld), None if unknown."""
+        return self.get("level_name")
+
+    def room_size(self) -> Optional[Tuple[int, int]]:
+        """(width, height) as reported by the game, including the border."""
+        value = self.get("room_size")
+        try:
+            width, height = value.split("|")
+            return int(width), int(height)
+        except (AttributeError, ValueError):
+            return None
+
+    def last_processed(self) -> Optional[int]:
+        value = self.get("last_processed")
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def state(self) -> Optional[str]:
+        """The raw `€`-separated unit records of the current level."""
+        return self.get("state")
+
+
+def reset_level_won(path: Path = STATE_PATH) -> bool:
+    """Set [status] level_won to false, leaving the rest of the file untouched.
+
+    The file is replaced atomically. Returns False if the file or the key
+    does not exist.
+    """
+    path = Path(path)
+    try:
+        content = path.read_bytes()
+    except OSError:
+        return False
+    span = _find_value_span(content, "level_won")
+    if span is None:
+        return False
+    if content[span[0] : span[1]] == b"false":
+        return True
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(content[: span[0]] + b"false" + content[span[1] :])
+    os.replace(tmp_path, path)
+    return True
@@ -8,26 +8,61 @@ end
 
 LEVEL_WON = "false"
 
--- At the start of each level, write the current world state to the file.
-table.insert(mod_hook_functions["level_start"], function()
-    local gates = MF_findgates()
-    for key, gateid in pairs(gates) do
-        local gate = mmf.newObject(gateid)
-        for k, v in pairs(gate) do
-            print(k, v)
-        end
-    end
+-- Opt-in: also write a fixed-layout binary snapshot of the level to
+-- SNAPSHOT_FILE every time the state is exported (see automation/snapshot.py)
+BINARY_SNAPSHOT = false
+local SNAPSHOT_FILE = "Data/baba_is_eval/state.bin"
+local SNAPSHOT_MAGIC = "BABASNAP"
+local SNAPSHOT_VERSION = 1
+local snapshot_seq = 0
+
+-- Opt-in: append the units that changed since the previous export to
+-- DELTA_FILE, keyed by unit ID (see automation/state_delta.py)
+DELTA_EXPORT = false
+local DELTA_FILE = "Data/baba_is_eval/state.delta"
+local delta_seq = 0
+local previous_records = nil
+
+-- Opt-in: record the units that changed after every command() / undo() of a
+-- command file to TRAJECTORY_FILE (see automation/trajectory.py)
+TRAJECTORY_EXPORT = false
+local TRAJECTORY_FILE = "Data/baba_is_eval/trajectory.txt"
+
+-- Acknowledgement of the last executed command file: "<N>\n", written after
+-- the state for N has been stored (see automation/command_bridge.py)
+local ACK_FILE = "Data/baba_is_eval/ack"
+-- Command numbering restarts with the game, so an old ack is meaningless
+os.remove(ACK_FILE)
+-- Readiness signal for the evaluator (automation/readiness.py): the mod is
+-- loaded, so the title screen is about to accept input
+print("baba_is_eval loaded.")
+
+-- Little-endian encoders (string.pack is not available in every Lua build)
+local function u8(n)
+    return string.char(math.floor(n) % 256)
+end
+
+local function u16(n)
+    n = math.floor(n) % 65536
+    return string.char(n % 256, math.floor(n / 256))
+end
+
+local function u32(n)
+    n = math.floor(n) % 4294967296
+    return string.char(n % 256, math.floor(n / 256) % 256, math.floor(n / 65536) % 256, math.floor(n / 16777216))
+end
+
+-- Collect the exported fields of every live unit in the level.
+local function collect_units()
     local units = MF_getunits()
     if not units then
-        print("Warning: MF_getunits returned nil")
-        return
+        return nil
     end
-    local state_data = {}
-
+    local rows = {}
     for key, unitid in pairs(units) do
         local unit = mmf.newObject(unitid)
         if unit.strings[UNITNAME] ~= "undefined" and unit.flags[DEAD] == false then
-            local unit_data = {
+            table.insert(rows, {
                 key,
                 unit.strings[UNITNAME],
                 unit.strings[UNITTYPE],
@@ -49,10 +84,241 @@ table.insert(mod_hook_functions["level_start"], function()
                 unit.strings[FLOAT],
                 unit.strings[A],
                 unit.strings[ID],
-            }
-            table.insert(state_data, table.concat(unit_data, "|"))
+            })
+        end
+    end
+    return rows
+end
+
+-- Level icons on the overworld as "x|y|file|name|number" records joined by
+-- "€", so the evaluator and tools can route the cursor to a level by name
+-- (see automation/overworld.py)
+local function map_levels()
+    local units = MF_getunits()
+    if not units then
+        return nil
+    end
+    local records = {}
+    for _, unitid in pairs(units) do
+        local unit = mmf.newObject(unitid)
+        if unit.strings[UNITNAME] == "level" and unit.flags[DEAD] == false then
+            table.insert(records, table.concat({
+                unit.values[XPOS],
+                unit.values[YPOS],
+                U_LEVELFILE and unit.strings[U_LEVELFILE] or "",
+                U_LEVELNAME and unit.strings[U_LEVELNAME] or "",
+                VISUALLEVEL and tostring(unit.values[VISUALLEVEL] or "") or "",
+            }, "|"))
+        end
+    end
+    return table.concat(records, "€")
+end
+
+-- Key of a unit in the delta log and trajectories: its ID, or "k<key>".
+local function unit_id(row)
+    local id = row[21]
+    if id == nil or id == "" then
+        id = "k" .. tostring(row[1])
+    end
+    return id
+end
+
+-- Write the binary snapshot: a 32-byte header, a name table, then one
+-- 12-byte row per unit. Written to a temp file and renamed into place so
+-- readers never see a partial snapshot.
+local function write_snapshot(rows, last_processed)
+    snapshot_seq = snapshot_seq + 1
+
+    local name_ids = {}
+    local names = {}
+    local body = {}
+    for _, row in ipairs(rows) do
+        local name = row[2]
+        local name_id = name_ids[name]
+        if name_id == nil then
+            table.insert(names, u8(string.len(name)) .. name)
+            name_id = #names - 1
+            name_ids[name] = name_id
+        end
+        local is_text = 0
+        if row[3] == "text" then
+            is_text = 1
+        end
+        table.insert(body, u16(name_id) .. u16(row[4]) .. u16(row[5]) .. u8(row[6]) .. u8(is_text) .. u32(tonumber(row[21]) or 0))
+    end
+
+    local flags = 0
+    if LEVEL_WON == "true" then
+        flags = 1
+    end
+    local header = SNAPSHOT_MAGIC
+        .. u16(SNAPSHOT_VERSION) .. u16(flags)
+        .. u32(snapshot_seq) .. u32(last_processed)
+        .. u16(roomsizex) .. u16(roomsizey)
+        .. u16(#names) .. u16(12)
+        .. u32(#body)
+
+    local tmp_file = SNAPSHOT_FILE .. ".tmp"
+    local file = io.open(tmp_file, "wb")
+    if not file then
+        print("Warning: could not write " .. tmp_file)
+        return
+    end
+    file:write(header, table.concat(names), table.concat(body))
+    file:close()
+    os.remove(SNAPSHOT_FILE)
+    os.rename(tmp_file, SNAPSHOT_FILE)
+end
+
+-- Append one block to the delta log. A block is a header line
+--   F <seq> <last_processed> <room width> <room height>   (full state)
+--   D <seq> <last_processed>                             (changes only)
+-- followed by "+ <record>" for added or changed units, "- <id>" for removed
+-- ones, and "E <seq>". A full block replaces the log (new file, so readers
+-- notice even if it is longer than what they had read).
+local function write_delta(rows, state_data, last_processed, full)
+    delta_seq = delta_seq + 1
+    full = full or previous_records == nil
+
+    local records = {}
+    local lines = {}
+    for i, row in ipairs(rows) do
+        local id = unit_id(row)
+        local record = state_data[i]
+        records[id] = record
+        if full or previous_records[id] ~= record then
+            table.insert(lines, "+ " .. record)
         end
     end
+    if not full then
+        for id, _ in pairs(previous_records) do
+            if records[id] == nil then
+                table.insert(lines, "- " .. id)
+            end
+        end
+    end
+    previous_records = records
+
+    local header = "D " .. delta_seq .. " " .. last_processed
+    local path = DELTA_FILE
+    local mode = "a"
+    if full then
+        header = "F " .. delta_seq .. " " .. last_processed .. " " .. roomsizex .. " " .. roomsizey
+        path = DELTA_FILE .. ".tmp"
+        mode = "w"
+    end
+    table.insert(lines, 1, header)
+    table.insert(lines, "E " .. delta_seq)
+
+    local file = io.open(path, mode)
+    if not file then
+        print("Warning: could not write " .. path)
+        return
+    end
+    file:write(table.concat(lines, "\n"), "\n")
+    file:close()
+    if full then
+        os.remove(DELTA_FILE)
+        os.rename(path, DELTA_FILE)
+    end
+end
+
+-- Append one trajectory step: "S <step> <command> <level won>" followed by
+-- "+ <record>" / "- <id>" lines relative to the previous step. Returns the
+-- records of this step.
+local function record_step(lines, previous, step, command_name)
+    local records = {}
+    table.insert(lines, "S " .. step .. " " .. command_name .. " " .. LEVEL_WON)
+    for _, row in ipairs(collect_units() or {}) do
+        local id = unit_id(row)
+        local record = table.concat(row, "|")
+        records[id] = record
+        if previous[id] ~= record then
+            table.insert(lines, "+ " .. record)
+        end
+    end
+    for id, _ in pairs(previous) do
+        if records[id] == nil then
+            table.insert(lines, "- " .. id)
+        end
+    end
+    return records
+end
+
+-- Run a command file with command() and undo() wrapped so that every step is
+-- recorded, then replace TRAJECTORY_FILE with
+--   T <command key> <room width> <room height>
+--   S 0 start <level won>   (full state before the file)
+--   S 1 <command> ...       (changes after each step)
+--   E <command key>
+local function run_with_trajectory(command_file, command_key)
+    local probe = io.open(command_file, "r")
+    if not probe then
+        return false, "no command file"
+    end
+    probe:close()
+
+    local lines = { "T " .. command_key .. " " .. roomsizex .. " " .. roomsizey }
+    local previous = record_step(lines, {}, 0, "start")
+    local step = 0
+    local original_command, original_undo = command, undo
+    command = function(name, ...)
+        local result = original_command(name, ...)
+        step = step + 1
+        previous = record_step(lines, previous, step, tostring(name))
+        return result
+    end
+    undo = function(...)
+        local result = original_undo(...)
+        step = step + 1
+        previous = record_step(lines, previous, step, "undo")
+        return result
+    end
+    local success, err = pcall(function() dofile(command_file) end)
+    command, undo = original_command, original_undo
+    if not success then
+        return false, err
+    end
+
+    table.insert(lines, "E " .. command_key)
+    local tmp_file = TRAJECTORY_FILE .. ".tmp"
+    local file = io.open(tmp_file, "w")
+    if file then
+        file:write(table.concat(lines, "\n"), "\n")
+        file:close()
+        os.remove(TRAJECTORY_FILE)
+        os.rename(tmp_file, TRAJECTORY_FILE)
+    else
+        print("Warning: could not write " .. tmp_file)
+    end
+    return true
+end
+
+-- Atomically replace the acknowledgement file.
+local function write_ack(command_key)
+    local tmp_file = ACK_FILE .. ".tmp"
+    local file = io.open(tmp_file, "w")
+    if not file then
+        print("Warning: could not write " .. tmp_file)
+        return
+    end
+    file:write(tostring(command_key), "\n")
+    file:close()
+    os.remove(ACK_FILE)
+    os.rename(tmp_file, ACK_FILE)
+end
+
+-- Store the level state in the world data (and the binary snapshot / delta
+-- log if enabled). `full` restarts the delta log, e.g. on level start.
+local function export_state(last_processed, full)
+    local rows = collect_units()
+    if not rows then
+        return false
+    end
+    local state_data = {}
+    for _, row in ipairs(rows) do
+        table.insert(state_data, table.concat(row, "|"))
+    end
 
     local state_string = table.concat(state_data, "€")
     MF_store("world", "state", "state", state_string)
@@ -60,12 +326,47 @@ table.insert(mod_hook_functions["level_start"], function()
     -- Store room size information
     MF_store("world", "state", "room_size", roomsizex .. "|" .. roomsizey)
 
-    -- Initialize the last processed command file number
-    MF_store("world", "file", "last_processed", "0")
+    -- Store the last processed command file number
+    MF_store("world", "file", "last_processed", tostring(last_processed))
 
-    if MF_read("level", "general", "name") ~= "map" then
+    if BINARY_SNAPSHOT then
+        write_snapshot(rows, last_processed)
+    end
+    if DELTA_EXPORT then
+        write_delta(rows, state_data, last_processed, full)
+    end
+    return true
+end
+
+-- At the start of each level, write the current world state to the file.
+table.insert(mod_hook_functions["level_start"], function()
+    local gates = MF_findgates()
+    for key, gateid in pairs(gates) do
+        local gate = mmf.newObject(gateid)
+        for k, v in pairs(gate) do
+            print(k, v)
+        end
+    end
+
+    local level_name = MF_read("level", "general", "name")
+    if level_name ~= "map" then
         LEVEL_WON = "false"
     end
+    -- "map" while on the overworld, so the evaluator can tell where the game is
+    MF_store("world", "status", "level_name", level_name)
+    if level_name == "map" then
+        local levels = map_levels()
+        if levels then
+            MF_store("world", "map", "levels", levels)
+        end
+    end
+
+    -- Initialize the last processed command file number
+    if not export_state(0, true) then
+        print("Warning: MF_getunits returned nil")
+        return
+    end
+
     MF_store("world", "status", "level_won", LEVEL_WON)
 
     print("World state saved.")
@@ -76,58 +377,36 @@ local movement_commands = {}
 -- Global variable to track the key of the last command set that was executed.
 local last_command_key = 0
 local command_check_time = 0
-local command_check_interval = 1000 -- Check every 60 frames (approximately 1 second at 60 FPS)
+local command_check_interval = 100 -- Check every 6 frames (approximately 0.1 seconds at 60 FPS)
+-- Set by reset_commands() in a command file: numbering restarts at 0.lua
+-- once that file has been acknowledged (used between levels of a session)
+local reset_pending = false
+
+function reset_commands()
+    reset_pending = true
+end
 
 -- Function to check for a new command file and update world state if found
 local function check_and_execute_command_file()
     local command_file = "Data/baba_is_eval/commands/" .. tostring(last_command_key) .. ".lua"
-    local success, err = pcall(function() dofile(command_file) end)
+    local success, err
+    if TRAJECTORY_EXPORT then
+        success, err = run_with_trajectory(command_file, last_command_key)
+    else
+        success, err = pcall(function() dofile(command_file) end)
+    end
     if success then
         last_command_key = last_command_key + 1
         -- After executing a command file, update the world state as in level_start
-        local units = MF_getunits()
-        if not units then
+        if not export_state(last_command_key - 1) then
             print("Warning: MF_getunits returned nil in check_and_execute_command_file")
             return
         end
-        local state_data = {}
-        for key, unitid in pairs(units) do
-            local unit = mmf.newObject(unitid)
-            if unit.strings[UNITNAME] ~= "undefined" and unit.flags[DEAD] == false then
-                local unit_data = {
-                    key,
-                    unit.strings[UNITNAME],
-                    unit.strings[UNITTYPE],
-                    unit.values[XPOS],
-                    unit.values[YPOS],
-                    unit.values[DIR],
-                    unit.strings[VISUALDIR],
-                    unit.values[ZLAYER],
-                    unit.strings[MOVED],
-                    unit.values[EFFECT],
-                    unit.strings[COLOUR],
-                    unit.strings[VISUALSTYLE],
-                    unit.strings[VISUALLEVEL],
-                    unit.strings[CLEARCOLOUR],
-                    unit.strings[DECOR],
-                    unit.strings[ONLINE],
-                    unit.strings[COMPLETED],
-                    unit.strings[EFFECTCOUNT],
-                    unit.strings[FLOAT],
-                    unit.strings[A],
-                    unit.strings[ID]
-                }
-                table.insert(state_data, table.concat(unit_data, "|"))
-            end
+        write_ack(last_command_key - 1)
+        if reset_pending then
+            reset_pending = false
+            last_command_key = 0
         end
-        local state_string = table.concat(state_data, "€")
-        MF_store("world", "state", "state", state_string)
-
-        -- Store room size information
-        MF_store("world", "state", "room_size", roomsizex .. "|" .. roomsizey)
-
-        -- Store the last processed command file number
-        MF_store("world", "file", "last_processed", tostring(last_command_key - 1))
 
         print("World state saved after command.")
     end
@@ -147,5 +426,11 @@ table.insert(mod_hook_functions["level_win"], function()
     if MF_read("level", "general", "name") ~= "map" then
         LEVEL_WON = "true"
         MF_store("world", "status", "level_won", LEVEL_WON)
+        if BINARY_SNAPSHOT then
+            local rows = collect_units()
+            if rows then
+                write_snapshot(rows, last_command_key - 1)
+            end
+        end
     end
 end)
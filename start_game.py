@@ -1,22 +1,31 @@
+import argparse
 import os
 import subprocess
 import threading
-import configparser
 import signal
 from pathlib import Path
 
+from automation.world_data import reset_level_won
+
 
 DATA_PATH = Path(
     f"/Users/{os.getenv('USER')}/Library/Application Support/Steam/steamapps/common/Baba Is You/Baba Is You.app/Contents/Resources/Data"
 )
+
+parser = argparse.ArgumentParser(description="Start Baba Is You with the eval mod")
+parser.add_argument(
+    "--data-dir",
+    type=Path,
+    default=DATA_PATH,
+    help="Game Data directory (default: the Steam install)",
+)
+args = parser.parse_args()
+
+DATA_PATH = args.data_dir.resolve()
 STATE_PATH = DATA_PATH / "Worlds" / "baba" / "world_data.txt"
 
-config = configparser.ConfigParser()
-config.read(STATE_PATH, encoding="utf-8")
-config["status"]["level_won"] = "false"
-# Write the updated config back to the file
-with open(STATE_PATH, "w", encoding="utf-8") as f:
-    config.write(f)
+if not reset_level_won(STATE_PATH):
+    print(f"Warning: could not reset level_won in {STATE_PATH}")
 
 # run setup script
 result = subprocess.run(
@@ -28,13 +37,15 @@ print(result.stdout)
 def stream_output(pipe):
     """Reads lines from subprocess pipe and writes to stdout."""
     for line in iter(pipe.readline, ""):
-        print(line, end="")  # Already includes newline
+        # Flushed per line: the evaluator waits on lines like "World state saved."
+        print(line, end="", flush=True)  # Already includes newline
     pipe.close()
 
 
-# Start the game as a subprocess
+# Start the game as a subprocess. The absolute binary path lets callers tell
+# parallel instances apart (e.g. `pkill -f <app>/Contents/MacOS/Chowdren`).
 process = subprocess.Popen(
-    ["../../MacOS/Chowdren"],
+    [str(DATA_PATH.parent.parent / "MacOS" / "Chowdren")],
     stdout=subprocess.PIPE,
     stderr=subprocess.STDOUT,
     text=True,